@@ -1,8 +1,7 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
-import csv
+from werkzeug.exceptions import RequestEntityTooLarge
 import io
-import json
 import os
 import time
 from collections import Counter
@@ -10,19 +9,53 @@ from datetime import datetime
 from typing import List, Tuple
 
 from fca import build_concept_lattice, lattice_to_json
+from itemset_mining import find_frequent_itemsets
+from weighted_mining import mine_weighted_itemsets
+from pairwise import PairCooccurrence
+from closed_itemsets import CONDENSED_OUTPUTS, mine_condensed
+from topk import RANK_METRICS, top_k_itemsets, top_k_rules
+from rules import generate_rules
+from itemset_trie import ItemsetTrie
+from rule_store import DEFAULT_PAGE_SIZE, RuleStore
+from recommender import RuleRecommender
+from basket_scoring import RuleMatrix, score_baskets
+from ingest import MAX_INFLATED_BYTES, inflate_request_body, read_transactions, write_parquet_snapshot
+from transaction_store import TransactionStore
 
 app = Flask(__name__)
 
 # Configure CORS for production
 cors_origins = os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://localhost:3001,https://project-x-full-stack.vercel.app').split(',')
-CORS(app, origins=cors_origins, methods=['GET', 'POST', 'OPTIONS'], allow_headers=['Content-Type'])
+CORS(app, origins=cors_origins, methods=['GET', 'POST', 'OPTIONS'], allow_headers=['Content-Type', 'Content-Encoding'])
+
+
+@app.before_request
+def decompress_request_body():
+    """Inflate gzip/zstd request bodies before the upload form is parsed"""
+    try:
+        if inflate_request_body(request.environ):
+            # Parse the inflated body here, so an oversized one is rejected before any route reads it
+            request.get_data(parse_form_data=True)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 415
+    except RequestEntityTooLarge:
+        return jsonify({'error': f'Inflated request body exceeds {MAX_INFLATED_BYTES} bytes'}), 413
+
 
 # Global variables to store processed data and status
-processed_transactions: List[List[str]] | None = None
+processed_transactions: TransactionStore | None = None
 original_data = None
 algorithms_performance: dict = {}
 latest_results = {"itemsets": [], "rules": []}
 latest_quality_metrics = {}
+# (itemset list, ItemsetTrie) for the latest_results itemsets the trie was built from
+latest_itemset_trie: Tuple[list, ItemsetTrie] | None = None
+# (rule list, RuleStore) for the latest_results rules the store was built from
+latest_rule_store: Tuple[list, RuleStore] | None = None
+# (rule list, RuleRecommender) for /recommend, rebuilt when the rules change
+latest_recommender: Tuple[list, RuleRecommender] | None = None
+# (rule list, RuleMatrix) for bulk /score, rebuilt when the rules change
+latest_rule_matrix: Tuple[list, RuleMatrix] | None = None
 
 processing_state = {
     "is_processing": False,
@@ -42,197 +75,13 @@ def update_processing_state(**kwargs) -> None:
     processing_state.update(kwargs)
 
 
-def read_uploaded_text(file_storage) -> str:
-    file_storage.stream.seek(0)
-    content = file_storage.read()
-    file_storage.stream.seek(0)
-    if isinstance(content, bytes):
-        return content.decode('utf-8', errors='ignore')
-    return str(content)
-
+def extract_transactions(file_storage) -> Tuple[TransactionStore, List[str]]:
+    store = TransactionStore.from_encoded(read_transactions(file_storage))
+    return store, store.columns
 
-def parse_simple_csv(text: str) -> List[List[str]]:
-    transactions = []
-    for line in text.strip().splitlines():
-        if not line.strip():
-            continue
-        items = [item.strip().strip('"').strip("'") for item in line.split(',') if item.strip()]
-        if items:
-            transactions.append(items)
-    return transactions
 
-
-def parse_structured_csv(text: str) -> Tuple[List[List[str]], List[str]]:
-    reader = csv.DictReader(io.StringIO(text))
-    fieldnames = list(reader.fieldnames or [])
-    rows = list(reader)
-
-    if not rows:
-        return parse_simple_csv(text), fieldnames
-
-    transaction_col = next((col for col in fieldnames if 'transaction' in col.lower() and 'id' in col.lower()), None)
-    single_item_col = None
-    if transaction_col:
-        single_item_col = next((col for col in fieldnames if col != transaction_col and col.lower() in {'item', 'items', 'product', 'products'}), None)
-
-    transactions: List[List[str]] = []
-
-    if transaction_col and single_item_col:
-        grouped: dict[str, List[str]] = {}
-        for row in rows:
-            transaction_id = (row.get(transaction_col) or '').strip()
-            item_value = (row.get(single_item_col) or '').strip()
-            if not transaction_id or not item_value:
-                continue
-            grouped.setdefault(transaction_id, []).append(item_value)
-        transactions = list(grouped.values())
-    elif transaction_col:
-        item_columns = [col for col in fieldnames if col != transaction_col]
-        for row in rows:
-            items = [(row.get(col) or '').strip() for col in item_columns if (row.get(col) or '').strip()]
-            if items:
-                transactions.append(items)
-    else:
-        transactions = parse_simple_csv(text)
-
-    return transactions, fieldnames
-
-
-def parse_json_transactions(text: str) -> List[List[str]]:
-    data = json.loads(text)
-    transactions: List[List[str]] = []
-
-    if isinstance(data, dict):
-        if isinstance(data.get('transactions'), list):
-            transactions = [
-                [str(item).strip() for item in transaction if str(item).strip()]
-                for transaction in data['transactions']
-                if isinstance(transaction, list)
-            ]
-        elif isinstance(data.get('data'), list):
-            return parse_json_transactions(json.dumps(data['data']))
-    elif isinstance(data, list):
-        if not data:
-            return []
-        if isinstance(data[0], list):
-            transactions = [
-                [str(item).strip() for item in transaction if str(item).strip()]
-                for transaction in data
-            ]
-        elif isinstance(data[0], dict):
-            transaction_key = next((key for key in data[0].keys() if 'transaction' in key.lower()), None)
-            item_key = next((key for key in data[0].keys() if key != transaction_key and key.lower() in {'item', 'items', 'product', 'products'}), None)
-            if transaction_key and item_key:
-                grouped: dict[str, List[str]] = {}
-                for row in data:
-                    transaction_id = str(row.get(transaction_key, '')).strip()
-                    item_value = str(row.get(item_key, '')).strip()
-                    if not transaction_id or not item_value:
-                        continue
-                    grouped.setdefault(transaction_id, []).append(item_value)
-                transactions = list(grouped.values())
-
-    return transactions
-
-
-def extract_transactions(file_storage) -> Tuple[List[List[str]], List[str]]:
-    filename = (file_storage.filename or '').lower()
-    text = read_uploaded_text(file_storage)
-
-    if filename.endswith('.json'):
-        transactions = parse_json_transactions(text)
-        header_columns: List[str] = []
-    else:
-        transactions, header_columns = parse_structured_csv(text)
-
-    clean_transactions = [
-        [item for item in (entry.strip() for entry in transaction) if item]
-        for transaction in transactions
-        if transaction
-    ]
-
-    return clean_transactions, header_columns
-
-
-def calculate_support(itemset, transactions):
-    count = 0
-    for transaction in transactions:
-        if all(item in transaction for item in itemset):
-            count += 1
-    return count / len(transactions)
-
-
-def find_frequent_itemsets(transactions, min_support):
-    all_items = set()
-    for transaction in transactions:
-        all_items.update(transaction)
-
-    frequent_itemsets = []
-
-    for item in all_items:
-        support = calculate_support([item], transactions)
-        if support >= min_support:
-            frequent_itemsets.append({'itemset': [item], 'support': support, 'length': 1})
-
-    frequent_1_items = [fs['itemset'][0] for fs in frequent_itemsets]
-    for i, item1 in enumerate(frequent_1_items):
-        for item2 in frequent_1_items[i + 1:]:
-            itemset = [item1, item2]
-            support = calculate_support(itemset, transactions)
-            if support >= min_support:
-                frequent_itemsets.append({'itemset': itemset, 'support': support, 'length': 2})
-
-    return frequent_itemsets
-
-
-def generate_association_rules(frequent_itemsets, min_confidence=0.5):
-    rules = []
-
-    for itemset_data in frequent_itemsets:
-        if itemset_data['length'] != 2:
-            continue
-        items = itemset_data['itemset']
-        support_ab = itemset_data['support']
-
-        support_a = next((fs['support'] for fs in frequent_itemsets if fs['itemset'] == [items[0]]), 0)
-        support_b = next((fs['support'] for fs in frequent_itemsets if fs['itemset'] == [items[1]]), 0)
-
-        if support_a > 0:
-            confidence_ab = support_ab / support_a
-            if confidence_ab >= min_confidence:
-                lift_ab = confidence_ab / support_b if support_b else confidence_ab
-                rules.append({
-                    'antecedents': [items[0]],
-                    'consequents': [items[1]],
-                    'support': support_ab,
-                    'confidence': confidence_ab,
-                    'lift': lift_ab,
-                    'conviction': (1 - support_b) / (1 - confidence_ab) if confidence_ab < 1 else None,
-                    'zhangs_metric': None
-                })
-
-        if support_b > 0:
-            confidence_ba = support_ab / support_b
-            if confidence_ba >= min_confidence:
-                lift_ba = confidence_ba / support_a if support_a else confidence_ba
-                rules.append({
-                    'antecedents': [items[1]],
-                    'consequents': [items[0]],
-                    'support': support_ab,
-                    'confidence': confidence_ba,
-                    'lift': lift_ba,
-                    'conviction': (1 - support_a) / (1 - confidence_ba) if confidence_ba < 1 else None,
-                    'zhangs_metric': None
-                })
-
-    return rules
-
-
-def calculate_item_frequencies(transactions: List[List[str]]):
-    counter = Counter()
-    for transaction in transactions:
-        for item in transaction:
-            counter[item] += 1
+def calculate_item_frequencies(transactions: TransactionStore):
+    counter = Counter(transactions.item_frequencies())
 
     total_transactions = len(transactions) or 1
     return [
@@ -275,7 +124,8 @@ def home():
         "message": "Pattern Mining API",
         "status": "running",
         "endpoints": [
-            "/upload", "/mine", "/analytics", "/status", "/concept-lattice", "/test-lattice"
+            "/upload", "/mine", "/cooccurrence", "/itemsets", "/rules", "/recommend", "/score", "/analytics", "/status", "/concept-lattice",
+            "/test-lattice"
         ],
         "timestamp": now_iso()
     })
@@ -323,7 +173,11 @@ def upload_file():
             estimated_completion=None
         )
 
-        transactions, header_columns = extract_transactions(file)
+        try:
+            transactions, header_columns = extract_transactions(file)
+        except ValueError as exc:
+            update_processing_state(is_processing=False, current_step='Awaiting new upload', progress=0)
+            return jsonify({'error': str(exc)}), 400
 
         if not transactions:
             update_processing_state(is_processing=False, current_step='Awaiting new upload', progress=0)
@@ -336,8 +190,8 @@ def upload_file():
         original_data = {'header_columns': header_columns, 'sample': transactions[:5]}
         latest_results = {"itemsets": [], "rules": []}
 
-        all_items = sorted({item for transaction in transactions for item in transaction})
-        avg_items = sum(len(t) for t in transactions) / len(transactions)
+        all_items = sorted(transactions.items)
+        avg_items = transactions.length_stats()['avg_items_per_transaction']
 
         stats = {
             'total_transactions': len(transactions),
@@ -378,6 +232,8 @@ def mine_patterns():
         min_support = data.get('min_support', 0.1)
         min_confidence = data.get('min_confidence', 0.5)
         algorithm = data.get('algorithm', 'apriori')
+        max_length = data.get('max_length')
+        output = data.get('output', 'all')
 
         update_processing_state(
             is_processing=True,
@@ -387,8 +243,58 @@ def mine_patterns():
             estimated_completion=None
         )
 
+        if output != 'all' and output not in CONDENSED_OUTPUTS:
+            update_processing_state(is_processing=False, current_step='Mining failed', progress=0)
+            return jsonify({'error': f"output must be one of: all, {', '.join(CONDENSED_OUTPUTS)}"}), 400
+
         start_time = time.time()
-        frequent_itemsets = find_frequent_itemsets(processed_transactions, min_support)
+
+        # Top-k mode: one bounded run instead of guessing min_support
+        if data.get('top_k') is not None:
+            rank_by = data.get('rank_by', 'support')
+            top_k = data['top_k']
+            if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+                update_processing_state(is_processing=False, current_step='Mining failed', progress=0)
+                return jsonify({'error': 'top_k must be a positive integer'}), 400
+            if rank_by not in RANK_METRICS:
+                update_processing_state(is_processing=False, current_step='Mining failed', progress=0)
+                return jsonify({'error': f"rank_by must be one of: {', '.join(RANK_METRICS)}"}), 400
+
+            if rank_by == 'support':
+                top = top_k_itemsets(processed_transactions, top_k, max_length, min_confidence=min_confidence)
+            else:
+                top = top_k_rules(processed_transactions, top_k, rank_by, data.get('min_support'), max_length)
+
+            algorithms_performance['top_k'] = {
+                'execution_time': time.time() - start_time,
+                'top_k': top_k,
+                'rank_by': rank_by,
+                'final_threshold': top['threshold'],
+                'itemsets_found': len(top['itemsets']),
+                'timestamp': now_iso(),
+                'algorithm': 'top_k'
+            }
+            quality_metrics = build_quality_metrics(top['rules'], processed_transactions)
+            latest_results = {"itemsets": top['itemsets'], "rules": top['rules']}
+            latest_quality_metrics = quality_metrics
+
+            update_processing_state(is_processing=False, current_step='Mining complete', progress=100)
+
+            return jsonify({
+                'frequent_itemsets': top['itemsets'],
+                'association_rules': top['rules'],
+                'performance': algorithms_performance['top_k'],
+                'quality_metrics': quality_metrics
+            })
+
+        if output in CONDENSED_OUTPUTS:
+            condensed = mine_condensed(processed_transactions, min_support, output, min_confidence)
+            frequent_itemsets = condensed['itemsets']
+        elif algorithm == 'pairwise':
+            pairs = PairCooccurrence(processed_transactions)
+            frequent_itemsets = pairs.itemsets(min_support)
+        else:
+            frequent_itemsets = mine_weighted_itemsets(processed_transactions, min_support, algorithm, max_length)
         execution_time = time.time() - start_time
 
         algorithms_performance[algorithm] = {
@@ -397,7 +303,8 @@ def mine_patterns():
             'min_confidence': min_confidence,
             'itemsets_found': len(frequent_itemsets),
             'timestamp': now_iso(),
-            'algorithm': algorithm
+            'algorithm': algorithm,
+            'output': output
         }
 
         if not frequent_itemsets:
@@ -411,7 +318,12 @@ def mine_patterns():
                 'message': 'No frequent itemsets found with the given minimum support'
             })
 
-        rules = generate_association_rules(frequent_itemsets, min_confidence=min_confidence)
+        if output in CONDENSED_OUTPUTS:
+            rules = condensed['rules']
+        elif algorithm == 'pairwise':
+            rules = pairs.rules(min_support, min_confidence)
+        else:
+            rules = generate_rules(frequent_itemsets, min_confidence=min_confidence)
         quality_metrics = build_quality_metrics(rules, processed_transactions)
 
         latest_results = {"itemsets": frequent_itemsets, "rules": rules}
@@ -431,6 +343,190 @@ def mine_patterns():
         return jsonify({'error': f'Error during mining: {str(exc)}'}), 500
 
 
+@app.route('/cooccurrence', methods=['GET'])
+def cooccurrence():
+    if processed_transactions is None:
+        return jsonify({'error': 'No data uploaded. Please upload a file first.'}), 400
+
+    try:
+        min_support = float(request.args.get('min_support', 0.01))
+        max_items = request.args.get('max_items', type=int)
+        return jsonify(PairCooccurrence(processed_transactions).matrix(min_support, max_items))
+
+    except Exception as exc:
+        return jsonify({'error': f'Error computing co-occurrence: {str(exc)}'}), 500
+
+
+@app.route('/snapshot', methods=['GET'])
+def snapshot():
+    if processed_transactions is None:
+        return jsonify({'error': 'No data uploaded. Please upload a file first.'}), 400
+
+    try:
+        buffer = io.BytesIO()
+        write_parquet_snapshot(processed_transactions, buffer)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 501
+    buffer.seek(0)
+    return send_file(buffer, as_attachment=True, download_name='dataset.parquet',
+                     mimetype='application/vnd.apache.parquet')
+
+
+def get_itemset_trie() -> ItemsetTrie:
+    global latest_itemset_trie
+
+    itemsets = latest_results.get('itemsets') or []
+    if latest_itemset_trie is None or latest_itemset_trie[0] is not itemsets:
+        latest_itemset_trie = (itemsets, ItemsetTrie.from_records(itemsets))
+    return latest_itemset_trie[1]
+
+
+@app.route('/itemsets', methods=['GET'])
+def query_itemsets():
+    if not latest_results.get('itemsets'):
+        return jsonify({'error': 'No itemsets available. Please run mining first.'}), 400
+
+    def item_list(name: str) -> List[str]:
+        return [item.strip() for item in request.args.get(name, '').split(',') if item.strip()]
+
+    try:
+        trie = get_itemset_trie()
+        if 'item' in request.args:
+            itemsets = trie.top_containing(request.args['item'], request.args.get('limit', 20, type=int),
+                                           request.args.get('min_length', 1, type=int))
+        elif 'superset_of' in request.args:
+            itemsets = trie.supersets(item_list('superset_of'), proper=True)
+        elif 'subset_of' in request.args:
+            itemsets = trie.subsets(item_list('subset_of'), proper=True)
+        elif 'itemset' in request.args:
+            itemset = item_list('itemset')
+            support = trie.support(itemset)
+            itemsets = [{'itemset': itemset, 'support': support, 'length': len(itemset)}] if support is not None else []
+        elif request.args.get('closed', '').lower() == 'true':
+            itemsets = trie.closed()
+        else:
+            return jsonify({'error': 'Provide one of item, superset_of, subset_of, itemset or closed=true'}), 400
+
+        return jsonify({'itemsets': itemsets, 'count': len(itemsets)})
+
+    except Exception as exc:
+        return jsonify({'error': f'Error querying itemsets: {str(exc)}'}), 500
+
+
+def get_rule_store() -> RuleStore:
+    global latest_rule_store
+
+    rules = latest_results.get('rules') or []
+    if latest_rule_store is None or latest_rule_store[0] is not rules:
+        latest_rule_store = (rules, RuleStore(rules))
+    return latest_rule_store[1]
+
+
+@app.route('/rules', methods=['GET'])
+def query_rules():
+    if not latest_results.get('itemsets'):
+        return jsonify({'error': 'No results available. Please run mining first.'}), 400
+
+    def item_list(name: str) -> List[str]:
+        return [item.strip() for item in request.args.get(name, '').split(',') if item.strip()]
+
+    try:
+        store = get_rule_store()
+        ranges = {}
+        for name in request.args:
+            bound, _, metric = name.partition('_')
+            if bound not in ('min', 'max') or not metric:
+                continue
+            if metric not in store.metrics:
+                return jsonify({'error': f'Unknown metric filter: {name}'}), 400
+            value = float(request.args[name])
+            low, high = ranges.get(metric, (None, None))
+            ranges[metric] = (value, high) if bound == 'min' else (low, value)
+
+        order = request.args.get('order', 'desc')
+        if order not in ('asc', 'desc'):
+            return jsonify({'error': "order must be 'asc' or 'desc'"}), 400
+
+        return jsonify(store.query(
+            antecedent=item_list('antecedent'),
+            consequent=item_list('consequent'),
+            ranges=ranges,
+            sort_by=request.args.get('sort_by', 'confidence'),
+            descending=order == 'desc',
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            cursor=request.args.get('cursor')
+        ))
+
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    except Exception as exc:
+        return jsonify({'error': f'Error querying rules: {str(exc)}'}), 500
+
+
+def get_recommender() -> RuleRecommender:
+    global latest_recommender
+
+    rules = latest_results.get('rules') or []
+    if latest_recommender is None or latest_recommender[0] is not rules:
+        latest_recommender = (rules, RuleRecommender(rules))
+    return latest_recommender[1]
+
+
+@app.route('/recommend', methods=['POST'])
+def recommend():
+    if not latest_results.get('itemsets'):
+        return jsonify({'error': 'No results available. Please run mining first.'}), 400
+
+    data = request.get_json(silent=True) or {}
+    basket = data.get('basket')
+    if not isinstance(basket, list):
+        return jsonify({'error': "Expected JSON body with a 'basket' list of items"}), 400
+    top_n = data.get('top_n', 5)
+    if not isinstance(top_n, int) or top_n < 1:
+        return jsonify({'error': 'top_n must be a positive integer'}), 400
+
+    try:
+        basket = [str(item).strip() for item in basket if str(item).strip()]
+        return jsonify(get_recommender().recommend(basket, top_n, data.get('metric', 'confidence')))
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    except Exception as exc:
+        return jsonify({'error': f'Error recommending items: {str(exc)}'}), 500
+
+
+def get_rule_matrix() -> RuleMatrix:
+    global latest_rule_matrix
+
+    rules = latest_results.get('rules') or []
+    if latest_rule_matrix is None or latest_rule_matrix[0] is not rules:
+        latest_rule_matrix = (rules, RuleMatrix(rules))
+    return latest_rule_matrix[1]
+
+
+@app.route('/score', methods=['POST'])
+def score_file():
+    if not latest_results.get('itemsets'):
+        return jsonify({'error': 'No results available. Please run mining first.'}), 400
+    if 'file' not in request.files or request.files['file'].filename == '':
+        return jsonify({'error': 'No file provided'}), 400
+
+    try:
+        top_n = int(request.values.get('top_n', 5))
+        if top_n < 1:
+            return jsonify({'error': 'top_n must be a positive integer'}), 400
+        output = request.values.get('format', 'csv')
+        baskets, _ = extract_transactions(request.files['file'])
+        stream = score_baskets(get_rule_matrix(), baskets, top_n, request.values.get('metric', 'confidence'), output)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    except Exception as exc:
+        return jsonify({'error': f'Error scoring baskets: {str(exc)}'}), 500
+
+    return Response(stream_with_context(stream),
+                    mimetype='text/csv' if output == 'csv' else 'application/x-ndjson',
+                    headers={'Content-Disposition': f'attachment; filename=scores.{output}'})
+
+
 @app.route('/analytics', methods=['GET'])
 def get_analytics():
     global processed_transactions, algorithms_performance, latest_results, latest_quality_metrics
@@ -447,7 +543,7 @@ def get_analytics():
             itemsets = find_frequent_itemsets(transactions, 0.1)
 
         if not rules:
-            rules = generate_association_rules(itemsets, min_confidence=0.5)
+            rules = generate_rules(itemsets, min_confidence=0.5)
 
         support_values = [fs['support'] for fs in itemsets]
         avg_support = sum(support_values) / len(support_values) if support_values else 0
@@ -543,7 +639,10 @@ def concept_lattice():
         if not file.filename:
             return jsonify({'error': 'No file selected'}), 400
 
-        transactions, _ = extract_transactions(file)
+        try:
+            transactions, _ = extract_transactions(file)
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
 
         if not transactions:
             return jsonify({'error': 'No valid transactions found for concept lattice generation.'}), 400
@@ -1,8 +1,7 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 import pandas as pd
-from mlxtend.frequent_patterns import apriori, fpgrowth, association_rules
-from collections import Counter
+from mlxtend.frequent_patterns import apriori, fpgrowth
 try:
     # eclat may not be available in some mlxtend versions
     from mlxtend.frequent_patterns import eclat
@@ -17,21 +16,76 @@ import numpy as np
 import tempfile
 import random
 import math
+from collections import OrderedDict
 import os
 from fca import build_concept_lattice, lattice_to_json
+from closed_itemsets import CONDENSED_OUTPUTS, mine_condensed
+from pairwise import PairCooccurrence
+from itemset_mining import min_support_count
+from weighted_mining import COUNTING_ENGINES, mine_weighted_itemsets
+from planner import ALGORITHMS, dataset_stats, plan_mining
+from son import son_frequent_itemsets
+from mmap_dataset import MappedTransactions, convert_basket_file
+from stream_mining import DEFAULT_EPSILON, DEFAULT_MAX_LENGTH, LossyCounter
+from incremental import IncrementalItemsets
+from sampling import approximate_mine
+from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
+from topk import RANK_METRICS, top_k_itemsets, top_k_rules
+from rules import RuleTable
+from itemset_trie import ItemsetTrie
+from rule_store import DEFAULT_PAGE_SIZE, RuleStore
+from recommender import RuleRecommender
+from basket_scoring import RuleMatrix, score_baskets
+from ingest import MAX_INFLATED_BYTES, inflate_request_body, read_transactions, write_parquet_snapshot
+from transaction_store import TransactionStore
+from preprocessing import PreprocessConfig, parse_config, preprocess, preprocessing_summary
 
 app = Flask(__name__)
 
 # Configure CORS for production
 cors_origins = os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://localhost:3001,https://project-x-full-stack.vercel.app').split(',')
-CORS(app, origins=cors_origins, methods=['GET', 'POST', 'OPTIONS'], allow_headers=['Content-Type'])
+CORS(app, origins=cors_origins, methods=['GET', 'POST', 'OPTIONS'], allow_headers=['Content-Type', 'Content-Encoding'])
+
+@app.before_request
+def decompress_request_body():
+    """Inflate gzip/zstd request bodies before the upload form is parsed"""
+    try:
+        if inflate_request_body(request.environ):
+            # Parse the inflated body here, so an oversized one is rejected before any route reads it
+            request.get_data(parse_form_data=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 415
+    except RequestEntityTooLarge:
+        return jsonify({"error": f"Inflated request body exceeds {MAX_INFLATED_BYTES} bytes"}), 413
 
 # Global variables to store processed data
 current_data = None
 current_itemsets = None
 current_rules = None
 current_transactions = None
+current_pairs = None
+current_stats = None
+# Preprocessing pipeline chosen at upload, and the pruned stores of every config run on this dataset
+current_preprocess = PreprocessConfig()
+current_preprocessed = OrderedDict()
+PREPROCESS_CACHE_SIZE = 8
+stream_counter = None
+# Parameters and itemset counts of the last complete /mine result, kept current by /append
+current_mining_basis = None
+current_incremental = None
 processing_results = {}
+# Subset/superset index over processing_results["itemsets"], built on first query
+current_itemset_trie = None
+# Columnar, indexed copy of processing_results["rules"] for /rules, built on first query
+current_rule_store = None
+# Inverted antecedent index over processing_results["rules"] for /recommend
+current_recommender = None
+# Sparse antecedent/consequent matrices of processing_results["rules"] for bulk /score
+current_rule_matrix = None
+
+# On-disk memory-mapped datasets for logs too large to hold as resident transactions
+MAPPED_DATASET_DIR = os.environ.get('MAPPED_DATASET_DIR', os.path.join(tempfile.gettempdir(), 'mapped_datasets'))
 
 # Processing state for progress tracking
 processing_state = {
@@ -53,11 +107,19 @@ def root():
         "endpoints": {
             "health": "/health - GET - Health check",
             "upload": "/upload - POST - Upload transaction data",
+            "append": "/append - POST - Append transactions and update the last mining result",
             "mine": "/mine - POST - Mine frequent patterns",
             "analytics": "/analytics - GET - Get analytics data",
             "results": "/results - GET - Get mining results",
+            "recommend": "/recommend - POST - Top-N items to add to a basket from the latest rules",
+            "score": "/score - POST - Stream the top recommendations for every basket of an uploaded file",
+            "rules": "/rules - GET - Filter, sort and page through the latest rules",
+            "itemsets": "/itemsets - GET - Itemsets containing an item, supersets/subsets of a set, closed only",
             "generate-dataset": "/generate-dataset - POST - Generate synthetic dataset",
             "download-dataset": "/download-dataset/<filename> - GET - Download generated dataset",
+            "cooccurrence": "/cooccurrence - GET - Thresholded item co-occurrence matrix",
+            "datasets": "/datasets - GET/POST - List or store memory-mapped datasets for /mine",
+            "stream": "/stream/batch, /stream/reset - POST, /stream - GET - Streaming itemset summary",
             "status": "/status - GET - Get processing status and progress"
         },
         "frontend": "http://localhost:3000",
@@ -98,7 +160,8 @@ def get_status():
 @app.route('/upload', methods=['POST'])
 def upload_data():
     """Upload and process transaction data"""
-    global current_data, current_itemsets, current_rules, current_transactions, processing_results
+    global current_data, current_itemsets, current_rules, current_transactions, current_pairs, current_stats, processing_results
+    global current_mining_basis, current_incremental, current_preprocess, current_preprocessed
 
     try:
         # Mark processing state
@@ -114,138 +177,24 @@ def upload_data():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
 
-        # Read the uploaded file
-        print(f"Processing file: {file.filename}")
-        if file.filename and file.filename.endswith('.csv'):
-            # Read CSV content as text first
-            csv_content = file.stream.read().decode("UTF-8")
-            print(f"CSV content preview: {csv_content[:200]}...")
-
-            transactions = []
-
-            # Try to parse with pandas to detect common formats (item-per-row vs transaction-per-row)
-            try:
-                # First attempt: assume header present
-                df_csv = pd.read_csv(io.StringIO(csv_content), dtype=str, header=0)
-
-                # If dataframe looks like item-per-row (transaction_id + item columns), use grouping
-                if 'transaction_id' in df_csv.columns and len(df_csv.columns) >= 2:
-                    print("Detected CSV with 'transaction_id' column - treating as item-per-row format")
-                    transactions = process_dataframe_to_transactions(df_csv)
-                    df = pd.DataFrame({'transaction_id': range(len(transactions))})
-                elif df_csv.shape[1] == 2:
-                    # Two-column CSV without header: treat as item-per-row
-                    print("Detected 2-column CSV - treating as item-per-row format")
-                    df_noheader = pd.read_csv(io.StringIO(csv_content), dtype=str, header=None)
-                    transactions = process_dataframe_to_transactions(df_noheader)
-                    df = pd.DataFrame({'transaction_id': range(len(transactions))})
-                else:
-                    # Otherwise treat each row as a transaction (comma-separated items)
-                    print("Treating CSV as transaction-per-row (one transaction per line)")
-                    lines = csv_content.strip().split('\n')
-                    for line_num, line in enumerate(lines, 1):
-                        if line.strip():  # Skip empty lines
-                            items = [item.strip().strip('"') for item in line.split(',')]
-                            items = [item for item in items if item]
-                            if items:
-                                transactions.append(items)
-                                print(f"Line {line_num}: {items}")
-
-                    df = pd.DataFrame({'transaction_id': range(len(transactions))})
-
-                print(f"Parsed {len(transactions)} transactions from CSV (pandas-detected path)")
-
-            except Exception as e:
-                # Fallback: manual parsing line-by-line
-                print(f"CSV parsing with pandas failed ({e}), falling back to simple parsing")
-                lines = csv_content.strip().split('\n')
-                for line_num, line in enumerate(lines, 1):
-                    if line.strip():
-                        items = [item.strip().strip('"') for item in line.split(',')]
-                        items = [item for item in items if item]
-                        if items:
-                            transactions.append(items)
-                            print(f"Line {line_num}: {items}")
-
-                print(f"Parsed {len(transactions)} transactions from CSV (fallback)")
-                df = pd.DataFrame({'transaction_id': range(len(transactions))})
-
-        elif file.filename and file.filename.endswith('.json'):
-            data = json.loads(file.stream.read().decode("UTF-8"))
-            if isinstance(data, list) and len(data) > 0:
-                if isinstance(data[0], list):
-                    # Direct transaction format
-                    transactions = data
-                    df = pd.DataFrame({'transaction_id': range(len(transactions))})
-                else:
-                    # DataFrame format
-                    df = pd.DataFrame(data)
-                    transactions = []  # Initialize empty, will handle in fallback
-            else:
-                return jsonify({"error": "Invalid JSON format"}), 400
-        elif file.filename and (file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
-            # Check file size for chunking decision
-            file.seek(0, 2)  # Seek to end
-            file_size = file.tell()
-            file.seek(0)  # Reset to beginning
-
-            # If file is large (>10MB), use chunking
-            if file_size > 10 * 1024 * 1024:  # 10MB threshold
-                # Use chunking for large Excel files
-                transactions = []
-                chunk_size = 50000
-
-                # Read Excel file in chunks
-                xl = pd.ExcelFile(file)
-                sheet_name = xl.sheet_names[0]
-
-                # Read header first
-                df_header = pd.read_excel(file, sheet_name=sheet_name, nrows=1)
-                skiprows = 1
-                chunk_num = 0
-
-                while True:
-                    try:
-                        df_chunk = pd.read_excel(
-                            file,
-                            sheet_name=sheet_name,
-                            nrows=chunk_size,
-                            skiprows=skiprows,
-                            header=None
-                        )
-
-                        if df_chunk.empty:
-                            break
-
-                        # Rename columns to match header
-                        columns = {i: col for i, col in enumerate(df_header.columns.tolist())}
-                        df_chunk.rename(columns=columns, inplace=True)
-
-                        # Process chunk into transactions
-                        chunk_transactions = process_dataframe_to_transactions(df_chunk)
-                        transactions.extend(chunk_transactions)
-
-                        skiprows += chunk_size
-                        chunk_num += 1
-
-                        print(f"Processed Excel chunk {chunk_num} with {len(chunk_transactions)} transactions")
-
-                    except Exception as e:
-                        print(f"Error processing Excel chunk: {e}")
-                        break
-            else:
-                # Small Excel file - read all at once
-                df = pd.read_excel(file)
-                transactions = process_dataframe_to_transactions(df)
-
-            # Create compatibility DataFrame
-            df = pd.DataFrame({'transaction_id': range(len(transactions))})
-        else:
-            return jsonify({"error": "Unsupported file format. Please upload CSV, JSON, or Excel (.xlsx/.xls) files"}), 400
+        try:
+            # Optional preprocessing pipeline for this dataset, as a JSON form field
+            preprocess_config = parse_config(json.loads(request.form['preprocess'])
+                                             if request.form.get('preprocess') else None)
+            transactions, df = read_uploaded_transactions(file)
+        except ValueError as e:
+            processing_state["is_processing"] = False
+            return jsonify({"error": str(e)}), 400
 
         # Store the data
         current_data = df
         current_transactions = transactions  # Store transactions globally
+        current_pairs = None
+        current_stats = None
+        current_mining_basis = None
+        current_incremental = None
+        current_preprocess = preprocess_config
+        current_preprocessed = OrderedDict()
 
         print(f"Processed {len(transactions)} transactions")
         print(f"Sample transactions: {transactions[:3] if transactions else 'None'}")
@@ -255,101 +204,397 @@ def upload_data():
             processing_state["progress"] = 100
             return jsonify({"error": "No valid transactions found in the data"}), 400
 
-        # Encode transactions
-        te = TransactionEncoder()
-        te_ary = te.fit(transactions).transform(transactions)
-        # Convert to numpy array
-        te_array = np.array(te_ary)
-        df_encoded = pd.DataFrame(te_array, columns=te.columns_)
+        # Basic statistics straight from the store's arrays
+        length_stats = transactions.length_stats()
+        stats = {key: length_stats[key] for key in
+                 ("total_transactions", "unique_items", "avg_items_per_transaction", "min_items", "max_items")}
+        stats["distinct_baskets"] = len(transactions.distinct()[0])
 
-        # Basic statistics
-        stats = {
-            "total_transactions": len(transactions),
-            "unique_items": len(te.columns_),
-            "avg_items_per_transaction": np.mean([len(t) for t in transactions]),
-            "min_items": min(len(t) for t in transactions),
-            "max_items": max(len(t) for t in transactions)
-        }
+        item_frequencies = store_item_frequencies(transactions)
 
-        # Item frequencies
-        item_frequencies = []
-        for item in te.columns_:
-            support = df_encoded[item].mean()
-            item_frequencies.append({
-                "item": item,
-                "frequency": int(df_encoded[item].sum()),
-                "support": float(support)
-            })
-
-        # Sort by support
-        item_frequencies.sort(key=lambda x: x['support'], reverse=True)
+        response = {
+            "message": "Data uploaded and processed successfully",
+            "stats": stats,
+            "item_frequencies": item_frequencies,
+            "sample_transactions": transactions[:5]  # First 5 transactions as sample
+        }
+        if preprocess_config != PreprocessConfig():
+            # Run the dataset's pipeline once at ingest so every /mine starts from its result
+            response["preprocessing"] = preprocessing_summary(preprocess_config, get_preprocessed(preprocess_config))
 
         # Upload processing finished
         processing_state["current_step"] = "upload_complete"
         processing_state["progress"] = 30
         processing_state["is_processing"] = False
 
-        return jsonify({
-            "message": "Data uploaded and processed successfully",
-            "stats": stats,
-            "item_frequencies": item_frequencies,
-            "sample_transactions": transactions[:5]  # First 5 transactions as sample
-        })
+        return jsonify(response)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-def process_dataframe_to_transactions(df):
-    """Convert DataFrame to list of transactions"""
-    transactions = []
+def read_uploaded_transactions(file):
+    """Parse an uploaded file into (resident transaction store, compatibility DataFrame)
+
+    Raises ValueError for unsupported or malformed files.
+    """
+    print(f"Processing file: {file.filename}")
+    store = TransactionStore.from_encoded(read_transactions(file))
+    print(f"Parsed {len(store)} transactions ({len(store.items)} distinct items, {store.nbytes} bytes encoded)")
+    df = pd.DataFrame({'transaction_id': range(len(store))})
+    return store, df
+
+def store_item_frequencies(store):
+    """Frequency and support of every item, by descending support (ties by item name)"""
+    counts = store.item_counts()
+    n = max(len(store), 1)
+    item_frequencies = [
+        {
+            "item": item,
+            "frequency": int(counts[idx]),
+            "support": float(counts[idx] / n)
+        }
+        for idx, item in sorted(enumerate(store.items), key=lambda entry: entry[1])
+    ]
+    item_frequencies.sort(key=lambda x: x['support'], reverse=True)
+    return item_frequencies
+
+def get_pair_cooccurrence():
+    """Return the pair co-occurrence counts of the current dataset, computing them once per upload"""
+    global current_pairs
+
+    if current_pairs is None:
+        current_pairs = PairCooccurrence(current_transactions)
+    return current_pairs
+
+def get_preprocessed(config):
+    """Return the current dataset run through a preprocessing config, computing it once per (upload, config)"""
+    if config in current_preprocessed:
+        current_preprocessed.move_to_end(config)
+    else:
+        if len(current_preprocessed) >= PREPROCESS_CACHE_SIZE:
+            # Evict the least recently used config
+            current_preprocessed.popitem(last=False)
+        current_preprocessed[config] = preprocess(current_transactions, config)
+    return current_preprocessed[config]
+
+def get_itemset_trie():
+    """Return the itemset trie of the latest mining results, building it once per result"""
+    global current_itemset_trie
+
+    if current_itemset_trie is None:
+        current_itemset_trie = ItemsetTrie.from_records(processing_results.get("itemsets", []))
+    return current_itemset_trie
+
+def get_rule_store():
+    """Return the rule store of the latest mining results, building it once per result"""
+    global current_rule_store
+
+    if current_rule_store is None:
+        current_rule_store = RuleStore(processing_results.get("rules", []))
+    return current_rule_store
+
+def get_recommender():
+    """Return the rule recommender of the latest mining results, building it once per result"""
+    global current_recommender
+
+    if current_recommender is None:
+        current_recommender = RuleRecommender(processing_results.get("rules", []))
+    return current_recommender
+
+def get_rule_matrix():
+    """Return the rule matrices of the latest mining results, building them once per result"""
+    global current_rule_matrix
+
+    if current_rule_matrix is None:
+        current_rule_matrix = RuleMatrix(processing_results.get("rules", []))
+    return current_rule_matrix
+
+def mapped_dataset_path(name):
+    """Directory of a named memory-mapped dataset, or None for unsafe names"""
+    safe_name = secure_filename(name or '')
+    if not safe_name or safe_name != name:
+        return None
+    return os.path.join(MAPPED_DATASET_DIR, safe_name)
+
+def get_dataset_stats():
+    """Return the planner's statistics of the current dataset, computing them once per upload"""
+    global current_stats
+
+    if current_stats is None:
+        current_stats = dataset_stats(current_transactions)
+    return current_stats
+
+def finalize_mining(frequent_itemsets, rules, performance, itemset_details=None, rule_details=None):
+    """Convert mined itemsets and rules to JSON, store them as the current results and respond
+
+    itemset_details/rule_details optionally hold one dict of extra fields per row (e.g. confidence intervals).
+    """
+    global current_itemsets, current_rules, processing_results, current_itemset_trie, current_rule_store, current_recommender
+    global current_rule_matrix
+
+    itemsets_json = []
+    for _, itemset in frequent_itemsets.iterrows():
+        itemsets_json.append({
+            "itemset": list(itemset['itemsets']),
+            "support": float(itemset['support']),
+            "length": len(itemset['itemsets'])
+        })
+    if itemset_details:
+        for entry, details in zip(itemsets_json, itemset_details):
+            entry.update(details)
+
+    # Convert rules to JSON-serializable format
+    rules_json = []
+    if not rules.empty:
+        for _, rule in rules.iterrows():
+            rules_json.append({
+                "antecedents": list(rule['antecedents']),
+                "consequents": list(rule['consequents']),
+                "support": float(rule['support']),
+                "confidence": float(rule['confidence']),
+                "lift": float(rule['lift']),
+                "conviction": float(rule['conviction']) if not np.isinf(rule['conviction']) else None,
+                "leverage": float(rule['leverage']),
+                "zhang_metric": float(rule['zhangs_metric'])
+            })
+    if rule_details:
+        for entry, details in zip(rules_json, rule_details):
+            entry.update(details)
+
+    print(f"Converted {len(rules_json)} rules to JSON format")
+
+    # Store results
+    current_itemsets = frequent_itemsets
+    current_rules = rules
+    current_itemset_trie = None
+    current_rule_store = None
+    current_recommender = None
+    current_rule_matrix = None
+
+    # Calculate quality metrics
+    if not rules.empty:
+        quality_metrics = {
+            "avg_confidence": float(rules['confidence'].mean()),
+            "avg_lift": float(rules['lift'].mean()),
+            "avg_leverage": float(rules['leverage'].mean()),
+            "max_confidence": float(rules['confidence'].max()),
+            "max_lift": float(rules['lift'].max()),
+            "rule_diversity": float(len(set([tuple(r) for r in rules['antecedents']])) / len(rules))
+        }
+    else:
+        quality_metrics = {}
 
-    # Handle different DataFrame formats
-    if 'transaction_id' in df.columns:
-        # Transaction format: one row per transaction
-        item_columns = [col for col in df.columns if col != 'transaction_id']
-
-        # If the DataFrame is an item-per-row (transaction_id, item) format where multiple
-        # rows share the same transaction_id, group items by transaction_id into transactions.
-        if len(item_columns) == 1 and df.shape[0] > df['transaction_id'].nunique():
-            transaction_col = 'transaction_id'
-            item_col = item_columns[0]
-            grouped = df.groupby(transaction_col)[item_col].apply(list)
-            for transaction in grouped:
-                clean_transaction = [str(item).strip() for item in transaction if pd.notna(item) and str(item).strip()]
-                if clean_transaction:
-                    transactions.append(clean_transaction)
-        else:
-            # Otherwise assume one row per transaction with multiple item columns
-            for _, row in df.iterrows():
-                transaction = [str(row[col]) for col in item_columns if pd.notna(row[col]) and str(row[col]).strip()]
-                if transaction:  # Only add non-empty transactions
-                    transactions.append(transaction)
+    processing_results = {
+        "itemsets": itemsets_json,
+        "rules": rules_json,
+        "performance": performance,
+        "quality_metrics": quality_metrics,
+        "timestamp": datetime.now().isoformat()
+    }
+
+    # Mark processing finished
+    processing_state["is_processing"] = False
+    processing_state["current_step"] = "complete"
+    processing_state["progress"] = 100
+
+    return jsonify({
+        "message": "Pattern mining completed successfully",
+        "itemsets": itemsets_json,
+        "rules": rules_json,
+        "performance": performance,
+        "quality_metrics": quality_metrics
+    })
+
+def records_to_frames(itemset_records, rule_records):
+    """Build mlxtend-shaped itemset and rule DataFrames from JSON-ready engine records"""
+    frequent_itemsets = pd.DataFrame({
+        'support': [record['support'] for record in itemset_records],
+        'itemsets': [frozenset(record['itemset']) for record in itemset_records]
+    })
+
+    rules = pd.DataFrame([
+        {
+            'antecedents': frozenset(record['antecedents']),
+            'consequents': frozenset(record['consequents']),
+            'support': record['support'],
+            'confidence': record['confidence'],
+            'lift': record['lift'],
+            'leverage': record['leverage'],
+            'conviction': record['conviction'] if record['conviction'] is not None else np.inf,
+            'zhangs_metric': record['zhangs_metric']
+        }
+        for record in rule_records
+    ])
+
+    return frequent_itemsets, rules
+
+def rules_frame(rule_table, min_confidence):
+    """mlxtend-shaped rules DataFrame of the RuleTable rows that reach min_confidence"""
+    positions = rule_table.select(min_confidence)
+    antecedents, consequents = rule_table.sides(positions)
+    columns = {name: values[positions] for name, values in rule_table.columns.items()}
+    return pd.DataFrame({
+        'antecedents': [frozenset(side) for side in antecedents],
+        'consequents': [frozenset(side) for side in consequents],
+        'antecedent support': columns['antecedent_support'],
+        'consequent support': columns['consequent_support'],
+        'support': columns['support'],
+        'confidence': columns['confidence'],
+        'lift': columns['lift'],
+        'leverage': columns['leverage'],
+        'conviction': columns['conviction'],
+        'zhangs_metric': columns['zhangs_metric']
+    }) if len(positions) else pd.DataFrame()
+
+def generate_rules_frame(frequent_itemsets, min_confidence):
+    """Association rules of an mlxtend itemset DataFrame, generated with the vectorized RuleTable"""
+    if frequent_itemsets.empty:
+        return pd.DataFrame()
+    return rules_frame(RuleTable(frequent_itemsets['itemsets'], frequent_itemsets['support']), min_confidence)
+
+def mine_top_k(transactions, top_k, rank_by, min_confidence, support_floor=None):
+    """Mine exactly the top_k itemsets (rank_by support) or rules (confidence/lift) in one bounded run"""
+    start_time = time.time()
+    if rank_by == 'support':
+        result = top_k_itemsets(transactions, top_k, min_confidence=min_confidence)
     else:
-        # Item format: one row per item
-        if len(df.columns) >= 2:
-            transaction_col = df.columns[0]
-            item_col = df.columns[1]
-
-            # Group by transaction
-            grouped = df.groupby(transaction_col)[item_col].apply(list)
-            for transaction in grouped:
-                clean_transaction = [str(item).strip() for item in transaction if pd.notna(item) and str(item).strip()]
-                if clean_transaction:
-                    transactions.append(clean_transaction)
-        else:
-            # Single column format - each row is a transaction
-            for _, row in df.iterrows():
-                items = str(row.iloc[0]).split(',') if ',' in str(row.iloc[0]) else [str(row.iloc[0])]
-                clean_items = [item.strip().strip('"\'') for item in items if item.strip()]
-                if clean_items:
-                    transactions.append(clean_items)
+        # An explicit min_support only acts as a floor for the rule search
+        result = top_k_rules(transactions, top_k, rank_by, support_floor)
+    mining_time = time.time() - start_time
+
+    frequent_itemsets, rules = records_to_frames(result['itemsets'], result['rules'])
+    print(f"Top-{top_k} by {rank_by}: {len(frequent_itemsets)} itemsets, {len(rules)} rules in {mining_time:.2f}s")
+
+    performance = {
+        "mining_time": mining_time,
+        "algorithm": "top_k",
+        "top_k": top_k,
+        "rank_by": rank_by,
+        "final_threshold": result['threshold'],
+        "min_confidence": min_confidence if rank_by == 'support' else None,
+        "itemsets_found": len(frequent_itemsets),
+        "rules_found": len(rules)
+    }
 
-    return transactions
+    return finalize_mining(frequent_itemsets, rules, performance)
+
+def invalid_optional_count(data, *names):
+    """First of the named request parameters that is set but not a non-negative integer, if any"""
+    for name in names:
+        value = data.get(name)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+            return name
+    return None
+
+def mine_mapped_dataset(data):
+    """Mine a memory-mapped dataset by streaming it in chunks (SON across processes when workers > 1)"""
+    path = mapped_dataset_path(data.get('dataset'))
+    if path is None or not os.path.isdir(path):
+        processing_state["is_processing"] = False
+        return jsonify({"error": f"Unknown dataset: {data.get('dataset')}"}), 404
+
+    min_support = float(data.get('min_support', 0.01))
+    min_confidence = float(data.get('min_confidence', 0.3))
+    workers = data.get('workers', 1)
+    if not isinstance(workers, int) or workers < 1:
+        processing_state["is_processing"] = False
+        return jsonify({"error": "workers must be a positive integer"}), 400
+    invalid = invalid_optional_count(data, 'max_length')
+    if invalid:
+        processing_state["is_processing"] = False
+        return jsonify({"error": f"{invalid} must be a non-negative integer"}), 400
+
+    start_time = time.time()
+    dataset = MappedTransactions(path)
+    result = son_frequent_itemsets(dataset, min_support, workers, data.get('max_length'))
+    frequent_itemsets, _ = records_to_frames(result['itemsets'], [])
+
+    rules = generate_rules_frame(frequent_itemsets, min_confidence)
+
+    performance = {
+        "mining_time": time.time() - start_time,
+        "algorithm": "son" if result['partitions'] > 1 else "apriori",
+        "dataset": data.get('dataset'),
+        "total_transactions": dataset.n_transactions,
+        "workers": workers,
+        "partitions": result['partitions'],
+        "min_support": min_support,
+        "min_confidence": min_confidence,
+        "itemsets_found": len(frequent_itemsets),
+        "rules_found": len(rules)
+    }
+    return finalize_mining(frequent_itemsets, rules, performance)
+
+def mine_stream(data):
+    """Report the itemsets and rules of the streaming summary (cost independent of stream length)"""
+    if stream_counter is None or not stream_counter.n_transactions:
+        processing_state["is_processing"] = False
+        return jsonify({"error": "No stream data. POST batches to /stream/batch first."}), 400
+
+    min_support = float(data.get('min_support', 0.01))
+    min_confidence = float(data.get('min_confidence', 0.3))
+    start_time = time.time()
+    try:
+        summary = stream_counter.frequent(min_support, min_confidence)
+    except ValueError as e:
+        processing_state["is_processing"] = False
+        return jsonify({"error": str(e)}), 400
+
+    frequent_itemsets, rules = records_to_frames(summary['itemsets'], summary['rules'])
+    performance = {
+        "mining_time": time.time() - start_time,
+        "algorithm": "lossy_counting",
+        "min_support": min_support,
+        "min_confidence": min_confidence,
+        "itemsets_found": len(frequent_itemsets),
+        "rules_found": len(rules),
+        "stream": stream_counter.stats(),
+        # Reported supports undercount true supports by at most this much
+        "max_support_error": summary['max_support_error']
+    }
+    return finalize_mining(frequent_itemsets, rules, performance)
+
+def mine_approximate(transactions, data):
+    """Mine a random sample sized for the requested epsilon/delta, reporting confidence intervals"""
+    min_support = float(data.get('min_support', 0.01))
+    min_confidence = float(data.get('min_confidence', 0.3))
+    invalid = invalid_optional_count(data, 'max_length', 'seed')
+    if invalid:
+        processing_state["is_processing"] = False
+        return jsonify({"error": f"{invalid} must be a non-negative integer"}), 400
+    start_time = time.time()
+    try:
+        result = approximate_mine(transactions, min_support, min_confidence,
+                                  epsilon=float(data.get('epsilon', 0.01)),
+                                  delta=float(data.get('delta', 0.05)),
+                                  verify=bool(data.get('verify', False)),
+                                  seed=data.get('seed'),
+                                  max_length=data.get('max_length'))
+    except ValueError as e:
+        processing_state["is_processing"] = False
+        return jsonify({"error": str(e)}), 400
+
+    frequent_itemsets, rules = records_to_frames(result['itemsets'], result['rules'])
+    performance = {
+        "mining_time": time.time() - start_time,
+        "algorithm": "sampling",
+        "mode": "approximate",
+        "min_support": min_support,
+        "min_confidence": min_confidence,
+        "itemsets_found": len(frequent_itemsets),
+        "rules_found": len(rules),
+        **{key: result[key] for key in ('sample_size', 'total_transactions', 'epsilon', 'delta',
+                                        'lowered_support', 'exact', 'verified', 'border_misses')}
+    }
+    return finalize_mining(frequent_itemsets, rules, performance,
+                           itemset_details=[{"support_ci": entry['support_ci']} for entry in result['itemsets']],
+                           rule_details=[{"confidence_ci": entry['confidence_ci']} for entry in result['rules']])
 
 @app.route('/mine', methods=['POST'])
 def mine_patterns():
     """Mine frequent patterns and association rules"""
     global current_data, current_itemsets, current_rules, current_transactions, processing_results
+    global current_mining_basis, current_incremental
 
     try:
         # Mark processing state
@@ -358,67 +603,80 @@ def mine_patterns():
         processing_state["progress"] = 50
         processing_state["started_at"] = datetime.now()
 
+        # Get parameters
+        data = request.get_json()
+
+        # Only a complete result mined below can be maintained incrementally by /append
+        current_mining_basis = None
+        current_incremental = None
+
+        # Memory-mapped datasets are mined in place and never become the resident upload
+        if data.get('dataset'):
+            return mine_mapped_dataset(data)
+
+        # Streaming mode reads the Lossy Counting summary instead of any uploaded data
+        if data.get('stream'):
+            return mine_stream(data)
+
+        mode = data.get('mode', 'exact')
+        if mode not in ('exact', 'approximate'):
+            processing_state["is_processing"] = False
+            return jsonify({"error": "mode must be one of: exact, approximate"}), 400
+
         if current_data is None or current_transactions is None:
             processing_state["is_processing"] = False
             processing_state["progress"] = 100
             return jsonify({"error": "No data uploaded. Please upload data first."}), 400
 
-        # Get parameters
-        data = request.get_json()
         min_support = data.get('min_support', 0.01)  # Lower default threshold
         min_confidence = data.get('min_confidence', 0.3)  # Lower default threshold
-        algorithm = data.get('algorithm', 'apriori')
+        algorithm = data.get('algorithm', 'auto')
+        top_k = data.get('top_k')
+        rank_by = data.get('rank_by', 'support')
+        output = data.get('output', 'all')
+        workers = data.get('workers', 1)
 
-        # Use the global transactions
-        transactions = current_transactions
+        if top_k is not None and (not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1):
+            processing_state["is_processing"] = False
+            return jsonify({"error": "top_k must be a positive integer"}), 400
 
-        print(f"Processing {len(transactions)} transactions")
-        print("Sample transactions:", transactions[:5])
-        print("Transaction lengths:", [len(t) for t in transactions[:10]])
+        if top_k is not None and rank_by not in RANK_METRICS:
+            processing_state["is_processing"] = False
+            return jsonify({"error": f"rank_by must be one of: {', '.join(RANK_METRICS)}"}), 400
 
-        # Prefilter items by frequency to avoid creating extremely large one-hot matrices
-        num_transactions = len(transactions)
-        item_counts = Counter()
-        for t in transactions:
-            for it in t:
-                item_counts[it] += 1
+        if output != 'all' and output not in CONDENSED_OUTPUTS:
+            processing_state["is_processing"] = False
+            return jsonify({"error": f"output must be one of: all, {', '.join(CONDENSED_OUTPUTS)}"}), 400
 
-        unique_items = len(item_counts)
-        print(f"Unique items in transactions: {unique_items}")
+        if algorithm != 'auto' and algorithm not in ALGORITHMS:
+            processing_state["is_processing"] = False
+            return jsonify({"error": f"algorithm must be one of: auto, {', '.join(ALGORITHMS)}"}), 400
 
-        # Determine a safe cap for unique items to encode
-        MAX_UNIQUE_ITEMS_ENCODE = 15000
+        if not isinstance(workers, int) or workers < 1:
+            processing_state["is_processing"] = False
+            return jsonify({"error": "workers must be a positive integer"}), 400
 
-        # If too many unique items, keep only the top-K most frequent items
-        if unique_items > MAX_UNIQUE_ITEMS_ENCODE:
-            most_common = [it for it, _ in item_counts.most_common(MAX_UNIQUE_ITEMS_ENCODE)]
-            items_to_keep = set(most_common)
-            print(f"Capping unique items to top {MAX_UNIQUE_ITEMS_ENCODE} by frequency to reduce memory usage")
-        else:
-            items_to_keep = set(item_counts.keys())
+        try:
+            preprocess_config = parse_config(data['preprocess']) if 'preprocess' in data else current_preprocess
+        except ValueError as e:
+            processing_state["is_processing"] = False
+            return jsonify({"error": str(e)}), 400
 
-        # Filter transactions to keep only items in items_to_keep
-        filtered_transactions = [[it for it in t if it in items_to_keep] for t in transactions]
+        # The global transactions, through the cached result of the preprocessing pipeline
+        transactions = get_preprocessed(preprocess_config)
+        preprocessed = transactions is not current_transactions
 
-        # If after filtering there are no items, fall back to original transactions (will be handled by adaptive loop)
-        if all(len(t) == 0 for t in filtered_transactions):
-            df_encoded = pd.DataFrame()
-            te = None
-            te_columns = []
-            print("No items remain after pre-filtering; will rely on adaptive mining to relax thresholds")
-        else:
-            te = TransactionEncoder()
-            te_ary = te.fit(filtered_transactions).transform(filtered_transactions)
-            te_array = np.array(te_ary)
-            df_encoded = pd.DataFrame(te_array, columns=te.columns_)
-            te_columns = list(te.columns_)
-
-            print(f"Encoded DataFrame shape: {df_encoded.shape}")
-            print("Items found:", te_columns)
-            print("Support for each item (sample):")
-            for col in te_columns[:20]:
-                support = df_encoded[col].mean()
-                print(f"  {col}: {support:.3f}")
+        print(f"Processing {len(transactions)} transactions")
+        print("Sample transactions:", transactions[:5])
+        print("Transaction lengths:", [len(t) for t in transactions[:10]])
+
+        # Approximate mode mines a Hoeffding-sized sample instead of the full data
+        if mode == 'approximate':
+            return mine_approximate(transactions, data)
+
+        # Top-k mode replaces the support relaxation loop with a single bounded run
+        if top_k is not None:
+            return mine_top_k(transactions, top_k, rank_by, float(min_confidence), data.get('min_support'))
 
         # Mine frequent itemsets with adaptive relaxation if needed
         # Safety floors and parameters
@@ -428,28 +686,127 @@ def mine_patterns():
         CONFIDENCE_RELAX_STEP = 0.05  # subtract this from confidence when relaxing
         MAX_ATTEMPTS = 6
 
+        support_floor = MIN_SUPPORT_FLOOR
+        plan = None
+        if output not in CONDENSED_OUTPUTS:
+            # Let the cost model pick (or vet) the engine and encoding before anything is allocated
+            available = [name for name in ALGORITHMS if name != 'eclat' or eclat is not None]
+            schedule = [max(MIN_SUPPORT_FLOOR, float(min_support) * SUPPORT_RELAX_FACTOR ** step)
+                        for step in range(1, MAX_ATTEMPTS)]
+            stats = dataset_stats(transactions) if preprocessed else get_dataset_stats()
+            plan = plan_mining(stats, float(min_support), algorithm, schedule, available)
+            print(f"Mining plan: {plan['algorithm']} ({plan['encoding']}), predicted peak {plan['predicted_peak_mb']} MB")
+            if plan['refused']:
+                processing_state["is_processing"] = False
+                processing_state["progress"] = 100
+                return jsonify({"error": plan['reason'], "plan": plan}), 413
+            algorithm = plan['algorithm']
+            # Relaxation never goes below the support at which the plan stops fitting the budget
+            support_floor = max(MIN_SUPPORT_FLOOR, plan['support_floor'])
+
+        # SON partitions the sparse transactions across processes in place of the single-core engines
+        parallel = workers > 1 and output not in CONDENSED_OUTPUTS and algorithm != 'pairwise'
+        partitions = None
+        # Repeated baskets are mined once each, weighted by their count (mlxtend takes no sample weights)
+        distinct_baskets = len(transactions.distinct()[0])
+        weighted = (output not in CONDENSED_OUTPUTS and not parallel and algorithm in COUNTING_ENGINES
+                    and distinct_baskets < len(transactions))
+
+        if output in CONDENSED_OUTPUTS:
+            # Closed/maximal miners work on tidsets directly, so no dense encoding
+            df_encoded = pd.DataFrame()
+            print(f"Mining {output} itemsets directly from transactions")
+        elif algorithm == 'pairwise':
+            # Pair mining works on the sparse matrix directly, so no dense encoding
+            pair_cooccurrence = PairCooccurrence(transactions) if preprocessed else get_pair_cooccurrence()
+            df_encoded = pd.DataFrame()
+            print(f"Pairwise co-occurrence ready for {len(pair_cooccurrence.items)} items")
+        elif parallel:
+            df_encoded = pd.DataFrame()
+            print(f"Mining with SON across up to {workers} worker processes")
+        elif weighted:
+            df_encoded = pd.DataFrame()
+            print(f"Mining {distinct_baskets} distinct baskets weighted by their counts ({algorithm})")
+        else:
+            # Items below the lowest support relaxation can reach never appear in any itemset,
+            # so dropping them before encoding is lossless; the pruned store is cached per config
+            min_count = min_support_count(min(support_floor, float(min_support)), len(transactions))
+            pruned = get_preprocessed(preprocess_config._replace(
+                min_item_count=max(preprocess_config.min_item_count, min_count)))
+            print(f"Encoding {len(pruned.items)} of {len(transactions.items)} items ({plan['encoding']})")
+            filtered_transactions = pruned.transactions()
+
+            # If after filtering there are no items, fall back to original transactions (will be handled by adaptive loop)
+            if not len(pruned.item_ids):
+                df_encoded = pd.DataFrame()
+                te = None
+                te_columns = []
+                print("No items remain after pre-filtering; will rely on adaptive mining to relax thresholds")
+            else:
+                te = TransactionEncoder()
+                te.fit(filtered_transactions)
+                if plan['encoding'] == 'sparse':
+                    te_ary = te.transform(filtered_transactions, sparse=True)
+                    df_encoded = pd.DataFrame.sparse.from_spmatrix(te_ary, columns=te.columns_)
+                else:
+                    te_ary = te.transform(filtered_transactions)
+                    df_encoded = pd.DataFrame(te_ary, columns=te.columns_)
+                te_columns = list(te.columns_)
+
+                print(f"Encoded DataFrame shape: {df_encoded.shape}")
+                print("Items found:", te_columns[:50])
+
         attempts = []
         current_support = float(min_support)
         current_confidence = float(min_confidence)
         frequent_itemsets = pd.DataFrame()
         rules = pd.DataFrame()
         total_mining_time = 0.0
+        # Itemsets and candidate rules of the last support level; relaxing only confidence reuses them
+        mined_support = None
+        rule_table = None
+        condensed_rules = pd.DataFrame()
 
         for attempt in range(1, MAX_ATTEMPTS + 1):
             attempt_info = {"attempt": attempt, "support": current_support, "confidence": current_confidence}
             start_time = time.time()
 
             try:
-                if algorithm == 'apriori':
+                if current_support == mined_support:
+                    attempt_info['reused_itemsets'] = True
+                elif output in CONDENSED_OUTPUTS:
+                    # Rules come with the condensed itemsets (not every subset's support is known), mined
+                    # down to the confidence floor so later attempts only filter them
+                    condensed = mine_condensed(transactions, current_support, output,
+                                               min(MIN_CONFIDENCE_FLOOR, float(min_confidence)))
+                    frequent_itemsets, condensed_rules = records_to_frames(condensed['itemsets'], condensed['rules'])
+                elif parallel:
+                    son_result = son_frequent_itemsets(transactions, current_support, workers)
+                    frequent_itemsets, _ = records_to_frames(son_result['itemsets'], [])
+                    partitions = son_result['partitions']
+                elif algorithm == 'pairwise':
+                    pair_itemsets, pair_supports = pair_cooccurrence.support_table(current_support)
+                    frequent_itemsets = pd.DataFrame({
+                        'support': pair_supports,
+                        'itemsets': [frozenset(itemset) for itemset in pair_itemsets]
+                    })
+                elif weighted:
+                    frequent_itemsets, _ = records_to_frames(
+                        mine_weighted_itemsets(transactions, current_support, algorithm), [])
+                elif algorithm == 'apriori':
                     frequent_itemsets = apriori(df_encoded, min_support=current_support, use_colnames=True)
                 elif algorithm == 'eclat' and eclat is not None:
                     frequent_itemsets = eclat(df_encoded, min_support=current_support, use_colnames=True)
                 else:
                     # default to fpgrowth when eclat not available or algorithm unspecified
                     frequent_itemsets = fpgrowth(df_encoded, min_support=current_support, use_colnames=True)
+                if current_support != mined_support:
+                    mined_support = current_support
+                    rule_table = None
             except Exception as e:
                 attempt_info['error'] = str(e)
                 frequent_itemsets = pd.DataFrame()
+                mined_support = None
 
             mining_time = time.time() - start_time
             total_mining_time += mining_time
@@ -474,21 +831,24 @@ def mine_patterns():
                 rules = pd.DataFrame()  # Empty rules dataframe
                 attempts.append(attempt_info)
                 # Relax support
-                if current_support <= MIN_SUPPORT_FLOOR:
+                if current_support <= support_floor:
                     break
-                current_support = max(MIN_SUPPORT_FLOOR, current_support * SUPPORT_RELAX_FACTOR)
+                current_support = max(support_floor, current_support * SUPPORT_RELAX_FACTOR)
                 continue
 
-            # Try to generate rules
+            # Try to generate rules: every candidate rule is computed once per support level and
+            # each attempt only applies its confidence threshold
             try:
-                rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=current_confidence)
+                if output in CONDENSED_OUTPUTS:
+                    rules = (condensed_rules[condensed_rules['confidence'] >= current_confidence]
+                             if not condensed_rules.empty else pd.DataFrame())
+                else:
+                    if rule_table is None:
+                        rule_table = RuleTable(frequent_itemsets['itemsets'], frequent_itemsets['support'])
+                    rules = rules_frame(rule_table, current_confidence)
             except Exception as e:
-                # fallback: try support_only variant
-                try:
-                    rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=current_confidence, support_only=True)
-                except Exception as e2:
-                    rules = pd.DataFrame()
-                    attempt_info['rule_error'] = str(e2)
+                rules = pd.DataFrame()
+                attempt_info['rule_error'] = str(e)
 
             attempt_info['itemsets_found'] = len(frequent_itemsets)
             attempt_info['rules_found'] = len(rules)
@@ -507,84 +867,43 @@ def mine_patterns():
             if current_confidence > MIN_CONFIDENCE_FLOOR:
                 current_confidence = max(MIN_CONFIDENCE_FLOOR, current_confidence - CONFIDENCE_RELAX_STEP)
             else:
-                if current_support <= MIN_SUPPORT_FLOOR:
+                if current_support <= support_floor:
                     break
-                current_support = max(MIN_SUPPORT_FLOOR, current_support * SUPPORT_RELAX_FACTOR)
+                current_support = max(support_floor, current_support * SUPPORT_RELAX_FACTOR)
 
         # Record total mining time
         mining_time = total_mining_time
-        itemsets_json = []
-        for _, itemset in frequent_itemsets.iterrows():
-            itemsets_json.append({
-                "itemset": list(itemset['itemsets']),
-                "support": float(itemset['support']),
-                "length": len(itemset['itemsets'])
-            })
-
-        # Convert rules to JSON-serializable format
-        rules_json = []
-        if not rules.empty:
-            for _, rule in rules.iterrows():
-                rules_json.append({
-                    "antecedents": list(rule['antecedents']),
-                    "consequents": list(rule['consequents']),
-                    "support": float(rule['support']),
-                    "confidence": float(rule['confidence']),
-                    "lift": float(rule['lift']),
-                    "conviction": float(rule['conviction']) if not np.isinf(rule['conviction']) else None,
-                    "leverage": float(rule['leverage']),
-                    "zhang_metric": float(rule['zhangs_metric'])
-                })
-
-        print(f"Converted {len(rules_json)} rules to JSON format")
-
-        # Store results
-        current_itemsets = frequent_itemsets
-        current_rules = rules
 
         # Calculate performance metrics
         performance = {
             "mining_time": mining_time,
             "algorithm": algorithm,
+            "output": output,
+            "plan": plan,
+            "workers": workers,
+            "partitions": partitions,
+            "preprocessing": preprocessing_summary(preprocess_config, transactions) if preprocessed else None,
             "min_support": min_support,
             "min_confidence": min_confidence,
             "itemsets_found": len(frequent_itemsets),
             "rules_found": len(rules)
         }
 
-        # Calculate quality metrics
-        if not rules.empty:
-            quality_metrics = {
-                "avg_confidence": float(rules['confidence'].mean()),
-                "avg_lift": float(rules['lift'].mean()),
-                "avg_leverage": float(rules['leverage'].mean()),
-                "max_confidence": float(rules['confidence'].max()),
-                "max_lift": float(rules['lift'].max()),
-                "rule_diversity": float(len(set([tuple(r) for r in rules['antecedents']])) / len(rules))
+        # /append maintains results over the raw transactions, so preprocessed results are not kept current
+        if output == 'all' and attempts and not frequent_itemsets.empty and not preprocessed:
+            n_transactions = len(transactions)
+            current_mining_basis = {
+                "min_support": attempts[-1]["support"],
+                "min_confidence": attempts[-1]["confidence"],
+                # Pair mining only ever finds itemsets of up to two items
+                "max_length": 2 if algorithm == 'pairwise' else None,
+                "counts": {
+                    frozenset(itemset): int(round(support * n_transactions))
+                    for itemset, support in zip(frequent_itemsets['itemsets'], frequent_itemsets['support'])
+                }
             }
-        else:
-            quality_metrics = {}
-
-        processing_results = {
-            "itemsets": itemsets_json,
-            "rules": rules_json,
-            "performance": performance,
-            "quality_metrics": quality_metrics,
-            "timestamp": datetime.now().isoformat()
-        }
-
-        # Mark processing finished
-        processing_state["is_processing"] = False
-        processing_state["current_step"] = "complete"
-        processing_state["progress"] = 100
 
-        return jsonify({
-            "message": "Pattern mining completed successfully",
-            "itemsets": itemsets_json,
-            "rules": rules_json,
-            "performance": performance,
-            "quality_metrics": quality_metrics
-        })
+        return finalize_mining(frequent_itemsets, rules, performance)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -601,36 +920,22 @@ def get_analytics():
         # Use the global transactions
         transactions = current_transactions
 
-        # Calculate item frequencies
-        te = TransactionEncoder()
-        te_ary = te.fit(transactions).transform(transactions)
-        # Convert to numpy array
-        te_array = np.array(te_ary)
-        df_encoded = pd.DataFrame(te_array, columns=te.columns_)
-
-        item_frequencies = []
-        for item in te.columns_:
-            support = df_encoded[item].mean()
-            item_frequencies.append({
-                "item": item,
-                "frequency": int(df_encoded[item].sum()),
-                "support": float(support)
-            })
-
-        item_frequencies.sort(key=lambda x: x['support'], reverse=True)
+        # Item frequencies and lengths come from the store's arrays, not a dense encoding
+        item_frequencies = store_item_frequencies(transactions)
+        length_stats = transactions.length_stats()
 
         # Enhanced analytics
         analytics_data = {
             **processing_results,
             "summary": {
-                "total_transactions": len(transactions),
-                "unique_items": len(te.columns_),
-                "avg_items": np.mean([len(t) for t in transactions])
+                "total_transactions": length_stats["total_transactions"],
+                "unique_items": length_stats["unique_items"],
+                "avg_items": length_stats["avg_items_per_transaction"]
             },
             "item_frequencies": item_frequencies,
             "metrics": {
                 **processing_results.get("quality_metrics", {}),
-                "rule_coverage": (len(processing_results.get("rules", [])) / max(1, len(te.columns_))) * 100
+                "rule_coverage": (len(processing_results.get("rules", [])) / max(1, length_stats["unique_items"])) * 100
             }
         }
 
@@ -639,6 +944,194 @@ def get_analytics():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/append', methods=['POST'])
+def append_transactions():
+    """Append transactions to the current dataset and update the last mining result incrementally (FUP)"""
+    global current_data, current_transactions, current_pairs, current_stats, current_incremental, current_preprocessed
+
+    try:
+        if current_transactions is None:
+            return jsonify({"error": "No data uploaded. Please upload data first."}), 400
+
+        if 'file' in request.files:
+            # Parsed exactly like /upload, so every upload format can be appended
+            try:
+                appended, _ = read_uploaded_transactions(request.files['file'])
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            new_transactions = list(appended)
+        else:
+            data = request.get_json(silent=True) or {}
+            if not isinstance(data.get('transactions'), list):
+                return jsonify({"error": "Provide a basket file or a JSON 'transactions' list of item lists"}), 400
+            new_transactions = [
+                [str(item).strip() for item in t if str(item).strip()]
+                for t in data['transactions'] if isinstance(t, list)
+            ]
+            new_transactions = [t for t in new_transactions if t]
+
+        start_time = time.time()
+        # The first append after a /mine starts maintaining its result over the store
+        if current_incremental is None and current_mining_basis is not None:
+            current_incremental = IncrementalItemsets(current_transactions, current_mining_basis["counts"],
+                                                      current_mining_basis["min_support"],
+                                                      current_mining_basis["max_length"])
+
+        if current_incremental is None:
+            current_transactions.extend(new_transactions)
+        else:
+            # Extends the store and updates the maintained itemsets
+            update = current_incremental.append(new_transactions)
+        current_data = pd.DataFrame({'transaction_id': range(len(current_transactions))})
+        current_pairs = None
+        current_stats = None
+        current_preprocessed = OrderedDict()
+
+        if current_incremental is None:
+            return jsonify({
+                "message": f"Appended {len(new_transactions)} transactions",
+                "appended": len(new_transactions),
+                "total_transactions": len(current_transactions)
+            })
+
+        frequent_itemsets, _ = records_to_frames(current_incremental.itemsets(), [])
+        rules = generate_rules_frame(frequent_itemsets, current_mining_basis["min_confidence"])
+
+        performance = {
+            "mining_time": time.time() - start_time,
+            "algorithm": "fup",
+            "min_support": current_mining_basis["min_support"],
+            "min_confidence": current_mining_basis["min_confidence"],
+            "itemsets_found": len(frequent_itemsets),
+            "rules_found": len(rules),
+            **update
+        }
+        return finalize_mining(frequent_itemsets, rules, performance)
+
+    except Exception as e:
+        return jsonify({"error": f"Error appending transactions: {str(e)}"}), 500
+
+@app.route('/stream/batch', methods=['POST'])
+def stream_batch():
+    """Append a batch of transactions to the streaming summary"""
+    global stream_counter
+
+    try:
+        data = request.get_json() or {}
+        transactions = data.get('transactions')
+        if not isinstance(transactions, list):
+            return jsonify({"error": "Expected JSON body with a 'transactions' list of item lists"}), 400
+
+        if stream_counter is None:
+            stream_counter = LossyCounter(float(data.get('epsilon', DEFAULT_EPSILON)),
+                                          int(data.get('max_length', DEFAULT_MAX_LENGTH)))
+        added = stream_counter.add_batch(
+            [str(item).strip() for item in t if str(item).strip()] for t in transactions if isinstance(t, list)
+        )
+        return jsonify({"message": f"Added {added} transactions", "added": added, **stream_counter.stats()})
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error processing batch: {str(e)}"}), 500
+
+@app.route('/stream/reset', methods=['POST'])
+def stream_reset():
+    """Start a new streaming summary, optionally with a different error bound or itemset length"""
+    global stream_counter
+
+    data = request.get_json(silent=True) or {}
+    try:
+        stream_counter = LossyCounter(float(data.get('epsilon', DEFAULT_EPSILON)),
+                                      int(data.get('max_length', DEFAULT_MAX_LENGTH)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"message": "Stream summary reset", **stream_counter.stats()})
+
+@app.route('/stream', methods=['GET'])
+def stream_status():
+    """Size and parameters of the streaming summary"""
+    if stream_counter is None:
+        return jsonify({"total_transactions": 0, "summary_entries": 0})
+    return jsonify(stream_counter.stats())
+
+@app.route('/datasets', methods=['GET'])
+def list_datasets():
+    """List the memory-mapped datasets available to /mine"""
+    datasets = []
+    if os.path.isdir(MAPPED_DATASET_DIR):
+        for name in sorted(os.listdir(MAPPED_DATASET_DIR)):
+            path = os.path.join(MAPPED_DATASET_DIR, name)
+            try:
+                dataset = MappedTransactions(path)
+            except (OSError, ValueError):
+                continue
+            datasets.append({
+                "name": name,
+                "total_transactions": dataset.n_transactions,
+                "unique_items": len(dataset.items),
+                "total_items": dataset.nnz
+            })
+    return jsonify({"datasets": datasets})
+
+@app.route('/datasets', methods=['POST'])
+def create_dataset():
+    """Stream an uploaded basket file (one comma-separated transaction per line) into a mapped dataset"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({"error": "No file provided"}), 400
+
+        file = request.files['file']
+        name = request.form.get('name') or os.path.splitext(file.filename or '')[0]
+        path = mapped_dataset_path(name)
+        if path is None:
+            return jsonify({"error": "Dataset name may only contain letters, digits, '.', '-' and '_'"}), 400
+
+        meta = convert_basket_file(io.TextIOWrapper(file.stream, encoding='utf-8'), path)
+        return jsonify({
+            "message": "Dataset stored",
+            "name": name,
+            "total_transactions": meta['n_transactions'],
+            "unique_items": meta['n_items'],
+            "total_items": meta['nnz']
+        })
+
+    except Exception as e:
+        return jsonify({"error": f"Error storing dataset: {str(e)}"}), 500
+
+@app.route('/cooccurrence', methods=['GET'])
+def get_cooccurrence():
+    """Get the thresholded item co-occurrence matrix for heatmaps"""
+    global current_transactions
+
+    try:
+        if current_transactions is None:
+            return jsonify({"error": "No data uploaded. Please upload data first."}), 400
+
+        min_support = float(request.args.get('min_support', 0.01))
+        max_items = request.args.get('max_items', type=int)
+
+        return jsonify(get_pair_cooccurrence().matrix(min_support, max_items))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/snapshot', methods=['GET'])
+def get_snapshot():
+    """Download the resident dataset as a Parquet snapshot that /upload can load again"""
+    global current_transactions
+
+    if current_transactions is None:
+        return jsonify({"error": "No data uploaded. Please upload data first."}), 400
+    try:
+        buffer = io.BytesIO()
+        write_parquet_snapshot(current_transactions, buffer)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 501
+    buffer.seek(0)
+    return send_file(buffer, as_attachment=True, download_name='dataset.parquet',
+                     mimetype='application/vnd.apache.parquet')
+
 @app.route('/results', methods=['GET'])
 def get_results():
     """Get the latest mining results"""
@@ -649,10 +1142,132 @@ def get_results():
 
     return jsonify(processing_results)
 
+@app.route('/itemsets', methods=['GET'])
+def query_itemsets():
+    """Query the latest itemsets: top-n containing an item, supersets/subsets of a set, exact support"""
+    if not processing_results:
+        return jsonify({"error": "No results available. Please run pattern mining first."}), 400
+
+    def item_list(name):
+        return [item.strip() for item in request.args.get(name, '').split(',') if item.strip()]
+
+    try:
+        trie = get_itemset_trie()
+        limit = request.args.get('limit', 20, type=int)
+        if 'item' in request.args:
+            itemsets = trie.top_containing(request.args['item'], limit,
+                                           request.args.get('min_length', 1, type=int))
+        elif 'superset_of' in request.args:
+            itemsets = trie.supersets(item_list('superset_of'), proper=True)
+        elif 'subset_of' in request.args:
+            itemsets = trie.subsets(item_list('subset_of'), proper=True)
+        elif 'itemset' in request.args:
+            itemset = item_list('itemset')
+            support = trie.support(itemset)
+            itemsets = [{"itemset": itemset, "support": support, "length": len(itemset)}] if support is not None else []
+        elif request.args.get('closed', '').lower() == 'true':
+            # Redundancy pruning: drop itemsets that a superset with the same support already describes
+            itemsets = trie.closed()
+        else:
+            return jsonify({"error": "Provide one of item, superset_of, subset_of, itemset or closed=true"}), 400
+
+        return jsonify({"itemsets": itemsets, "count": len(itemsets)})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/rules', methods=['GET'])
+def query_rules():
+    """Filter the latest rules by item and metric ranges, sorted by any metric, one cursor page at a time"""
+    if not processing_results:
+        return jsonify({"error": "No results available. Please run pattern mining first."}), 400
+
+    def item_list(name):
+        return [item.strip() for item in request.args.get(name, '').split(',') if item.strip()]
+
+    try:
+        store = get_rule_store()
+        ranges = {}
+        for name in request.args:
+            bound, _, metric = name.partition('_')
+            if bound not in ('min', 'max') or not metric:
+                continue
+            if metric not in store.metrics:
+                return jsonify({"error": f"Unknown metric filter: {name}"}), 400
+            value = float(request.args[name])
+            low, high = ranges.get(metric, (None, None))
+            ranges[metric] = (value, high) if bound == 'min' else (low, value)
+
+        order = request.args.get('order', 'desc')
+        if order not in ('asc', 'desc'):
+            return jsonify({"error": "order must be 'asc' or 'desc'"}), 400
+
+        return jsonify(store.query(
+            antecedent=item_list('antecedent'),
+            consequent=item_list('consequent'),
+            ranges=ranges,
+            sort_by=request.args.get('sort_by', 'confidence'),
+            descending=order == 'desc',
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            cursor=request.args.get('cursor')
+        ))
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/recommend', methods=['POST'])
+def recommend():
+    """Recommend the top-N consequent items for a basket, scored by the matching rules' confidence or lift"""
+    if not processing_results:
+        return jsonify({"error": "No results available. Please run pattern mining first."}), 400
+
+    data = request.get_json(silent=True) or {}
+    basket = data.get('basket')
+    if not isinstance(basket, list):
+        return jsonify({"error": "Expected JSON body with a 'basket' list of items"}), 400
+    top_n = data.get('top_n', 5)
+    if not isinstance(top_n, int) or top_n < 1:
+        return jsonify({"error": "top_n must be a positive integer"}), 400
+
+    try:
+        basket = [str(item).strip() for item in basket if str(item).strip()]
+        return jsonify(get_recommender().recommend(basket, top_n, data.get('metric', 'confidence')))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/score', methods=['POST'])
+def score_file():
+    """Score every basket of an uploaded file against the latest rules and stream the top consequents"""
+    if not processing_results:
+        return jsonify({"error": "No results available. Please run pattern mining first."}), 400
+    if 'file' not in request.files or request.files['file'].filename == '':
+        return jsonify({"error": "No file provided"}), 400
+
+    try:
+        top_n = int(request.values.get('top_n', 5))
+        if top_n < 1:
+            return jsonify({"error": "top_n must be a positive integer"}), 400
+        output = request.values.get('format', 'csv')
+        baskets, _ = read_uploaded_transactions(request.files['file'])
+        stream = score_baskets(get_rule_matrix(), baskets, top_n, request.values.get('metric', 'confidence'), output)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return Response(stream_with_context(stream),
+                    mimetype='text/csv' if output == 'csv' else 'application/x-ndjson',
+                    headers={"Content-Disposition": f"attachment; filename=scores.{output}"})
+
 @app.route('/test-upload-and-mine', methods=['POST'])
 def test_upload_and_mine():
     """Test the complete upload and mining flow"""
-    global current_data, current_itemsets, current_rules, processing_results
+    global current_data, current_itemsets, current_rules, processing_results, current_itemset_trie, current_rule_store, current_recommender
+    global current_rule_matrix
 
     try:
         # Simulate the complete flow with super_patterns.json
@@ -682,7 +1297,7 @@ def test_upload_and_mine():
         frequent_itemsets = apriori(df_encoded, min_support=min_support, use_colnames=True)
 
         # Generate rules
-        rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=min_confidence)
+        rules = generate_rules_frame(frequent_itemsets, min_confidence)
 
         # Convert to JSON format exactly like the real endpoint
         itemsets_json = []
@@ -710,6 +1325,10 @@ def test_upload_and_mine():
         # Store results
         current_itemsets = frequent_itemsets
         current_rules = rules
+        current_itemset_trie = None
+        current_rule_store = None
+        current_recommender = None
+        current_rule_matrix = None
 
         result = {
             "message": "Pattern mining completed successfully",
@@ -750,7 +1369,7 @@ def test_mining():
         frequent_itemsets = apriori(df_encoded, min_support=0.1, use_colnames=True)
 
         # Generate association rules
-        rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=0.3)
+        rules = generate_rules_frame(frequent_itemsets, 0.3)
 
         return jsonify({
             "success": True,
@@ -1073,41 +1692,10 @@ def concept_lattice():
         if file.filename == '' or file.filename is None:
             return jsonify({'error': 'No file selected'}), 400
 
-        filename = file.filename or ''
-
-        # Read the uploaded file
-        if filename.endswith('.csv'):
-            # Read CSV content as text first to handle variable-length rows
-            csv_content = file.stream.read().decode("utf-8")
-            print(f"Lattice CSV content preview: {csv_content[:200]}...")
-
-            # Parse CSV manually to handle variable-length transactions
-            lines = csv_content.strip().split('\n')
-            transactions = []
-
-            for line_num, line in enumerate(lines, 1):
-                if line.strip():  # Skip empty lines
-                    # Split by comma and clean items
-                    items = [item.strip().strip('"') for item in line.split(',')]
-                    items = [item for item in items if item]  # Remove empty items
-                    if items:  # Only add non-empty transactions
-                        transactions.append(items)
-
-            print(f"Lattice: Parsed {len(transactions)} transactions from CSV")
-
-        elif filename.endswith('.json'):
-            data = json.loads(file.stream.read().decode("utf-8"))
-            if isinstance(data, list) and len(data) > 0:
-                if isinstance(data[0], list):
-                    transactions = data
-                else:
-                    # Assume it's list of strings, split by comma
-                    transactions = [item.split(',') for item in data]
-            else:
-                return jsonify({'error': 'Invalid JSON format'}), 400
-
-        else:
-            return jsonify({'error': 'Unsupported file format'}), 400
+        try:
+            transactions = TransactionStore.from_encoded(read_transactions(file))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         print(f"Processing {len(transactions)} transactions for concept lattice")
 
@@ -1116,9 +1704,6 @@ def concept_lattice():
             print(f"Limiting to first 50 transactions for performance")
             transactions = transactions[:50]
 
-        # Filter out empty transactions
-        transactions = [t for t in transactions if t]
-
         if not transactions:
             return jsonify({'error': 'No valid transactions found'}), 400
 
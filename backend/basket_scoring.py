@@ -0,0 +1,168 @@
+"""
+Bulk scoring of baskets against a rule set with sparse matrix products.
+Rules become two sparse indicator matrices over one item dictionary, one for
+antecedents and one for consequents. A chunk of baskets becomes a sparse
+basket-by-item matrix B straight from the uploaded CSR arrays, through one
+lookup from the upload's item ids to rule columns, and B @ A.T counts how many antecedent items of every
+rule each basket holds; a rule applies where that count equals its antecedent
+length. The applicable (basket, rule) pairs are expanded to their consequent
+items, items already in the basket are dropped, and the best score per
+(basket, item) and the top-N items per basket come from sorting the triples,
+so every step works on a whole chunk at once.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from ingest import EncodedTransactions
+from recommender import SCORE_METRICS
+
+SCORE_CHUNK_SIZE = 50_000
+OUTPUT_FORMATS = ('csv', 'ndjson')
+
+
+def _indicator(rows: List[List[int]], n_columns: int) -> sparse.csr_matrix:
+    """CSR 0/1 matrix with one row per list of column ids"""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+    indices = np.fromiter((idx for row in rows for idx in row), dtype=np.int32, count=int(indptr[-1]))
+    return sparse.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr), shape=(len(rows), n_columns))
+
+
+class RuleMatrix:
+    """Antecedent and consequent indicator matrices of a rule set over one item dictionary"""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.item_ids: Dict[str, int] = {}
+        self.items: List[str] = []
+        antecedents = [sorted({self._id(item) for item in rule['antecedents']}) for rule in rules]
+        consequents = [sorted({self._id(item) for item in rule['consequents']}) for rule in rules]
+        self.antecedents = _indicator(antecedents, len(self.items))
+        self.consequents = _indicator(consequents, len(self.items))
+        self.antecedent_length = np.diff(self.antecedents.indptr).astype(np.int32)
+        self.scores = {
+            metric: np.array([rule[metric] for rule in rules], dtype=np.float64)
+            for metric in SCORE_METRICS
+        }
+
+    def _id(self, item: str) -> int:
+        idx = self.item_ids.get(item)
+        if idx is None:
+            idx = self.item_ids[item] = len(self.items)
+            self.items.append(item)
+        return idx
+
+    def columns(self, items: List[str]) -> np.ndarray:
+        """Rule-matrix column of every item of another dictionary, -1 for items no rule mentions"""
+        item_ids = self.item_ids
+        return np.array([item_ids.get(item, -1) for item in items], dtype=np.int64)
+
+    def encode(self, baskets: EncodedTransactions, columns: np.ndarray, start: int, stop: int) -> sparse.csr_matrix:
+        """Basket-by-item indicator matrix of baskets start..stop, given their dictionary's columns"""
+        offsets = baskets.offsets[start:stop + 1].astype(np.int64)
+        cols = columns[baskets.item_ids[offsets[0]:offsets[-1]]]
+        rows = np.repeat(np.arange(stop - start), np.diff(offsets))
+        kept = cols >= 0
+        indptr = np.zeros(stop - start + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[kept], minlength=stop - start), out=indptr[1:])
+        indices = cols[kept].astype(np.int32)
+        return sparse.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                                 shape=(stop - start, len(self.items)))
+
+    def top_consequents(self, encoded: sparse.csr_matrix, top_n: int,
+                        metric: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(basket row, item id, score) of the top_n items per encoded basket, ordered by basket then rank"""
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+        if not encoded.shape[0] or not self.items:
+            return empty
+
+        # Antecedent items present per (basket, rule); the rule applies when all of them are
+        overlap = (encoded @ self.antecedents.T).tocoo()
+        applies = overlap.data == self.antecedent_length[overlap.col]
+        basket_rows, rule_ids = overlap.row[applies].astype(np.int64), overlap.col[applies]
+        if not len(rule_ids):
+            return empty
+
+        # Expand every applicable rule to its consequent items
+        starts, stops = self.consequents.indptr[rule_ids], self.consequents.indptr[rule_ids + 1]
+        counts = stops - starts
+        rows = np.repeat(basket_rows, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        item_ids = self.consequents.indices[np.repeat(starts, counts) + offsets].astype(np.int64)
+        scores = np.repeat(self.scores[metric][rule_ids], counts)
+
+        # Drop items already in the basket, matching (basket, item) pairs as flat keys
+        n_items = len(self.items)
+        held = encoded.tocoo()
+        keys = rows * n_items + item_ids
+        keep = ~np.isin(keys, held.row.astype(np.int64) * n_items + held.col)
+        keys, scores = keys[keep], scores[keep]
+        if not len(keys):
+            return empty
+
+        # Best score per (basket, item): one sort on the flat key, then a max over each run
+        order = np.argsort(keys)
+        keys, scores = keys[order], scores[order]
+        run_start = np.r_[0, np.flatnonzero(keys[1:] != keys[:-1]) + 1]
+        keys, scores = keys[run_start], np.maximum.reduceat(scores, run_start)
+        rows, item_ids = keys // n_items, keys % n_items
+
+        # Keys are sorted by basket, so a stable sort on the score keeps baskets grouped once re-sorted by row
+        order = np.argsort(-scores, kind='stable')
+        order = order[np.argsort(rows[order], kind='stable')]
+        rows, item_ids, scores = rows[order], item_ids[order], scores[order]
+        group_start = np.r_[0, np.flatnonzero(rows[1:] != rows[:-1]) + 1]
+        rank = np.arange(len(rows)) - np.repeat(group_start, np.diff(np.r_[group_start, len(rows)]))
+        keep = rank < top_n
+        return rows[keep], item_ids[keep], scores[keep]
+
+
+def score_baskets(rule_matrix: RuleMatrix, baskets: EncodedTransactions, top_n: int = 5, metric: str = 'confidence',
+                  output: str = 'csv', chunk_size: int = SCORE_CHUNK_SIZE) -> Iterator[str]:
+    """Stream the top consequents of every basket with a recommendation, chunk by chunk, as CSV or NDJSON
+
+    Baskets are identified by the transaction id or data row their upload gave them.
+    """
+    if metric not in SCORE_METRICS:
+        raise ValueError(f"metric must be one of: {', '.join(SCORE_METRICS)}")
+    if output not in OUTPUT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(OUTPUT_FORMATS)}")
+
+    def generate() -> Iterator[str]:
+        if output == 'csv':
+            yield 'basket,rank,item,score\n'
+        items = rule_matrix.items
+        columns = rule_matrix.columns(baskets.items)
+        for start in range(0, len(baskets), chunk_size):
+            encoded = rule_matrix.encode(baskets, columns, start, min(start + chunk_size, len(baskets)))
+            rows, item_ids, scores = rule_matrix.top_consequents(encoded, top_n, metric)
+            rows = baskets.transaction_ids(rows + start)
+            item_ids, scores = item_ids.tolist(), scores.tolist()
+            if output == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, lineterminator='\n')
+                rank = 0
+                for i, (row, item_id, score) in enumerate(zip(rows, item_ids, scores)):
+                    rank = rank + 1 if i and rows[i - 1] == row else 1
+                    writer.writerow((row, rank, items[item_id], score))
+                yield buffer.getvalue()
+            else:
+                lines = []
+                i = 0
+                while i < len(rows):
+                    j = i
+                    while j < len(rows) and rows[j] == rows[i]:
+                        j += 1
+                    lines.append(json.dumps({
+                        'basket': rows[i],
+                        'recommendations': [{'item': items[item_ids[k]], 'score': scores[k]} for k in range(i, j)]
+                    }) + '\n')
+                    i = j
+                yield ''.join(lines)
+
+    return generate()
@@ -0,0 +1,167 @@
+"""
+Closed and maximal frequent itemset mining.
+Closed itemsets are enumerated directly with LCM's prefix-preserving closure
+extension, so every closed set is produced exactly once and the result keeps
+the support of every frequent itemset (the support of X is the support of its
+smallest closed superset). Maximal itemsets come from a depth-first search with
+parent equivalence pruning, a frequent-tail lookahead and progressive focusing
+of the superset checks (MAFIA/GenMax-style). Neither miner materialises the
+full set of frequent itemsets.
+"""
+
+from itertools import combinations
+from typing import Any, Dict, List, Tuple
+
+from itemset_mining import Itemset, min_support_count
+from vertical import VerticalIndex, itemset_record, rule_record
+
+CONDENSED_OUTPUTS = ('closed', 'maximal')
+
+# Rules enumerate every antecedent/consequent split of an itemset, so very long
+# maximal itemsets are reported without rules rather than with 2^n of them.
+MAX_RULE_ITEMSET_LENGTH = 12
+
+
+def _closed(index: VerticalIndex, min_count: int) -> List[Tuple[Itemset, int]]:
+    """LCM: depth-first closed itemset enumeration by ppc-extension"""
+    order = index.order
+    tids = [index.tidsets[item] for item in order]
+    n_items = len(order)
+
+    def closure_tail(tidset: int, start: int) -> List[int]:
+        return [pos for pos in range(start, n_items) if tids[pos] & tidset == tidset]
+
+    everything = (1 << index.n_transactions) - 1
+    root = tuple(closure_tail(everything, 0))
+    found: List[Tuple[Itemset, int]] = []
+    if root:
+        found.append((root, index.n_transactions))
+
+    stack = [(root, everything, -1)]
+    while stack:
+        closed, tidset, core = stack.pop()
+        members = set(closed)
+        for pos in range(core + 1, n_items):
+            if pos in members:
+                continue
+            extended = tidset & tids[pos]
+            count = extended.bit_count()
+            if count < min_count:
+                continue
+            # Prefix preservation: the closure may not add any item ordered before pos
+            if any(tids[j] & extended == extended for j in range(pos) if j not in members):
+                continue
+            itemset = tuple(sorted(members.union(closure_tail(extended, pos))))
+            found.append((itemset, count))
+            stack.append((itemset, extended, pos))
+
+    return [(tuple(order[pos] for pos in itemset), count) for itemset, count in found]
+
+
+def _maximal(index: VerticalIndex, min_count: int) -> List[Tuple[Itemset, int]]:
+    """Depth-first maximal itemset search with PEP, lookahead and progressive focusing"""
+    order = index.order
+    tids = [index.tidsets[item] for item in order]
+    found: List[Tuple[int, int]] = []
+
+    def subsumed(mask: int, local: List[int]) -> bool:
+        return any(mask & other == mask for other in local)
+
+    def search(head: int, tidset: int, count: int, tail: List[int], local: List[int]) -> List[int]:
+        extensions = []
+        for pos in tail:
+            extended = tidset & tids[pos]
+            if extended == tidset:
+                # Parent equivalence: pos occurs wherever head does, so it joins the head
+                head |= 1 << pos
+                continue
+            extended_count = extended.bit_count()
+            if extended_count >= min_count:
+                extensions.append((pos, extended, extended_count))
+
+        # Only maximal sets containing head can subsume anything in this subtree
+        local = [other for other in local if head & other == head]
+        new: List[int] = []
+
+        def record(mask: int, mask_count: int) -> None:
+            if not subsumed(mask, local):
+                found.append((mask, mask_count))
+                local.append(mask)
+                new.append(mask)
+
+        if not extensions:
+            if head:
+                record(head, count)
+            return new
+
+        everything = head
+        combined = tidset
+        for pos, extended, _ in extensions:
+            everything |= 1 << pos
+            combined &= extended
+        if subsumed(everything, local):
+            return new
+        combined_count = combined.bit_count()
+        if combined_count >= min_count:
+            # Lookahead: the whole tail is frequent together, so no need to descend
+            record(everything, combined_count)
+            return new
+
+        # Least frequent extensions first keeps the remaining tails small
+        extensions.sort(key=lambda entry: entry[2])
+        for i, (pos, extended, extended_count) in enumerate(extensions):
+            found_below = search(head | (1 << pos), extended, extended_count,
+                                 [other for other, _, _ in extensions[i + 1:]], local)
+            local.extend(found_below)
+            new.extend(found_below)
+        return new
+
+    search(0, (1 << index.n_transactions) - 1, index.n_transactions, list(range(len(order))), [])
+
+    return [
+        (tuple(order[pos] for pos in range(len(order)) if mask >> pos & 1), count)
+        for mask, count in found
+    ]
+
+
+def condensed_rules(index: VerticalIndex, itemsets: List[Tuple[Itemset, int]], min_confidence: float) -> List[Dict[str, Any]]:
+    """Association rules from every antecedent/consequent split of the given itemsets"""
+    counts: Dict[Itemset, int] = dict(itemsets)
+
+    def count_of(itemset: Itemset) -> int:
+        count = counts.get(itemset)
+        if count is None:
+            count = counts[itemset] = index.count(itemset)
+        return count
+
+    rules = []
+    for itemset, count in itemsets:
+        if not 2 <= len(itemset) <= MAX_RULE_ITEMSET_LENGTH:
+            continue
+        for size in range(1, len(itemset)):
+            for antecedent in combinations(itemset, size):
+                count_a = count_of(antecedent)
+                if count / count_a < min_confidence:
+                    continue
+                consequent = tuple(item for item in itemset if item not in antecedent)
+                rules.append(rule_record(index, antecedent, consequent, count, count_a, count_of(consequent)))
+    return rules
+
+
+def mine_condensed(transactions: List[List[str]], min_support: float, output: str,
+                   min_confidence: float = None) -> Dict[str, Any]:
+    """Closed or maximal frequent itemsets, plus rules from them when min_confidence is given"""
+    if output not in CONDENSED_OUTPUTS:
+        raise ValueError(f"output must be one of {CONDENSED_OUTPUTS}")
+    if not transactions:
+        return {'itemsets': [], 'rules': []}
+
+    min_count = min_support_count(min_support, len(transactions))
+    index = VerticalIndex(transactions, min_count)
+    itemsets = _closed(index, min_count) if output == 'closed' else _maximal(index, min_count)
+    itemsets.sort(key=lambda entry: (len(entry[0]), -entry[1]))
+
+    return {
+        'itemsets': [itemset_record(index, itemset, count) for itemset, count in itemsets],
+        'rules': condensed_rules(index, itemsets, min_confidence) if min_confidence is not None else []
+    }
@@ -1,6 +1,8 @@
 """
 Formal Concept Analysis (FCA) implementation for generating concept lattices.
 This module provides algorithms to create concept lattices from transaction data.
+Identical transactions share one incidence row, so closures are computed over
+distinct baskets while extents still list every transaction.
 """
 
 import pandas as pd
@@ -12,13 +14,25 @@ from collections import defaultdict
 class FormalContext:
     """Represents a formal context for Formal Concept Analysis"""
 
-    def __init__(self, objects: List[str], attributes: List[str], incidence: np.ndarray):
+    def __init__(self, objects: List[str], attributes: List[str], incidence: np.ndarray,
+                 row_objects: Optional[List[List[str]]] = None):
         self.objects = objects
         self.attributes = attributes
-        self.incidence = incidence
-        self.object_to_idx = {obj: idx for idx, obj in enumerate(objects)}
+        self.incidence = incidence  # One row per distinct object description
+        self.row_objects = row_objects if row_objects is not None else [[obj] for obj in objects]
+        self.object_to_row = {obj: row for row, members in enumerate(self.row_objects) for obj in members}
         self.attribute_to_idx = {attr: idx for idx, attr in enumerate(attributes)}
 
+    def rows_with_attributes(self, attribute_indices: List[int]) -> np.ndarray:
+        """Mask of incidence rows having all the given attribute indices"""
+        return np.all(self.incidence[:, attribute_indices], axis=1)
+
+    def attributes_of_rows(self, row_mask: np.ndarray) -> np.ndarray:
+        """Mask of attributes shared by all masked rows (every attribute when no row is masked)"""
+        if not row_mask.any():
+            return np.ones(len(self.attributes), dtype=bool)
+        return np.all(self.incidence[row_mask], axis=0)
+
     def get_objects_with_attributes(self, attributes: Set[str]) -> Set[str]:
         """Get all objects that have all the given attributes"""
         if not attributes:
@@ -29,20 +43,20 @@ class FormalContext:
             return set()
 
         # Find objects that have ALL the attributes
-        object_mask = np.all(self.incidence[:, attribute_indices], axis=1)
-        return {self.objects[i] for i in np.where(object_mask)[0]}
+        row_mask = self.rows_with_attributes(attribute_indices)
+        return {obj for row in np.where(row_mask)[0] for obj in self.row_objects[row]}
 
     def get_attributes_of_objects(self, objects: Set[str]) -> Set[str]:
         """Get all attributes that are shared by all the given objects"""
         if not objects:
             return set(self.attributes)
 
-        object_indices = [self.object_to_idx[obj] for obj in objects if obj in self.object_to_idx]
-        if not object_indices:
+        row_indices = sorted({self.object_to_row[obj] for obj in objects if obj in self.object_to_row})
+        if not row_indices:
             return set()
 
         # Find attributes that are present in ALL the objects
-        attribute_mask = np.all(self.incidence[object_indices, :], axis=0)
+        attribute_mask = np.all(self.incidence[row_indices, :], axis=0)
         return {self.attributes[i] for i in np.where(attribute_mask)[0]}
 
 class Concept:
@@ -109,22 +123,25 @@ class ConceptLattice:
 
 def create_formal_context_from_transactions(transactions: List[List[str]]) -> FormalContext:
     """Create a formal context from transaction data"""
-    # Objects are transaction IDs, attributes are items
+    # Objects are transaction IDs, attributes are items; identical transactions share a row
     objects = [f"T{i+1}" for i in range(len(transactions))]
-    all_items = set()
-    for transaction in transactions:
-        all_items.update(transaction)
-    attributes = sorted(list(all_items))
+    baskets: Dict[frozenset, int] = {}
+    row_objects: List[List[str]] = []
+    for obj, transaction in zip(objects, transactions):
+        row = baskets.setdefault(frozenset(transaction), len(baskets))
+        if row == len(row_objects):
+            row_objects.append([])
+        row_objects[row].append(obj)
+    attributes = sorted(set().union(*baskets))
+    attribute_to_idx = {attr: idx for idx, attr in enumerate(attributes)}
 
     # Create incidence matrix
-    incidence = np.zeros((len(objects), len(attributes)), dtype=bool)
-    for i, transaction in enumerate(transactions):
-        for item in transaction:
-            if item in attributes:
-                j = attributes.index(item)
-                incidence[i, j] = True
+    incidence = np.zeros((len(baskets), len(attributes)), dtype=bool)
+    for i, basket in enumerate(baskets):
+        for item in basket:
+            incidence[i, attribute_to_idx[item]] = True
 
-    return FormalContext(objects, attributes, incidence)
+    return FormalContext(objects, attributes, incidence, row_objects)
 
 def generate_concepts_nextclosure(context: FormalContext) -> List[Concept]:
     """Generate all formal concepts using the Next Closure algorithm"""
@@ -132,10 +149,10 @@ def generate_concepts_nextclosure(context: FormalContext) -> List[Concept]:
     attributes = context.attributes
     n_attributes = len(attributes)
 
-    def closure(attribute_set: Set[str]) -> Set[str]:
-        """Compute the closure of an attribute set"""
-        objects = context.get_objects_with_attributes(attribute_set)
-        return context.get_attributes_of_objects(objects)
+    def closure(attribute_mask: List[bool]) -> List[bool]:
+        """Compute the closure of an attribute set, as a mask over the attributes"""
+        rows = context.rows_with_attributes([j for j, val in enumerate(attribute_mask) if val])
+        return context.attributes_of_rows(rows).tolist()
 
     def next_closure(current: List[bool]) -> Optional[List[bool]]:
         """Find the next closure in lexicographic order"""
@@ -146,9 +163,7 @@ def generate_concepts_nextclosure(context: FormalContext) -> List[Concept]:
                 test[i] = True
 
                 # Check if this is the closure
-                attr_set = {attributes[j] for j, val in enumerate(test) if val}
-                closure_set = closure(attr_set)
-                closure_bool = [attr in closure_set for attr in attributes]
+                closure_bool = closure(test)
 
                 # Check if it's lexicographically greater
                 is_lex_greater = True
@@ -163,10 +178,7 @@ def generate_concepts_nextclosure(context: FormalContext) -> List[Concept]:
         return None
 
     # Start with empty set
-    current = [False] * n_attributes
-    current_set = set()
-    closure_set = closure(current_set)
-    current = [attr in closure_set for attr in attributes]
+    current = closure([False] * n_attributes)
 
     while current is not None:
         # Create concept
@@ -0,0 +1,104 @@
+"""
+Incremental maintenance of frequent itemsets when transactions are appended (FUP).
+Itemsets that were frequent before only need their counts in the new batch.
+An itemset that was not frequent in the old data can only become frequent if it
+is frequent enough in the batch alone, so the old data is re-scanned solely for
+the few such promoted candidates, level by level. Updating after an append
+therefore costs time proportional to the batch plus one pass over the history
+per level that actually has promoted candidates. Items are encoded by the
+resident transaction store, which the appended transactions extend.
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from itemset_mining import CandidateTrie, Itemset, generate_candidates, min_support_count
+from transaction_store import TransactionStore
+
+
+def _count(candidates: List[Itemset], transactions: List[Itemset]) -> List[int]:
+    """Support counts of equal-length candidates over sorted id-tuple transactions"""
+    if not candidates:
+        return []
+    if len(candidates[0]) == 1:
+        item_counts = Counter(item for t in transactions for item in t)
+        return [item_counts[candidate[0]] for candidate in candidates]
+    trie = CandidateTrie(candidates)
+    for transaction in transactions:
+        trie.count_transaction(transaction)
+    return trie.counts
+
+
+class IncrementalItemsets:
+    """Frequent itemsets of a growing transaction store, kept current with FUP"""
+
+    def __init__(self, store: TransactionStore, itemset_counts: Dict[frozenset, int],
+                 min_support: float, max_length: Optional[int] = None):
+        self.store = store
+        self.min_support = min_support
+        self.max_length = max_length
+        self.n_transactions = len(store)
+        item_index = store.item_index
+        self.counts: Dict[Itemset, int] = {
+            tuple(sorted(item_index[item] for item in itemset)): count for itemset, count in itemset_counts.items()
+        }
+
+    def append(self, transactions: List[List[str]]) -> Dict[str, Any]:
+        """Extend the store with transactions and update every frequent itemset and count"""
+        n_old = self.n_transactions
+        self.store.extend(transactions)
+        n_total = self.n_transactions = len(self.store)
+        # The store's ids are the encoding; only the new rows are decoded to id tuples up front
+        delta = [t for t in self.store.encoded(n_old, n_total) if t]
+        stats = {'appended': n_total - n_old, 'previous_transactions': n_old, 'rescanned_candidates': 0, 'history_scans': 0}
+        if not delta:
+            return stats
+
+        min_count = min_support_count(self.min_support, n_total)
+        # A previously infrequent itemset had at most old_min_count - 1 occurrences in the old data
+        old_min_count = min_support_count(self.min_support, n_old) if n_old else 1
+        delta_needed = min_count - (old_min_count - 1)
+        history: Optional[List[Itemset]] = None
+
+        updated: Dict[Itemset, int] = {}
+        candidates: List[Itemset] = sorted({(item,) for t in delta for item in t} | {c for c in self.counts if len(c) == 1})
+        k = 1
+        while candidates and (self.max_length is None or k <= self.max_length):
+            delta_counts = _count(candidates, delta)
+
+            level: Dict[Itemset, int] = {}
+            promoted, promoted_delta = [], []
+            for candidate, delta_count in zip(candidates, delta_counts):
+                old_count = self.counts.get(candidate)
+                if old_count is not None:
+                    level[candidate] = old_count + delta_count
+                elif delta_count >= delta_needed:
+                    promoted.append(candidate)
+                    promoted_delta.append(delta_count)
+
+            if promoted:
+                # The only pass over the history: counts of newly promoted candidates
+                stats['rescanned_candidates'] += len(promoted)
+                stats['history_scans'] += 1
+                if history is None:
+                    history = self.store.encoded(0, n_old)
+                for candidate, old_count, delta_count in zip(promoted, _count(promoted, history), promoted_delta):
+                    level[candidate] = old_count + delta_count
+
+            frequent = sorted(candidate for candidate, count in level.items() if count >= min_count)
+            updated.update((candidate, level[candidate]) for candidate in frequent)
+            candidates = generate_candidates(frequent)
+            k += 1
+
+        self.counts = updated
+        stats['total_transactions'] = n_total
+        stats['itemsets'] = len(updated)
+        return stats
+
+    def itemsets(self) -> List[Dict[str, Any]]:
+        """Current frequent itemsets in the backends' JSON-ready format"""
+        n, items = self.n_transactions, self.store.items
+        return [
+            {'itemset': [items[i] for i in itemset], 'support': count / n, 'length': len(itemset)}
+            for itemset, count in sorted(self.counts.items(), key=lambda entry: (len(entry[0]), entry[0]))
+        ]
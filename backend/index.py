@@ -1,119 +1,47 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import json
-import io
+from werkzeug.exceptions import RequestEntityTooLarge
 import time
 from datetime import datetime
-import os
-import csv
-from collections import defaultdict, Counter
+from collections import Counter
+
+from itemset_mining import find_frequent_itemsets
+from pairwise import PairCooccurrence
+from closed_itemsets import CONDENSED_OUTPUTS, mine_condensed
+from topk import RANK_METRICS, top_k_itemsets, top_k_rules
+from rules import generate_rules
+from ingest import MAX_INFLATED_BYTES, inflate_request_body, read_transactions
+from transaction_store import TransactionStore
 
 app = Flask(__name__)
 
 # Configure CORS - simplified to avoid duplicate headers
-CORS(app, origins=['*'], methods=['GET', 'POST', 'OPTIONS'], allow_headers=['Content-Type', 'Authorization', 'Accept'])
+CORS(app, origins=['*'], methods=['GET', 'POST', 'OPTIONS'],
+     allow_headers=['Content-Type', 'Content-Encoding', 'Authorization', 'Accept'])
+
+@app.before_request
+def decompress_request_body():
+    """Inflate gzip/zstd request bodies before the upload form is parsed"""
+    try:
+        if inflate_request_body(request.environ):
+            # Parse the inflated body here, so an oversized one is rejected before any route reads it
+            request.get_data(parse_form_data=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 415
+    except RequestEntityTooLarge:
+        return jsonify({'error': f'Inflated request body exceeds {MAX_INFLATED_BYTES} bytes'}), 413
 
 # Global variables to store processed data
 processed_transactions = None
 original_data = None
 algorithms_performance = {}
 
-def calculate_support(itemset, transactions):
-    """Calculate support for an itemset"""
-    count = 0
-    for transaction in transactions:
-        if all(item in transaction for item in itemset):
-            count += 1
-    return count / len(transactions)
-
-def find_frequent_itemsets(transactions, min_support):
-    """Simple Apriori implementation"""
-    # Get all unique items
-    all_items = set()
-    for transaction in transactions:
-        all_items.update(transaction)
-
-    frequent_itemsets = []
-
-    # Find frequent 1-itemsets
-    for item in all_items:
-        support = calculate_support([item], transactions)
-        if support >= min_support:
-            frequent_itemsets.append({
-                'itemset': [item],
-                'support': support,
-                'length': 1
-            })
-
-    # Find frequent 2-itemsets
-    frequent_1_items = [fs['itemset'][0] for fs in frequent_itemsets]
-    for i, item1 in enumerate(frequent_1_items):
-        for item2 in frequent_1_items[i+1:]:
-            itemset = [item1, item2]
-            support = calculate_support(itemset, transactions)
-            if support >= min_support:
-                frequent_itemsets.append({
-                    'itemset': itemset,
-                    'support': support,
-                    'length': 2
-                })
-
-    return frequent_itemsets
-
-def generate_association_rules(frequent_itemsets, min_confidence=0.5):
-    """Generate association rules from frequent itemsets"""
-    rules = []
-
-    # Only generate rules from 2-itemsets for simplicity
-    for itemset_data in frequent_itemsets:
-        if itemset_data['length'] == 2:
-            items = itemset_data['itemset']
-            support_ab = itemset_data['support']
-
-            # Rule A -> B
-            support_a = next((fs['support'] for fs in frequent_itemsets
-                            if fs['itemset'] == [items[0]]), 0)
-            if support_a > 0:
-                confidence = support_ab / support_a
-                if confidence >= min_confidence:
-                    lift = confidence / next((fs['support'] for fs in frequent_itemsets
-                                            if fs['itemset'] == [items[1]]), 1)
-                    rules.append({
-                        'antecedents': [items[0]],
-                        'consequents': [items[1]],
-                        'support': support_ab,
-                        'confidence': confidence,
-                        'lift': lift,
-                        'conviction': (1 - next((fs['support'] for fs in frequent_itemsets
-                                              if fs['itemset'] == [items[1]]), 1)) / (1 - confidence) if confidence < 1 else None,
-                        'zhangs_metric': None
-                    })
-
-            # Rule B -> A
-            support_b = next((fs['support'] for fs in frequent_itemsets
-                            if fs['itemset'] == [items[1]]), 0)
-            if support_b > 0:
-                confidence = support_ab / support_b
-                if confidence >= min_confidence:
-                    lift = confidence / support_a
-                    rules.append({
-                        'antecedents': [items[1]],
-                        'consequents': [items[0]],
-                        'support': support_ab,
-                        'confidence': confidence,
-                        'lift': lift,
-                        'conviction': (1 - support_a) / (1 - confidence) if confidence < 1 else None,
-                        'zhangs_metric': None
-                    })
-
-    return rules
-
 @app.route('/')
 def home():
     return jsonify({
         "message": "Pattern Mining API",
         "status": "running",
-        "endpoints": ["/upload", "/mine", "/analytics"],
+        "endpoints": ["/upload", "/mine", "/cooccurrence", "/analytics"],
         "timestamp": datetime.now().isoformat()
     })
 
@@ -135,90 +63,26 @@ def upload_file():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
 
-        # Read the CSV file content
-        file_content = file.read().decode('utf-8')
-        lines = file_content.strip().split('\n')
-
-        if not lines or not lines[0].strip():
-            return jsonify({'error': 'Empty file'}), 400
-
-        # Check if this is a simple format (no headers) or structured format (with headers)
-        first_line = lines[0].strip()
-
-        # If first line looks like column names, treat as structured CSV
-        if ('transaction' in first_line.lower() and 'id' in first_line.lower()) or \
-           ('item' in first_line.lower() and ',' in first_line):
-            # Structured CSV format with headers
-            csv_reader = csv.DictReader(io.StringIO(file_content))
-            data_rows = list(csv_reader)
-
-            if not data_rows:
-                return jsonify({'error': 'Empty file'}), 400
-
-            first_row_keys = list(data_rows[0].keys())
-
-            # Find transaction ID column (flexible naming)
-            transaction_id_col = None
-            items_col = None
-
-            for col in first_row_keys:
-                col_lower = col.lower()
-                if 'transaction' in col_lower and 'id' in col_lower:
-                    transaction_id_col = col
-                elif col_lower in ['items', 'item', 'products', 'product']:
-                    items_col = col
-
-            if not transaction_id_col or not items_col:
-                return jsonify({
-                    'error': f'Missing required columns. Expected: transaction ID column and items column. Found: {first_row_keys}'
-                }), 400
-
-            # Group by TransactionID and create transaction lists
-            transactions_dict = {}
-            for row in data_rows:
-                transaction_id = row[transaction_id_col]
-                items_str = row[items_col]
-
-                # Parse items (handle comma-separated items in quotes)
-                if items_str.startswith('"') and items_str.endswith('"'):
-                    items_str = items_str[1:-1]  # Remove quotes
-                items = [item.strip() for item in items_str.split(',')]
-
-                if transaction_id not in transactions_dict:
-                    transactions_dict[transaction_id] = []
-                transactions_dict[transaction_id].extend(items)
-
-            transactions = list(transactions_dict.values())
-            original_data = data_rows
-        else:
-            # Simple CSV format (no headers) - each line is a transaction with items
-            transactions = []
-            for line_num, line in enumerate(lines, 1):
-                if line.strip():  # Skip empty lines
-                    # Split by comma and clean items
-                    items = [item.strip().strip('"') for item in line.split(',')]
-                    items = [item for item in items if item]  # Remove empty items
-                    if items:  # Only add non-empty transactions
-                        transactions.append(items)
-
-            if not transactions:
-                return jsonify({'error': 'No valid transactions found'}), 400
-
-            # Create dummy original_data for simple format
-            original_data = [{"transaction_id": i, "items": ','.join(transaction)} for i, transaction in enumerate(transactions)]
+        try:
+            transactions = TransactionStore.from_encoded(read_transactions(file))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if not transactions:
+            return jsonify({'error': 'No valid transactions found'}), 400
+
         processed_transactions = transactions
+        original_data = {'columns': transactions.columns, 'sample': transactions[:5]}
 
-        # Get all unique items
-        all_items = set()
-        for transaction in transactions:
-            all_items.update(transaction)
+        # Unique items and lengths come from the store's dictionary and offsets
+        all_items = set(transactions.items)
 
         # Get basic statistics
         stats = {
             'total_transactions': len(transactions),
             'unique_items': len(all_items),
-            'average_items_per_transaction': sum(len(t) for t in transactions) / len(transactions),
-            'sample_transactions': transactions[:5] if transactions else []
+            'average_items_per_transaction': transactions.length_stats()['avg_items_per_transaction'],
+            'sample_transactions': transactions[:5]
         }
 
         return jsonify({
@@ -241,11 +105,52 @@ def mine_patterns():
         data = request.get_json()
         min_support = data.get('min_support', 0.1)
         algorithm = data.get('algorithm', 'apriori')  # Only apriori supported in this minimal version
+        max_length = data.get('max_length')
+        output = data.get('output', 'all')
+
+        if output != 'all' and output not in CONDENSED_OUTPUTS:
+            return jsonify({'error': f"output must be one of: all, {', '.join(CONDENSED_OUTPUTS)}"}), 400
 
         start_time = time.time()
 
-        # Find frequent itemsets
-        frequent_itemsets = find_frequent_itemsets(processed_transactions, min_support)
+        # Top-k mode: one bounded run instead of guessing min_support
+        if data.get('top_k') is not None:
+            rank_by = data.get('rank_by', 'support')
+            top_k = data['top_k']
+            if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+                return jsonify({'error': 'top_k must be a positive integer'}), 400
+            if rank_by not in RANK_METRICS:
+                return jsonify({'error': f"rank_by must be one of: {', '.join(RANK_METRICS)}"}), 400
+
+            if rank_by == 'support':
+                top = top_k_itemsets(processed_transactions, top_k, max_length, min_confidence=0.5)
+            else:
+                top = top_k_rules(processed_transactions, top_k, rank_by, data.get('min_support'), max_length)
+
+            algorithms_performance['top_k'] = {
+                'execution_time': time.time() - start_time,
+                'itemsets_found': len(top['itemsets']),
+                'top_k': top_k,
+                'rank_by': rank_by,
+                'final_threshold': top['threshold'],
+                'timestamp': datetime.now().isoformat()
+            }
+
+            return jsonify({
+                'frequent_itemsets': top['itemsets'],
+                'association_rules': top['rules'],
+                'performance': algorithms_performance['top_k']
+            })
+
+        # Find frequent itemsets (closed/maximal outputs come with their own rules)
+        if output in CONDENSED_OUTPUTS:
+            condensed = mine_condensed(processed_transactions, min_support, output, 0.5)
+            frequent_itemsets = condensed['itemsets']
+        elif algorithm == 'pairwise':
+            pairs = PairCooccurrence(processed_transactions)
+            frequent_itemsets = pairs.itemsets(min_support)
+        else:
+            frequent_itemsets = find_frequent_itemsets(processed_transactions, min_support, max_length)
 
         end_time = time.time()
         execution_time = end_time - start_time
@@ -255,6 +160,7 @@ def mine_patterns():
             'execution_time': execution_time,
             'itemsets_found': len(frequent_itemsets),
             'min_support': min_support,
+            'output': output,
             'timestamp': datetime.now().isoformat()
         }
 
@@ -267,7 +173,12 @@ def mine_patterns():
             })
 
         # Generate association rules
-        rules = generate_association_rules(frequent_itemsets, min_confidence=0.5)
+        if output in CONDENSED_OUTPUTS:
+            rules = condensed['rules']
+        elif algorithm == 'pairwise':
+            rules = pairs.rules(min_support, 0.5)
+        else:
+            rules = generate_rules(frequent_itemsets, min_confidence=0.5)
 
         return jsonify({
             'frequent_itemsets': frequent_itemsets,
@@ -278,6 +189,21 @@ def mine_patterns():
     except Exception as e:
         return jsonify({'error': f'Error during mining: {str(e)}'}), 500
 
+@app.route('/cooccurrence', methods=['GET'])
+def cooccurrence():
+    global processed_transactions
+
+    try:
+        if processed_transactions is None:
+            return jsonify({'error': 'No data uploaded. Please upload a file first.'}), 400
+
+        min_support = float(request.args.get('min_support', 0.01))
+        max_items = request.args.get('max_items', type=int)
+        return jsonify(PairCooccurrence(processed_transactions).matrix(min_support, max_items))
+
+    except Exception as e:
+        return jsonify({'error': f'Error computing co-occurrence: {str(e)}'}), 500
+
 @app.route('/analytics', methods=['GET'])
 def get_analytics():
     global processed_transactions, algorithms_performance, original_data
@@ -308,7 +234,7 @@ def get_analytics():
                 }
             })
 
-        rules = generate_association_rules(frequent_itemsets, min_confidence=0.5)
+        rules = generate_rules(frequent_itemsets, min_confidence=0.5)
 
         # Generate analytics
         support_values = [fs['support'] for fs in frequent_itemsets]
@@ -330,10 +256,7 @@ def get_analytics():
             length_dist[length] = length_dist.get(length, 0) + 1
 
         # Top items by frequency
-        item_counter = Counter()
-        if original_data:
-            for row in original_data:
-                item_counter[row['Item']] += 1
+        item_counter = Counter(processed_transactions.item_frequencies())
         top_items = [{'item': item, 'frequency': count} for item, count in item_counter.most_common(10)]
 
         analytics = {
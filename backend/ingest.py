@@ -0,0 +1,852 @@
+"""
+Single-pass transaction ingest shared by every backend.
+`read_transactions` picks the parser from the upload's extension, sniffs the
+layout from a bounded prefix (the first rows of a CSV or sheet, the first
+element of a JSON document) and then commits to exactly one parse path.
+Items are interned to integer ids as soon as they are read and transactions
+accumulate directly as CSR arrays (int64 offsets and int32 item ids, each
+transaction's ids sorted and de-duplicated), so nothing is parsed twice and
+peak memory is a small multiple of the encoded result. Each transaction also
+keeps its source: its id in a (transaction, item) table, otherwise its data row.
+
+Row layouts (CSV and Excel):
+
+- a header with a transaction id column (`transaction_id`, `TransactionID`,
+  ...): item-per-row when there is one other column or an `item`/`items`/
+  `product`/`products` column, otherwise one transaction per row across the
+  other columns;
+- two fields on every sniffed row with an id-like first field (`1001`,
+  `T17`): item-per-row (transaction, item), after an optional header such as
+  `Member_number,itemDescription` or `customer_id,product`;
+- anything else: one transaction per row, after an optional `item1,item2,...`
+  header. A row with a single non-empty cell is split on commas.
+
+Parquet and Arrow IPC tables use the same rules on their column names; a
+list-typed column holds one transaction per row.
+
+JSON shapes: an array of item arrays, of comma-separated strings, of objects
+with an `items` field, or of (transaction, item) objects; or an object whose
+`transactions` or `data` field holds one of those arrays. The array is decoded
+one element at a time from the stream, never as a whole document. NDJSON
+(`.ndjson`, `.jsonl`) holds one such element per line.
+
+Gzip and zstd uploads (`data.csv.gz`, `data.json.zst`) and gzip request bodies
+(`Content-Encoding: gzip`) are inflated incrementally in front of the same
+parsers; only the random-access formats (Excel, Parquet, Arrow) are spooled to
+a temporary file first.
+"""
+
+import csv
+import gzip
+import io
+import json
+import re
+import shutil
+import tempfile
+from array import array
+from itertools import chain, islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Rows inspected to decide the layout before committing to a parse path
+SNIFF_ROWS = 1000
+# Raw rows cleaned and encoded together as one vectorized chunk
+CHUNK_ROWS = 50_000
+UPLOAD_FORMATS = {
+    '.csv': 'csv', '.txt': 'csv', '.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson',
+    '.xlsx': 'excel', '.xls': 'excel',
+    '.parquet': 'parquet', '.pq': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow'
+}
+COMPRESSIONS = {'.gz': 'gzip', '.gzip': 'gzip', '.zst': 'zstd', '.zstd': 'zstd'}
+CONTENT_ENCODINGS = {'gzip': 'gzip', 'x-gzip': 'gzip', 'zstd': 'zstd'}
+# Characters read from a JSON upload at a time
+JSON_CHUNK_CHARS = 1 << 20
+# Formats whose readers seek, so a compressed upload is inflated to a spooled file first
+RANDOM_ACCESS_FORMATS = ('excel', 'parquet', 'arrow')
+# Decompressed bytes kept in memory before the spool moves to disk
+SPOOL_BYTES = 64 * 1024 * 1024
+# Largest inflated `Content-Encoding` request body; beyond it the request fails with 413
+MAX_INFLATED_BYTES = 512 * 1024 * 1024
+ITEM_COLUMNS = {'item', 'items', 'product', 'products'}
+
+_ID_LIKE = re.compile(r'^[A-Za-z]{0,4}[-_#]?\d+$')
+_ITEM_HEADER = re.compile(r'^(item|product)s?[ _]?\d*$', re.IGNORECASE)
+_NON_WHITESPACE = re.compile(r'\S')
+_ELEMENT_DELIMITER = re.compile(r'\s*([,\]])\s*')
+
+
+class EncodedTransactions:
+    """Transactions as CSR arrays over an interned item dictionary"""
+
+    def __init__(self, items: List[str], offsets: np.ndarray, item_ids: np.ndarray,
+                 columns: Optional[List[str]] = None):
+        self.items = items
+        self.offsets = offsets
+        self.item_ids = item_ids
+        # Header of the uploaded table, if it had one
+        self.columns = columns or []
+        # Per transaction, its 0-based data row in the source (blank rows counted, header not), or for
+        # (transaction id, item) tables the index of its id in source_ids
+        self.source_keys: Optional[np.ndarray] = None
+        self.source_ids: List[str] = []
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Iterable[str]]) -> 'EncodedTransactions':
+        builder = TransactionBuilder()
+        for row, transaction in enumerate(transactions):
+            builder.add(transaction, row)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def item_counts(self) -> np.ndarray:
+        """Number of transactions containing each item id"""
+        return np.bincount(self.item_ids, minlength=len(self.items))
+
+    def transaction_ids(self, rows: np.ndarray) -> List[Any]:
+        """Source transaction id of the given transactions, or their data row when the source had no ids"""
+        if self.source_keys is None:
+            return np.asarray(rows).tolist()
+        keys = self.source_keys[rows].tolist()
+        if self.source_ids:
+            return [self.source_ids[key] for key in keys]
+        return keys
+
+    def transactions(self) -> List[List[str]]:
+        """Decode to item-name lists; the names are the interned strings, shared across transactions"""
+        items = self.items
+        flat = [items[i] for i in self.item_ids.tolist()]
+        bounds = self.offsets.tolist()
+        return [flat[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+class TransactionBuilder:
+    """Interns item names and appends transactions to growing CSR arrays"""
+
+    def __init__(self):
+        self.item_ids: Dict[str, int] = {}
+        self.items: List[str] = []
+        self.offsets = array('q', [0])
+        self.ids = array('i')
+        self.columns: List[str] = []
+        self.source_keys = array('q')
+        self.source_ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def intern(self, item: str) -> int:
+        idx = self.item_ids.get(item)
+        if idx is None:
+            idx = self.item_ids[item] = len(self.items)
+            self.items.append(item)
+        return idx
+
+    def add(self, items: Iterable[str], source_key: int) -> None:
+        """Append one transaction read from a source row; blank items are dropped and empty transactions skipped"""
+        known, intern = self.item_ids.get, self.intern
+        ids = set()
+        for item in items:
+            if item:
+                idx = known(item)
+                ids.add(intern(item) if idx is None else idx)
+        if ids:
+            self.ids.extend(sorted(ids))
+            self.offsets.append(len(self.ids))
+            self.source_keys.append(source_key)
+
+    def add_grouped(self, groups: np.ndarray, ids: np.ndarray, key_offset: int = 0) -> None:
+        """Append transactions given as parallel (group code, item id) rows, one transaction per group
+
+        Each transaction's source key is its group code plus key_offset.
+        """
+        if not len(ids):
+            return
+        groups_np = np.asarray(groups, dtype=np.int32)
+        ids_np = np.asarray(ids, dtype=np.int32)
+        # Sort by group then item and drop repeated items within a group
+        order = np.lexsort((ids_np, groups_np))
+        groups_np, ids_np = groups_np[order], ids_np[order]
+        keep = np.ones(len(ids_np), dtype=bool)
+        keep[1:] = (groups_np[1:] != groups_np[:-1]) | (ids_np[1:] != ids_np[:-1])
+        groups_np, ids_np = groups_np[keep], ids_np[keep]
+        lengths = np.bincount(groups_np)
+        filled = np.flatnonzero(lengths)
+        start = len(self.ids)
+        self.ids.extend(ids_np.tolist())
+        self.offsets.extend((start + np.cumsum(lengths[filled])).tolist())
+        self.source_keys.extend((filled + key_offset).tolist())
+
+    def build(self) -> EncodedTransactions:
+        encoded = EncodedTransactions(self.items, np.frombuffer(self.offsets, dtype=np.int64).copy(),
+                                      np.frombuffer(self.ids, dtype=np.int32).copy(), self.columns)
+        encoded.source_keys = np.frombuffer(self.source_keys, dtype=np.int64).copy()
+        encoded.source_ids = self.source_ids
+        return encoded
+
+
+class Layout(NamedTuple):
+    """How to read transactions out of a table of string cells"""
+    kind: str  # 'item_per_row', 'wide' or 'transaction_per_row'
+    has_header: bool
+    tid_column: int = -1
+    item_columns: List[int] = []
+
+
+def clean_cell(cell: Any) -> str:
+    """Item text of a table cell, without surrounding whitespace or quotes"""
+    if type(cell) is str:
+        cell = cell.strip()
+        if not cell or (cell[0] not in '"\'' and cell[-1] not in '"\''):
+            return cell
+    if cell is None:
+        return ''
+    if isinstance(cell, float) and cell.is_integer():
+        # Spreadsheet numbers such as ids arrive as floats; 1001.0 is the item "1001"
+        cell = int(cell)
+    return str(cell).strip().strip('"\'').strip()
+
+
+def sniff_layout(prefix: List[List[str]]) -> Layout:
+    """Pick the row layout from the first (already cleaned) rows of a table"""
+    if not prefix:
+        return Layout('transaction_per_row', False)
+    header = [cell.lower() for cell in prefix[0]]
+    tid_column = next((i for i, cell in enumerate(header) if 'transaction' in cell and 'id' in cell), None)
+    if tid_column is not None and len(header) >= 2:
+        others = [i for i in range(len(header)) if i != tid_column and header[i]]
+        named = [i for i in others if header[i] in ITEM_COLUMNS]
+        if named or len(others) == 1:
+            return Layout('item_per_row', True, tid_column, [(named or others)[0]])
+        return Layout('wide', True, tid_column, others)
+    if all(_ITEM_HEADER.match(cell) for cell in prefix[0] if cell):
+        return Layout('transaction_per_row', True)
+    if all(len(row) == 2 for row in prefix) and all(_ID_LIKE.match(row[0]) for row in prefix[1:]):
+        if _ID_LIKE.match(prefix[0][0]):
+            return Layout('item_per_row', False, 0, [1])
+        if len(prefix) > 1:
+            # A header over (id, item) rows, e.g. Member_number,itemDescription or customer_id,product
+            return Layout('item_per_row', True, 0, [1])
+    return Layout('transaction_per_row', False)
+
+
+class ChunkEncoder:
+    """Vectorized encoding of raw row chunks in one layout into a TransactionBuilder
+
+    A chunk is melted into long (row, column, value) arrays, which also copes with ragged rows.
+    Values are factorized first, so cleaning, comma splitting and interning run once per distinct
+    value of a chunk rather than once per cell, and transactions come out of a group-by on the
+    integer codes.
+    """
+
+    def __init__(self, builder: TransactionBuilder, layout: Layout):
+        self.builder = builder
+        self.layout = layout
+        # Item-per-row transactions can span chunks, so their (group, item) pairs are grouped at the end
+        self.tids: Dict[str, int] = {}
+        self.groups: List[np.ndarray] = []
+        self.ids: List[np.ndarray] = []
+        # Data rows encoded so far, the source key offset of the next row-layout chunk
+        self.rows_seen = 0
+
+    def _item_lookup(self, uniques: Iterable[Any]) -> Tuple[np.ndarray, Dict[int, List[int]]]:
+        """Item id per distinct value (-1 when blank), plus the ids listed by comma-separated values
+
+        The table has one extra trailing -1, so a missing value coded -1 looks up as blank.
+        """
+        uniques = list(uniques)
+        intern = self.builder.intern
+        lookup = np.full(len(uniques) + 1, -1, dtype=np.int32)
+        lists: Dict[int, List[int]] = {}
+        for code, value in enumerate(uniques):
+            item = clean_cell(value)
+            if item:
+                lookup[code] = idx = intern(item)
+                if ',' in item:
+                    lists[idx] = [intern(part) for part in (part.strip() for part in item.split(',')) if part]
+        return lookup, lists
+
+    def _group_lookup(self, uniques: Iterable[Any]) -> np.ndarray:
+        """Transaction group per distinct id value (-1 when blank), consistent across chunks"""
+        uniques = list(uniques)
+        tids = self.tids
+        lookup = np.full(len(uniques) + 1, -1, dtype=np.int32)
+        for code, value in enumerate(uniques):
+            tid = clean_cell(value)
+            if tid:
+                lookup[code] = tids.setdefault(tid, len(tids))
+        return lookup
+
+    def _item_codes(self, values: np.ndarray) -> Tuple[np.ndarray, Dict[int, List[int]]]:
+        codes, uniques = pd.factorize(values)
+        lookup, lists = self._item_lookup(uniques)
+        return lookup[codes], lists
+
+    def _group_codes(self, values: np.ndarray) -> np.ndarray:
+        codes, uniques = pd.factorize(values)
+        return self._group_lookup(uniques)[codes]
+
+    @staticmethod
+    def _expand(rows: np.ndarray, ids: np.ndarray, lists: Dict[int, List[int]],
+                split: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Replace the flagged list values by one (row, id) pair per listed item"""
+        if not split.any():
+            return rows, ids
+        positions = np.flatnonzero(split)
+        parts = [lists[idx] for idx in ids[positions].tolist()]
+        counts = np.array([len(part) for part in parts], dtype=np.int64)
+        rows = np.concatenate([rows[~split], np.repeat(rows[positions], counts)])
+        ids = np.concatenate([ids[~split], np.fromiter((idx for part in parts for idx in part), dtype=np.int32,
+                                                       count=int(counts.sum()))])
+        return rows, ids
+
+    def add(self, chunk: List[list]) -> None:
+        n_rows = len(chunk)
+        lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=n_rows)
+        values = np.fromiter(chain.from_iterable(chunk), dtype=object, count=int(lengths.sum()))
+        rows = np.repeat(np.arange(n_rows, dtype=np.int32), lengths)
+        cols = np.arange(len(values)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        layout = self.layout
+
+        if layout.kind == 'item_per_row':
+            tid_cells, item_cells = cols == layout.tid_column, cols == layout.item_columns[0]
+            tids = np.full(n_rows, None, dtype=object)
+            tids[rows[tid_cells]] = values[tid_cells]
+            items = np.full(n_rows, None, dtype=object)
+            items[rows[item_cells]] = values[item_cells]
+            self.add_item_rows(tids, items)
+            self.rows_seen += n_rows
+            return
+
+        if layout.kind == 'wide':
+            wanted = np.isin(cols, layout.item_columns)
+            rows, values = rows[wanted], values[wanted]
+        ids, lists = self._item_codes(values)
+        present = ids >= 0
+        rows, ids = rows[present], ids[present]
+        if layout.kind == 'transaction_per_row' and lists:
+            # A row with a single non-empty cell holds a comma-separated transaction
+            single = np.bincount(rows, minlength=n_rows)[rows] == 1
+            rows, ids = self._expand(rows, ids, lists, single & np.isin(ids, list(lists)))
+        self.builder.add_grouped(rows, ids, self.rows_seen)
+        self.rows_seen += n_rows
+
+    def add_item_rows(self, tids: np.ndarray, items: np.ndarray) -> None:
+        """Add the (transaction id, item) pairs of an item-per-row chunk given as two raw columns"""
+        ids, lists = self._item_codes(items)
+        self._add_pairs(self._group_codes(tids), ids, lists)
+
+    def add_dictionary_item_rows(self, tid_codes: np.ndarray, tid_values: Iterable[Any],
+                                 item_codes: np.ndarray, item_values: Iterable[Any]) -> None:
+        """add_item_rows for dictionary-encoded columns: codes index the values, -1 marks nulls"""
+        lookup, lists = self._item_lookup(item_values)
+        self._add_pairs(self._group_lookup(tid_values)[tid_codes], lookup[item_codes], lists)
+
+    def add_dictionary_lists(self, n_rows: int, rows: np.ndarray, item_codes: np.ndarray,
+                             item_values: Iterable[Any]) -> None:
+        """One transaction per row of an n_rows batch from a flattened, dictionary-encoded list column"""
+        ids = self._item_lookup(item_values)[0][item_codes]
+        keep = ids >= 0
+        self.builder.add_grouped(rows[keep], ids[keep], self.rows_seen)
+        self.rows_seen += n_rows
+
+    def _add_pairs(self, groups: np.ndarray, ids: np.ndarray, lists: Dict[int, List[int]]) -> None:
+        keep = (groups >= 0) & (ids >= 0)
+        groups, ids = groups[keep], ids[keep]
+        # A structured cell may hold a comma-separated list of items
+        if lists:
+            groups, ids = self._expand(groups, ids, lists, np.isin(ids, list(lists)))
+        self.groups.append(groups)
+        self.ids.append(ids)
+
+    def finish(self) -> None:
+        if self.groups:
+            # Group codes index the transaction ids in first-appearance order
+            self.builder.add_grouped(np.concatenate(self.groups), np.concatenate(self.ids))
+            self.builder.source_ids = list(self.tids)
+
+
+def encode_table(rows: Iterable[list], encoder: ChunkEncoder, chunk_rows: int = CHUNK_ROWS) -> None:
+    """Feed raw data rows (header already removed) to the encoder chunk by chunk"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            break
+        encoder.add(chunk)
+
+
+def sniff_rows(prefix: List[list], builder: TransactionBuilder) -> Tuple[Layout, List[list]]:
+    """Layout of the first raw rows, and those rows without the header (recorded on the builder)"""
+    cleaned = [[clean_cell(cell) for cell in row] for row in prefix]
+    filled = [i for i, row in enumerate(cleaned) if any(row)]
+    layout = sniff_layout([cleaned[i] for i in filled])
+    if layout.has_header:
+        builder.columns = cleaned[filled[0]]
+        prefix = prefix[filled[0] + 1:]
+    return layout, prefix
+
+
+def encode_rows(rows: Iterable[list], builder: TransactionBuilder) -> None:
+    """Sniff the layout from the first raw rows, then encode the whole stream in one pass"""
+    rows = iter(rows)
+    layout, prefix = sniff_rows(list(islice(rows, SNIFF_ROWS)), builder)
+    encoder = ChunkEncoder(builder, layout)
+    encode_table(chain(prefix, rows), encoder)
+    encoder.finish()
+
+
+def text_stream(stream: BinaryIO, encoding: str = 'utf-8-sig') -> io.TextIOBase:
+    """Incrementally decoded text view of a binary upload stream"""
+    return io.TextIOWrapper(stream, encoding=encoding, errors='replace', newline='')
+
+
+def csv_rows(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Tokenized CSV rows; empty lines come through as empty rows and encode to nothing"""
+    return csv.reader(lines)
+
+
+def read_csv_transactions(stream: BinaryIO, encoding: str = 'utf-8-sig') -> EncodedTransactions:
+    """Stream a CSV upload into encoded transactions"""
+    text = text_stream(stream, encoding)
+    rows = csv_rows(text)
+    prefix = list(islice(rows, SNIFF_ROWS))
+    builder = TransactionBuilder()
+    layout, data_rows = sniff_rows(prefix, builder)
+    encoder = ChunkEncoder(builder, layout)
+    encoder.add(data_rows)
+    if layout.kind == 'item_per_row' and len(prefix) == SNIFF_ROWS:
+        # The rest of a (transaction, item) table is rectangular: let pandas' C reader cut it into column chunks
+        tid_column, item_column = layout.tid_column, layout.item_columns[0]
+        try:
+            chunks = pd.read_csv(text, header=None, usecols=[tid_column, item_column], dtype=object,
+                                 na_filter=False, chunksize=CHUNK_ROWS)
+            for frame in chunks:
+                encoder.add_item_rows(frame[tid_column].to_numpy(), frame[item_column].to_numpy())
+        except pd.errors.EmptyDataError:
+            pass
+    else:
+        encode_table(rows, encoder)
+    encoder.finish()
+    return builder.build()
+
+
+def xlsx_rows(stream: BinaryIO) -> Iterator[List[str]]:
+    """Raw rows of the first sheet of an .xlsx workbook, streamed with openpyxl's read-only reader"""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            if any(cell is not None for cell in row):
+                yield row
+    finally:
+        workbook.close()
+
+
+def xls_rows(stream: BinaryIO) -> Iterator[List[str]]:
+    """Raw rows of the first sheet of a legacy .xls workbook, read row by row with xlrd"""
+    import xlrd
+
+    # BIFF workbooks need the whole file, but sheets load on demand and rows are never materialized together
+    workbook = xlrd.open_workbook(file_contents=stream.read(), on_demand=True)
+    try:
+        sheet = workbook.sheet_by_index(0)
+        for index in range(sheet.nrows):
+            yield sheet.row_values(index)
+    finally:
+        workbook.release_resources()
+
+
+def read_excel_transactions(stream: BinaryIO, filename: str = '') -> EncodedTransactions:
+    """Stream the first sheet of an Excel upload into encoded transactions in linear time"""
+    rows = xls_rows(stream) if filename.lower().endswith('.xls') else xlsx_rows(stream)
+    builder = TransactionBuilder()
+    try:
+        encode_rows(rows, builder)
+    except ValueError:
+        raise
+    except Exception as e:
+        # openpyxl/xlrd raise a variety of exceptions for damaged or mislabelled workbooks
+        raise ValueError(f"Invalid Excel file: {e}")
+    return builder.build()
+
+
+def _pyarrow():
+    """pyarrow, which only the columnar formats need"""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet and Arrow files require the optional pyarrow package")
+    return pyarrow
+
+
+def _dictionary_codes(pa, column) -> Tuple[np.ndarray, Any]:
+    """(int32 codes with -1 for nulls, distinct values) of an Arrow column, encoding it in C++ if needed"""
+    if not pa.types.is_dictionary(column.type):
+        column = pa.compute.dictionary_encode(column)
+    codes = pa.compute.fill_null(column.indices, -1).to_numpy(zero_copy_only=False).astype(np.int32)
+    return codes, column.dictionary.to_pylist()
+
+
+def arrow_batches(stream: BinaryIO, fmt: str):
+    """(schema, record batch iterator) of a Parquet or Arrow IPC upload; string columns stay dictionary-encoded"""
+    pa = _pyarrow()
+    if fmt == 'parquet':
+        schema = pa.parquet.read_schema(stream)
+        stream.seek(0)
+        strings = [field.name for field in schema
+                   if pa.types.is_string(field.type) or pa.types.is_large_string(field.type)]
+        parquet = pa.parquet.ParquetFile(stream, read_dictionary=strings)
+        return parquet.schema_arrow, parquet.iter_batches(batch_size=CHUNK_ROWS)
+    try:
+        reader = pa.ipc.open_file(stream)
+        return reader.schema, (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        # Not the random-access file format: read it as an IPC stream
+        stream.seek(0)
+        reader = pa.ipc.open_stream(stream)
+        return reader.schema, iter(reader)
+
+
+def read_arrow_transactions(stream: BinaryIO, fmt: str) -> EncodedTransactions:
+    """Encode a Parquet or Arrow IPC upload batch by batch
+
+    A (transaction id, item) table maps the item column's dictionary straight to item ids, so the
+    per-row work is a numpy gather; a list column is one transaction per row. Other tables fall
+    back to the generic row path.
+    """
+    pa = _pyarrow()
+    schema, batches = arrow_batches(stream, fmt)
+    builder = TransactionBuilder()
+    builder.columns = list(schema.names)
+    list_columns = [i for i, field in enumerate(schema)
+                    if pa.types.is_list(field.type) or pa.types.is_large_list(field.type)]
+    layout = sniff_layout([builder.columns])
+    encoder = ChunkEncoder(builder, layout)
+
+    for batch in batches:
+        if list_columns:
+            column = batch.column(list_columns[0])
+            rows = pa.compute.list_parent_indices(column).to_numpy().astype(np.int32)
+            codes, values = _dictionary_codes(pa, column.flatten())
+            encoder.add_dictionary_lists(batch.num_rows, rows, codes, values)
+        elif layout.kind == 'item_per_row':
+            tid_codes, tid_values = _dictionary_codes(pa, batch.column(layout.tid_column))
+            item_codes, item_values = _dictionary_codes(pa, batch.column(layout.item_columns[0]))
+            encoder.add_dictionary_item_rows(tid_codes, tid_values, item_codes, item_values)
+        else:
+            encoder.add([list(row) for row in zip(*(column.to_pylist() for column in batch.columns))])
+    encoder.finish()
+    return builder.build()
+
+
+def write_parquet_snapshot(encoded: EncodedTransactions, sink) -> None:
+    """Write the encoded dataset as a (transaction_id, item) Parquet table with a dictionary-encoded item column"""
+    pa = _pyarrow()
+    transaction_ids = np.repeat(np.arange(len(encoded), dtype=np.int64), encoded.lengths())
+    items = pa.DictionaryArray.from_arrays(pa.array(encoded.item_ids, type=pa.int32()),
+                                           pa.array(encoded.items, type=pa.string()))
+    table = pa.table({'transaction_id': pa.array(transaction_ids), 'item': items})
+    pa.parquet.write_table(table, sink)
+
+
+class JsonScanner:
+    """Incremental reader over a JSON text stream: structural characters one at a time, values whole
+
+    Only the unread tail of the current chunk is buffered, so a large top-level array is decoded
+    one element at a time with the C decoder instead of materializing the whole document.
+    """
+
+    def __init__(self, text: io.TextIOBase, chunk_chars: int = JSON_CHUNK_CHARS):
+        self.text = text
+        self.chunk_chars = chunk_chars
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.offset = 0
+        self.eof = False
+
+    def _fill(self, size: int) -> bool:
+        """Append up to size characters to the unread buffer; False at the end of the stream"""
+        chunk = self.text.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"Invalid JSON format: {message} (char {self.offset + self.pos})")
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at the end of the stream)"""
+        while True:
+            match = _NON_WHITESPACE.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buffer[self.pos]
+            self.pos = len(self.buffer)
+            if not self._fill(self.chunk_chars):
+                return ''
+
+    def expect(self, chars: str) -> str:
+        """Consume and return the next structural character, which must be one of chars"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise self._error(f"expecting {' or '.join(repr(c) for c in chars)}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete value, reading further chunks while it is cut off"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Read at least as much again as is buffered, so a huge value costs linear time
+                if self.eof or not self._fill(max(self.chunk_chars, len(self.buffer) - self.pos)):
+                    raise self._error(e.msg)
+                continue
+            if end == len(self.buffer) and not self.eof and self._fill(self.chunk_chars):
+                # A number or literal may continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+    def array_elements(self) -> Iterator[Any]:
+        """Elements of the array starting at the next character"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        scan_once, delimiter = self.decoder.scan_once, _ELEMENT_DELIMITER.match
+        while True:
+            # Fast path: decode straight out of the buffer while a whole element and its delimiter are in it
+            self.peek()
+            buffer, pos = self.buffer, self.pos
+            while True:
+                try:
+                    value, end = scan_once(buffer, pos)
+                except (StopIteration, json.JSONDecodeError):
+                    break
+                match = delimiter(buffer, end)
+                if match is None:
+                    break
+                yield value
+                pos = match.end()
+                if match.group(1) == ']':
+                    self.pos = pos
+                    return
+            # The element is cut off by the chunk boundary (or malformed): take the buffered path once
+            self.pos = pos
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+def json_elements(scanner: JsonScanner) -> Iterator[Any]:
+    """Transactions of a JSON document: its top-level array or the first `transactions`/`data` array"""
+    opening = scanner.peek()
+    if opening == '[':
+        yield from scanner.array_elements()
+    elif opening == '{':
+        scanner.expect('{')
+        found = False
+        if scanner.peek() == '}':
+            scanner.pos += 1
+        else:
+            while True:
+                if scanner.peek() != '"':
+                    raise scanner._error("expecting an object key")
+                key = scanner.value()
+                scanner.expect(':')
+                if not found and key in ('transactions', 'data') and scanner.peek() == '[':
+                    found = True
+                    yield from scanner.array_elements()
+                else:
+                    scanner.value()
+                if scanner.expect(',}') == '}':
+                    break
+        if not found:
+            raise ValueError("Invalid JSON format. Expected an array or an object with a 'transactions' array")
+    else:
+        raise ValueError("Invalid JSON format. Expected an array of transactions")
+    if scanner.peek():
+        raise scanner._error("extra data after the document")
+
+
+def ndjson_elements(lines: Iterable[str]) -> Iterator[Any]:
+    """One decoded transaction per non-blank NDJSON line"""
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid NDJSON on line {number}: {e.msg}")
+
+
+def encode_json(elements: Iterable[Any], builder: TransactionBuilder) -> None:
+    """Encode JSON transactions as they are decoded, choosing the shape from the first element"""
+    elements = iter(elements)
+    for first in elements:
+        break
+    else:
+        return
+    elements = chain([first], elements)
+
+    if isinstance(first, list):
+        for index, transaction in enumerate(elements):
+            if isinstance(transaction, list):
+                builder.add((clean_cell(item) for item in transaction), index)
+    elif isinstance(first, str):
+        for index, transaction in enumerate(elements):
+            builder.add((clean_cell(item) for item in str(transaction).split(',')), index)
+    elif isinstance(first, dict) and 'items' in first:
+        for index, row in enumerate(elements):
+            items = row.get('items') or []
+            builder.add((clean_cell(item) for item in (items.split(',') if isinstance(items, str) else items)), index)
+    elif isinstance(first, dict):
+        tid_key = next((key for key in first if 'transaction' in key.lower()), None)
+        item_key = next((key for key in first if key != tid_key and key.lower() in ITEM_COLUMNS), None)
+        if tid_key is None or item_key is None:
+            raise ValueError("Invalid JSON format. Expected array of arrays or array of objects with items field")
+        builder.columns = [tid_key, item_key]
+        encoder = ChunkEncoder(builder, Layout('item_per_row', False, 0, [1]))
+        while True:
+            chunk = list(islice(elements, CHUNK_ROWS))
+            if not chunk:
+                break
+            encoder.add_item_rows(np.fromiter((row.get(tid_key) for row in chunk), dtype=object, count=len(chunk)),
+                                  np.fromiter((row.get(item_key) for row in chunk), dtype=object, count=len(chunk)))
+        encoder.finish()
+    else:
+        raise ValueError("Invalid JSON format. Expected array of arrays or array of objects with items field")
+
+
+def read_json_transactions(stream: BinaryIO) -> EncodedTransactions:
+    """Decode a JSON upload element by element and encode it as it is read"""
+    builder = TransactionBuilder()
+    encode_json(json_elements(JsonScanner(text_stream(stream))), builder)
+    return builder.build()
+
+
+def read_ndjson_transactions(stream: BinaryIO) -> EncodedTransactions:
+    """Encode a newline-delimited JSON upload, one transaction per line"""
+    builder = TransactionBuilder()
+    encode_json(ndjson_elements(text_stream(stream)), builder)
+    return builder.build()
+
+
+def split_compression(filename: str) -> Tuple[str, Optional[str]]:
+    """(file name without its compression suffix, 'gzip'/'zstd' or None)"""
+    name = filename or ''
+    for extension, compression in COMPRESSIONS.items():
+        if name.lower().endswith(extension):
+            return name[:-len(extension)], compression
+    return name, None
+
+
+def upload_format(filename: str) -> str:
+    """Ingest format ('csv', 'json', 'ndjson', 'excel', 'parquet' or 'arrow') for an upload's file name"""
+    name = (filename or '').lower()
+    for extension, fmt in UPLOAD_FORMATS.items():
+        if name.endswith(extension):
+            return fmt
+    raise ValueError("Unsupported file format. Please upload CSV, JSON, NDJSON, Excel (.xlsx/.xls), Parquet or Arrow files")
+
+
+def decompressed_stream(stream: BinaryIO, compression: str) -> BinaryIO:
+    """Incrementally inflating view of a gzip or zstd stream"""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("Zstandard uploads require the optional zstandard package")
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(stream))
+
+
+def spooled_copy(stream: BinaryIO) -> BinaryIO:
+    """Seekable copy of a forward-only stream, in memory up to SPOOL_BYTES and on disk beyond"""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    shutil.copyfileobj(stream, spool)
+    spool.seek(0)
+    return spool
+
+
+def inflate_request_body(environ: Dict[str, Any]) -> bool:
+    """Decode a `Content-Encoding: gzip` (or zstd) request body in place, before the form is parsed
+
+    Returns whether the body was replaced. Reading more than MAX_INFLATED_BYTES
+    from the new body raises werkzeug's RequestEntityTooLarge.
+    """
+    encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+    if not encoding or encoding == 'identity':
+        return False
+    compression = CONTENT_ENCODINGS.get(encoding)
+    if compression is None:
+        raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+    from werkzeug.wsgi import LimitedStream
+    body = environ['wsgi.input']
+    length = environ.get('CONTENT_LENGTH')
+    if length and not environ.get('wsgi.input_terminated'):
+        # Never read past the compressed body on a keep-alive connection
+        body = LimitedStream(body, int(length))
+    # Cap the inflated size, so a small compressed body cannot expand without bound
+    environ['wsgi.input'] = LimitedStream(decompressed_stream(body, compression), MAX_INFLATED_BYTES, is_max=True)
+    # The inflated length is unknown: the form parser reads the stream to its end instead
+    environ.pop('CONTENT_LENGTH', None)
+    environ.pop('HTTP_CONTENT_ENCODING', None)
+    environ['wsgi.input_terminated'] = True
+    return True
+
+
+def read_transactions(file) -> EncodedTransactions:
+    """Encode an uploaded file (werkzeug FileStorage); raises ValueError for unsupported or malformed files"""
+    name, compression = split_compression(file.filename)
+    # A bare `data.zst` / `data.gz` is a compressed CSV
+    fmt = upload_format(name) if not compression or '.' in name else 'csv'
+    if not compression:
+        return read_stream(file.stream, fmt, name)
+    try:
+        stream = decompressed_stream(file.stream, compression)
+        if fmt in RANDOM_ACCESS_FORMATS:
+            stream = spooled_copy(stream)
+        return read_stream(stream, fmt, name)
+    except ValueError:
+        raise
+    except Exception as e:
+        # Truncated or corrupt archives surface as OSError/EOFError/zlib.error from deep inside a parser
+        raise ValueError(f"Invalid {compression} upload: {e}")
+
+
+def read_stream(stream: BinaryIO, fmt: str, filename: str = '') -> EncodedTransactions:
+    """Encode a binary stream in the given ingest format"""
+    if fmt == 'json':
+        return read_json_transactions(stream)
+    if fmt == 'ndjson':
+        return read_ndjson_transactions(stream)
+    if fmt == 'excel':
+        return read_excel_transactions(stream, filename)
+    if fmt in ('parquet', 'arrow'):
+        try:
+            return read_arrow_transactions(stream, fmt)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Invalid {fmt.capitalize()} file: {e}")
+    return read_csv_transactions(stream)
@@ -0,0 +1,206 @@
+"""
+Level-wise (Apriori) frequent itemset mining for the lightweight backends.
+Transactions are encoded once to sorted tuples of integer item ids, candidates
+are generated with the classic join step plus subset pruning, and supports are
+counted by walking every transaction through a prefix trie of the candidates.
+Identical transactions are counted once with a weight, and transactions that
+become identical once infrequent items are pruned are merged again per pass.
+"""
+
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from transaction_store import TransactionStore
+
+Itemset = Tuple[int, ...]
+
+
+def encode_transactions(transactions: Iterable[Iterable[str]]) -> Tuple[List[str], List[Itemset]]:
+    """Map item strings to integer ids and every transaction to a sorted id tuple"""
+    if isinstance(transactions, TransactionStore):
+        # Already interned, with ids in this function's first-occurrence order
+        return list(transactions.items), transactions.encoded()
+
+    item_ids: Dict[str, int] = {}
+    items: List[str] = []
+    encoded: List[Itemset] = []
+
+    for transaction in transactions:
+        ids = set()
+        for item in transaction:
+            idx = item_ids.get(item)
+            if idx is None:
+                idx = len(items)
+                item_ids[item] = idx
+                items.append(item)
+            ids.add(idx)
+        encoded.append(tuple(sorted(ids)))
+
+    return items, encoded
+
+
+def encode_weighted(transactions: Iterable[Iterable[str]]) -> Tuple[List[str], List[Itemset], List[int]]:
+    """Item names, the distinct encoded transactions and how many transactions each one stands for"""
+    if isinstance(transactions, TransactionStore):
+        baskets, weights = transactions.distinct()
+        return list(baskets.items), baskets.encoded(), weights.tolist()
+    items, encoded = encode_transactions(transactions)
+    merged: Dict[Itemset, int] = {}
+    for transaction in encoded:
+        merged[transaction] = merged.get(transaction, 0) + 1
+    return items, list(merged), list(merged.values())
+
+
+def min_support_count(min_support: float, n_transactions: int) -> int:
+    """Smallest absolute count whose relative support reaches min_support"""
+    count = max(1, math.ceil(min_support * n_transactions))
+    # Guard against float noise such as 0.1 * 30 == 3.0000000000000004
+    while count > 1 and (count - 1) / n_transactions >= min_support:
+        count -= 1
+    return count
+
+
+class CandidateTrie:
+    """Prefix trie over equal-length candidate itemsets used for support counting"""
+
+    def __init__(self, candidates: List[Itemset]):
+        self.candidates = candidates
+        self.counts = [0] * len(candidates)
+        self.depth = len(candidates[0]) if candidates else 0
+        self.root: Dict[int, Any] = {}
+        for idx, candidate in enumerate(candidates):
+            node = self.root
+            for item in candidate[:-1]:
+                node = node.setdefault(item, {})
+            # Leaves map the last item straight to the candidate's counter slot
+            node[candidate[-1]] = idx
+
+    def count_transaction(self, transaction: Itemset, weight: int = 1) -> None:
+        """Add weight to every candidate contained in the (sorted) transaction"""
+        if len(transaction) >= self.depth:
+            self._visit(self.root, transaction, 0, 1, weight)
+
+    def _visit(self, node: Dict[int, Any], transaction: Itemset, start: int, level: int, weight: int) -> None:
+        if level == self.depth:
+            counts = self.counts
+            for item in transaction[start:]:
+                idx = node.get(item)
+                if idx is not None:
+                    counts[idx] += weight
+            return
+
+        # Leave room for the remaining (depth - level) items of the candidate
+        stop = len(transaction) - (self.depth - level)
+        for pos in range(start, stop):
+            child = node.get(transaction[pos])
+            if child is not None:
+                self._visit(child, transaction, pos + 1, level + 1, weight)
+
+
+def generate_candidates(frequent: List[Itemset]) -> List[Itemset]:
+    """Join frequent k-itemsets sharing a (k-1)-prefix and prune by the Apriori property"""
+    frequent = sorted(frequent)
+    frequent_set = set(frequent)
+    candidates: List[Itemset] = []
+
+    start = 0
+    while start < len(frequent):
+        prefix = frequent[start][:-1]
+        end = start + 1
+        while end < len(frequent) and frequent[end][:-1] == prefix:
+            end += 1
+
+        block = frequent[start:end]
+        for i in range(len(block)):
+            for j in range(i + 1, len(block)):
+                candidate = block[i] + (block[j][-1],)
+                # The two joined parents are frequent; check the other k-1 subsets
+                if all(candidate[:pos] + candidate[pos + 1:] in frequent_set
+                       for pos in range(len(candidate) - 2)):
+                    candidates.append(candidate)
+        start = end
+
+    return candidates
+
+
+def _pruned(transactions: Iterable[Tuple[Itemset, int]], keep: set, min_length: int) -> Dict[Itemset, int]:
+    """Weighted transactions restricted to the kept items, merging those that become identical"""
+    merged: Dict[Itemset, int] = {}
+    for transaction, weight in transactions:
+        pruned = tuple(i for i in transaction if i in keep)
+        if len(pruned) >= min_length:
+            merged[pruned] = merged.get(pruned, 0) + weight
+    return merged
+
+
+def apriori_counts(encoded: List[Itemset], min_count: int, max_length: Optional[int] = None,
+                   weights: Optional[List[int]] = None) -> Dict[Itemset, int]:
+    """Return {itemset: support count} for every frequent itemset of the encoded transactions
+
+    weights[i], when given, is the number of transactions encoded[i] stands for.
+    """
+    item_counts = Counter()
+    if weights is None:
+        for transaction in encoded:
+            item_counts.update(transaction)
+    else:
+        for transaction, weight in zip(encoded, weights):
+            for item in transaction:
+                item_counts[item] += weight
+
+    result: Dict[Itemset, int] = {
+        (item,): count for item, count in item_counts.items() if count >= min_count
+    }
+    if max_length == 1 or not result:
+        return result
+
+    # Drop infrequent items once so later passes walk shorter (and fewer distinct) transactions
+    keep = {itemset[0] for itemset in result}
+    transactions = _pruned(zip(encoded, weights if weights is not None else [1] * len(encoded)), keep, 2)
+
+    frequent = sorted(result)
+    k = 2
+    while frequent and transactions and (max_length is None or k <= max_length):
+        candidates = generate_candidates(frequent)
+        if not candidates:
+            break
+
+        trie = CandidateTrie(candidates)
+        for transaction, weight in transactions.items():
+            trie.count_transaction(transaction, weight)
+
+        frequent = [c for c, count in zip(candidates, trie.counts) if count >= min_count]
+        for candidate, count in zip(candidates, trie.counts):
+            if count >= min_count:
+                result[candidate] = count
+
+        # Only items that occur in a frequent k-itemset can be part of a (k+1)-candidate
+        keep = {item for itemset in frequent for item in itemset}
+        k += 1
+        transactions = _pruned(transactions.items(), keep, k)
+
+    return result
+
+
+def itemset_records(items: List[str], counts: Dict[Itemset, int], n_transactions: int) -> List[Dict[str, Any]]:
+    """Itemset counts in the backends' JSON-ready format, ordered by length and then item ids"""
+    return [
+        {
+            'itemset': [items[i] for i in itemset],
+            'support': count / n_transactions,
+            'length': len(itemset)
+        }
+        for itemset, count in sorted(counts.items(), key=lambda entry: (len(entry[0]), entry[0]))
+    ]
+
+
+def find_frequent_itemsets(transactions: List[List[str]], min_support: float, max_length: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Mine frequent itemsets of any length in the backends' JSON-ready format"""
+    if not transactions:
+        return []
+
+    items, encoded, weights = encode_weighted(transactions)
+    n_transactions = sum(weights)
+    counts = apriori_counts(encoded, min_support_count(min_support, n_transactions), max_length, weights)
+    return itemset_records(items, counts, n_transactions)
@@ -0,0 +1,189 @@
+"""
+Prefix trie over mined itemsets for subset, superset and per-item queries.
+Items get integer ids in descending support order (as in an FP-tree), each
+itemset is stored along the path of its sorted ids, and a header table links
+all nodes of the same item. Every node also keeps the largest support found in
+its subtree; since supports can only shrink along a path, that bound lets the
+per-item top-n query run best-first and stop after n results. Exact lookup
+walks one path, subsets follow only children inside the query, and supersets
+expand the subtrees below the query's last item.
+"""
+
+import heapq
+from itertools import count
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from itemset_mining import Itemset
+
+
+class _Node:
+    __slots__ = ('item', 'parent', 'children', 'support', 'bound', 'depth')
+
+    def __init__(self, item: int, parent: Optional['_Node'], depth: int):
+        self.item = item
+        self.parent = parent
+        self.children: Dict[int, '_Node'] = {}
+        self.support: Optional[float] = None
+        self.bound = 0.0
+        self.depth = depth
+
+
+class ItemsetTrie:
+    """Mined itemsets indexed by item-id prefix, with a header table per item"""
+
+    def __init__(self, itemsets: Iterable[Iterable[str]], supports: Iterable[float]):
+        entries = [(list(dict.fromkeys(itemset)), float(support)) for itemset, support in zip(itemsets, supports)]
+        singles = {itemset[0]: support for itemset, support in entries if len(itemset) == 1}
+        names = {item for itemset, _ in entries for item in itemset}
+        # Frequent items first keeps shared prefixes short, like an FP-tree
+        self.items: List[str] = sorted(names, key=lambda item: (-singles.get(item, 0.0), item))
+        self.item_ids: Dict[str, int] = {item: idx for idx, item in enumerate(self.items)}
+        self.root = _Node(-1, None, 0)
+        self.header: List[List[_Node]] = [[] for _ in self.items]
+        self.size = 0
+        for itemset, support in entries:
+            self._insert(tuple(sorted(self.item_ids[item] for item in itemset)), support)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'ItemsetTrie':
+        """Build from the backends' JSON-ready itemset records"""
+        return cls((record['itemset'] for record in records), (record['support'] for record in records))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _insert(self, key: Itemset, support: float) -> None:
+        node = self.root
+        node.bound = max(node.bound, support)
+        for item in key:
+            child = node.children.get(item)
+            if child is None:
+                child = node.children[item] = _Node(item, node, node.depth + 1)
+                self.header[item].append(child)
+            child.bound = max(child.bound, support)
+            node = child
+        if node.support is None:
+            self.size += 1
+        node.support = support
+
+    def _key(self, itemset: Iterable[str]) -> Optional[Itemset]:
+        """Sorted ids of an itemset, or None if it mentions an item the trie has never seen"""
+        ids = set()
+        for item in itemset:
+            idx = self.item_ids.get(item)
+            if idx is None:
+                return None
+            ids.add(idx)
+        return tuple(sorted(ids))
+
+    def _find(self, key: Itemset) -> Optional[_Node]:
+        node = self.root
+        for item in key:
+            node = node.children.get(item)
+            if node is None:
+                return None
+        return node
+
+    def _path(self, node: _Node) -> Itemset:
+        ids = []
+        while node.parent is not None:
+            ids.append(node.item)
+            node = node.parent
+        return tuple(reversed(ids))
+
+    def _record(self, node: _Node) -> Dict[str, Any]:
+        itemset = [self.items[i] for i in self._path(node)]
+        return {'itemset': itemset, 'support': node.support, 'length': len(itemset)}
+
+    def _stored(self, nodes: Iterable[_Node]) -> Iterator[_Node]:
+        return (node for node in nodes if node.support is not None)
+
+    def _subtree(self, node: _Node) -> Iterator[_Node]:
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+    def support(self, itemset: Iterable[str]) -> Optional[float]:
+        """Support of exactly this itemset, or None if it was not mined"""
+        key = self._key(itemset)
+        node = self._find(key) if key is not None else None
+        return node.support if node is not None else None
+
+    def supersets(self, itemset: Iterable[str], proper: bool = False) -> List[Dict[str, Any]]:
+        """Mined itemsets containing every item of `itemset`"""
+        key = self._key(itemset)
+        if key is None:
+            return []
+        if not key:
+            nodes = self._subtree(self.root)
+        else:
+            # Every superset's path passes through a node of the query's last item
+            required = set(key[:-1])
+            anchors = [node for node in self.header[key[-1]] if required <= set(self._path(node))]
+            nodes = (node for anchor in anchors for node in self._subtree(anchor))
+        return [self._record(node) for node in self._stored(nodes) if not (proper and node.depth == len(key))]
+
+    def subsets(self, itemset: Iterable[str], proper: bool = False) -> List[Dict[str, Any]]:
+        """Mined itemsets made only of items of `itemset`"""
+        key = self._key(itemset)
+        if key is None:
+            # Unknown items are in no mined itemset, so every subset found is a proper one
+            key = tuple(sorted(self.item_ids[item] for item in set(itemset) if item in self.item_ids))
+            proper = False
+        found = []
+        stack = [(self.root, 0)]
+        while stack:
+            node, start = stack.pop()
+            if node.support is not None and not (proper and node.depth == len(key)):
+                found.append(node)
+            for pos in range(start, len(key)):
+                child = node.children.get(key[pos])
+                if child is not None:
+                    stack.append((child, pos + 1))
+        return [self._record(node) for node in found]
+
+    def top_containing(self, item: str, n: int, min_length: int = 1) -> List[Dict[str, Any]]:
+        """The n highest-support mined itemsets that contain `item`, best first"""
+        idx = self.item_ids.get(item)
+        if idx is None or n <= 0:
+            return []
+        # Entries are whole subtrees ranked by their bound, or single itemsets ranked by their support;
+        # an itemset popped before every remaining bound is guaranteed to be the next best
+        tiebreak = count()
+        heap = [(-node.bound, next(tiebreak), False, node) for node in self.header[idx]]
+        heapq.heapify(heap)
+        found: List[_Node] = []
+        while heap and len(found) < n:
+            _, _, is_itemset, node = heapq.heappop(heap)
+            if is_itemset:
+                found.append(node)
+                continue
+            if node.support is not None and node.depth >= min_length:
+                heapq.heappush(heap, (-node.support, next(tiebreak), True, node))
+            for child in node.children.values():
+                heapq.heappush(heap, (-child.bound, next(tiebreak), False, child))
+        return [self._record(node) for node in found]
+
+    def is_closed(self, itemset: Iterable[str]) -> bool:
+        """False if the itemset was not mined or some mined superset has the same support"""
+        support = self.support(itemset)
+        if support is None:
+            return False
+        return all(superset['support'] < support for superset in self.supersets(itemset, proper=True))
+
+    def closed(self) -> List[Dict[str, Any]]:
+        """Mined itemsets without an equal-support superset, i.e. with the redundant ones pruned"""
+        redundant = set()
+        for node in self._stored(self._subtree(self.root)):
+            path = self._path(node)
+            if len(path) < 2:
+                continue
+            for pos in range(len(path)):
+                sub_node = self._find(path[:pos] + path[pos + 1:])
+                # A subset's support is never below the superset's, so "not above" means equal
+                if sub_node is not None and sub_node.support is not None and sub_node.support <= node.support:
+                    redundant.add(id(sub_node))
+        return [self._record(node) for node in self._stored(self._subtree(self.root))
+                if node.parent is not None and id(node) not in redundant]
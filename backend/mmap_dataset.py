@@ -0,0 +1,193 @@
+"""
+Out-of-core transaction datasets stored as memory-mapped CSR arrays.
+A dataset is a directory holding `offsets.bin` (int64, n_transactions + 1
+entries), `item_ids.bin` (int32 item ids, each transaction's ids sorted) and
+`meta.json` with the item dictionary and array lengths. Writing streams
+transactions straight to disk and reading maps the arrays lazily, so multi-pass
+engines (Apriori counting, SON) can walk datasets far larger than RAM in
+fixed-size chunks.
+
+    python mmap_dataset.py baskets.csv datasets/pos_2024
+"""
+
+import json
+import os
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+from itemset_mining import CandidateTrie, Itemset, generate_candidates, min_support_count
+
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 100_000
+# Transactions buffered in memory by the writer before each flush to disk
+WRITE_BUFFER_SIZE = 50_000
+
+
+def write_dataset(path: str, transactions: Iterable[Iterable[str]]) -> Dict[str, Any]:
+    """Stream transactions into a memory-mappable dataset directory and return its metadata"""
+    os.makedirs(path, exist_ok=True)
+    item_ids: Dict[str, int] = {}
+    items: List[str] = []
+    n_transactions = 0
+    nnz = 0
+
+    with open(os.path.join(path, 'offsets.bin'), 'wb') as offsets_file, \
+            open(os.path.join(path, 'item_ids.bin'), 'wb') as ids_file:
+        offsets = array('q', [0])
+        ids = array('i')
+        for transaction in transactions:
+            encoded = set()
+            for item in transaction:
+                idx = item_ids.get(item)
+                if idx is None:
+                    idx = item_ids[item] = len(items)
+                    items.append(item)
+                encoded.add(idx)
+            if not encoded:
+                continue
+            ids.extend(sorted(encoded))
+            nnz += len(encoded)
+            offsets.append(nnz)
+            n_transactions += 1
+            if len(offsets) >= WRITE_BUFFER_SIZE:
+                offsets.tofile(offsets_file)
+                ids.tofile(ids_file)
+                offsets, ids = array('q'), array('i')
+        offsets.tofile(offsets_file)
+        ids.tofile(ids_file)
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'n_transactions': n_transactions,
+        'n_items': len(items),
+        'nnz': nnz,
+        'items': items
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as meta_file:
+        json.dump(meta, meta_file)
+    return meta
+
+
+def read_basket_lines(lines: Iterable[str], delimiter: str = ',') -> Iterator[List[str]]:
+    """Transactions from text lines with one comma-separated basket per line"""
+    for line in lines:
+        items = [item.strip() for item in line.rstrip('\r\n').split(delimiter)]
+        items = [item for item in items if item]
+        if items:
+            yield items
+
+
+class MappedTransactions:
+    """Read-only view of a dataset directory with lazily memory-mapped CSR arrays"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as meta_file:
+            meta = json.load(meta_file)
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset format in {path}")
+
+        self.items: List[str] = meta['items']
+        self.n_transactions: int = meta['n_transactions']
+        self.nnz: int = meta['nnz']
+        self.offsets = np.memmap(os.path.join(path, 'offsets.bin'), dtype=np.int64, mode='r',
+                                 shape=(self.n_transactions + 1,))
+        # np.memmap cannot map an empty file
+        self.item_ids = (np.memmap(os.path.join(path, 'item_ids.bin'), dtype=np.int32, mode='r', shape=(self.nnz,))
+                         if self.nnz else np.zeros(0, dtype=np.int32))
+
+    def __len__(self) -> int:
+        return self.n_transactions
+
+    def chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE, start: int = 0,
+               stop: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield (offsets relative to the chunk, item ids) for consecutive runs of transactions"""
+        stop = self.n_transactions if stop is None else stop
+        for chunk_start in range(start, stop, chunk_size):
+            chunk_stop = min(chunk_start + chunk_size, stop)
+            offsets = np.asarray(self.offsets[chunk_start:chunk_stop + 1])
+            ids = np.asarray(self.item_ids[offsets[0]:offsets[-1]])
+            yield offsets - offsets[0], ids
+
+    def encoded(self, start: int = 0, stop: Optional[int] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Itemset]:
+        """Stream transactions as sorted item-id tuples"""
+        for offsets, ids in self.chunks(chunk_size, start, stop):
+            flat, bounds = ids.tolist(), offsets.tolist()
+            for i in range(len(bounds) - 1):
+                yield tuple(flat[bounds[i]:bounds[i + 1]])
+
+    def item_counts(self, chunk_size: int = DEFAULT_CHUNK_SIZE, start: int = 0,
+                    stop: Optional[int] = None) -> np.ndarray:
+        """Support count of every item id, computed chunk by chunk"""
+        counts = np.zeros(len(self.items), dtype=np.int64)
+        for _, ids in self.chunks(chunk_size, start, stop):
+            counts += np.bincount(ids, minlength=len(self.items))
+        return counts
+
+    def transactions(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[str]]:
+        """Stream transactions as item-name lists"""
+        for transaction in self.encoded(chunk_size=chunk_size):
+            yield [self.items[i] for i in transaction]
+
+
+def mapped_apriori_counts(dataset: MappedTransactions, min_count: int, max_length: Optional[int] = None,
+                          start: int = 0, stop: Optional[int] = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[Itemset, int]:
+    """Level-wise Apriori with one streaming pass over the mapped rows per level"""
+    counts = dataset.item_counts(chunk_size, start, stop)
+    result: Dict[Itemset, int] = {(int(item),): int(counts[item]) for item in np.flatnonzero(counts >= min_count)}
+
+    frequent = sorted(result)
+    k = 2
+    while frequent and (max_length is None or k <= max_length):
+        candidates = generate_candidates(frequent)
+        if not candidates:
+            break
+        keep = {item for candidate in candidates for item in candidate}
+        trie = CandidateTrie(candidates)
+        for transaction in dataset.encoded(start, stop, chunk_size):
+            if len(transaction) >= k:
+                trie.count_transaction(tuple(item for item in transaction if item in keep))
+
+        frequent = [c for c, count in zip(candidates, trie.counts) if count >= min_count]
+        for candidate, count in zip(candidates, trie.counts):
+            if count >= min_count:
+                result[candidate] = count
+        k += 1
+
+    return result
+
+
+def mapped_frequent_itemsets(dataset: MappedTransactions, min_support: float,
+                             max_length: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Frequent itemsets of a mapped dataset in the backends' JSON-ready format"""
+    if not dataset.n_transactions:
+        return []
+    counts = mapped_apriori_counts(dataset, min_support_count(min_support, dataset.n_transactions), max_length)
+
+    return [
+        {
+            'itemset': [dataset.items[i] for i in itemset],
+            'support': count / dataset.n_transactions,
+            'length': len(itemset)
+        }
+        for itemset, count in sorted(counts.items(), key=lambda entry: (len(entry[0]), entry[0]))
+    ]
+
+
+def convert_basket_file(source: TextIO, path: str) -> Dict[str, Any]:
+    """Convert a one-basket-per-line text file into a mapped dataset"""
+    return write_dataset(path, read_basket_lines(source))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python mmap_dataset.py <baskets.csv> <dataset_dir>")
+        sys.exit(1)
+    with open(sys.argv[1], encoding='utf-8') as source:
+        meta = convert_basket_file(source, sys.argv[2])
+    print(f"Wrote {meta['n_transactions']} transactions over {meta['n_items']} items to {sys.argv[2]}")
@@ -0,0 +1,156 @@
+"""
+Pairwise co-occurrence engine.
+All item and item-pair supports are obtained from a single sparse X^T X product
+over the binary transaction matrix, which is all that is needed for 2-itemsets,
+1 -> 1 association rules and the dashboard's co-occurrence heatmap. Identical
+transactions enter the product once, as a row weighted by their count.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from itemset_mining import Itemset, encode_transactions, encode_weighted, min_support_count
+from transaction_store import TransactionStore
+
+
+def transaction_matrix(encoded: List[Itemset], n_items: int) -> sparse.csr_matrix:
+    """Build the binary (transactions x items) CSR matrix of encoded transactions"""
+    lengths = np.fromiter((len(t) for t in encoded), dtype=np.int64, count=len(encoded))
+    indptr = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.fromiter((item for t in encoded for item in t), dtype=np.int32, count=int(indptr[-1]))
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(encoded), n_items))
+
+
+def encode_matrix(transactions: List[List[str]]) -> Tuple[List[str], sparse.csr_matrix]:
+    """Item names and binary transaction matrix; a TransactionStore's CSR arrays are used as they are"""
+    if isinstance(transactions, TransactionStore):
+        return list(transactions.items), transactions.matrix()
+    items, encoded = encode_transactions(transactions)
+    return items, transaction_matrix(encoded, len(items))
+
+
+def encode_weighted_matrix(transactions: List[List[str]]) -> Tuple[List[str], sparse.csr_matrix, np.ndarray]:
+    """Item names, binary matrix of the distinct transactions and the count of each"""
+    if isinstance(transactions, TransactionStore):
+        baskets, weights = transactions.distinct()
+        return list(baskets.items), baskets.matrix(), weights.astype(np.int64)
+    items, encoded, weights = encode_weighted(transactions)
+    return items, transaction_matrix(encoded, len(items)), np.asarray(weights, dtype=np.int64)
+
+
+class PairCooccurrence:
+    """Item and item-pair support counts of a transaction set"""
+
+    def __init__(self, transactions: List[List[str]]):
+        self.items, matrix, weights = encode_weighted_matrix(transactions)
+        self.n_transactions = int(weights.sum())
+
+        cooccurrence = (matrix.T @ sparse.diags(weights) @ matrix).tocsr()
+
+        # The diagonal holds single-item counts, the strict upper triangle the pair counts
+        self.item_counts = cooccurrence.diagonal().astype(np.int64)
+        upper = sparse.triu(cooccurrence, k=1).tocoo()
+        self.rows = upper.row.astype(np.int32)
+        self.cols = upper.col.astype(np.int32)
+        self.pair_counts = upper.data.astype(np.int64)
+
+    def _frequent(self, min_support: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Masks of frequent items and frequent pairs for a relative threshold"""
+        min_count = min_support_count(min_support, self.n_transactions) if self.n_transactions else 1
+        return self.item_counts >= min_count, self.pair_counts >= min_count
+
+    def support_table(self, min_support: float) -> Tuple[List[Tuple[str, ...]], np.ndarray]:
+        """Frequent 1- and 2-itemsets as item-name tuples with their relative supports"""
+        item_mask, pair_mask = self._frequent(min_support)
+        singles = np.flatnonzero(item_mask)
+        rows, cols = self.rows[pair_mask], self.cols[pair_mask]
+
+        itemsets = [(self.items[i],) for i in singles]
+        itemsets.extend((self.items[a], self.items[b]) for a, b in zip(rows, cols))
+        counts = np.concatenate([self.item_counts[singles], self.pair_counts[pair_mask]])
+        return itemsets, counts / max(self.n_transactions, 1)
+
+    def itemsets(self, min_support: float) -> List[Dict[str, Any]]:
+        """Frequent 1- and 2-itemsets in the backends' JSON-ready format"""
+        itemsets, supports = self.support_table(min_support)
+        return [
+            {'itemset': list(itemset), 'support': float(support), 'length': len(itemset)}
+            for itemset, support in zip(itemsets, supports)
+        ]
+
+    def rules(self, min_support: float, min_confidence: float) -> List[Dict[str, Any]]:
+        """All 1 -> 1 rules over frequent pairs, with metrics computed column-wise"""
+        _, pair_mask = self._frequent(min_support)
+        n = max(self.n_transactions, 1)
+        rows, cols = self.rows[pair_mask], self.cols[pair_mask]
+
+        # Every pair {a, b} yields both a -> b and b -> a
+        antecedents = np.concatenate([rows, cols])
+        consequents = np.concatenate([cols, rows])
+        support = np.tile(self.pair_counts[pair_mask], 2) / n
+        support_a = self.item_counts[antecedents] / n
+        support_c = self.item_counts[consequents] / n
+
+        confidence = support / support_a
+        keep = confidence >= min_confidence
+        antecedents, consequents = antecedents[keep], consequents[keep]
+        support, support_a, support_c, confidence = support[keep], support_a[keep], support_c[keep], confidence[keep]
+
+        lift = confidence / support_c
+        leverage = support - support_a * support_c
+        with np.errstate(divide='ignore', invalid='ignore'):
+            conviction = np.where(confidence < 1, (1 - support_c) / (1 - confidence), np.inf)
+            zhang = leverage / np.maximum(support * (1 - support_a), support_a * (support_c - support))
+        zhang = np.nan_to_num(zhang)
+
+        return [
+            {
+                'antecedents': [self.items[a]],
+                'consequents': [self.items[c]],
+                'support': float(s),
+                'confidence': float(conf),
+                'lift': float(l),
+                'leverage': float(lev),
+                'conviction': float(conv) if np.isfinite(conv) else None,
+                'zhangs_metric': float(z)
+            }
+            for a, c, s, conf, l, lev, conv, z in zip(
+                antecedents, consequents, support, confidence, lift, leverage, conviction, zhang)
+        ]
+
+    def matrix(self, min_support: float, max_items: Optional[int] = None) -> Dict[str, Any]:
+        """Thresholded co-occurrence matrix for heatmaps, as sparse (x, y) cells"""
+        item_mask, pair_mask = self._frequent(min_support)
+        item_ids = np.flatnonzero(item_mask)
+        item_ids = item_ids[np.argsort(-self.item_counts[item_ids], kind='stable')]
+        if max_items:
+            item_ids = item_ids[:max_items]
+
+        position = np.full(len(self.items), -1, dtype=np.int64)
+        position[item_ids] = np.arange(len(item_ids))
+        rows, cols, counts = self.rows[pair_mask], self.cols[pair_mask], self.pair_counts[pair_mask]
+        visible = (position[rows] >= 0) & (position[cols] >= 0)
+        rows, cols, counts = rows[visible], cols[visible], counts[visible]
+
+        n = max(self.n_transactions, 1)
+        lift = (counts * n) / (self.item_counts[rows] * self.item_counts[cols])
+
+        cells = []
+        for a, b, count, pair_lift in zip(rows, cols, counts, lift):
+            x, y = int(position[a]), int(position[b])
+            cell = {'count': int(count), 'support': float(count / n), 'lift': float(pair_lift)}
+            # Co-occurrence is symmetric; emit both halves so the grid can be drawn directly
+            cells.append({'x': x, 'y': y, **cell})
+            cells.append({'x': y, 'y': x, **cell})
+
+        return {
+            'items': [self.items[i] for i in item_ids],
+            'item_supports': [float(self.item_counts[i] / n) for i in item_ids],
+            'cells': cells,
+            'total_transactions': self.n_transactions,
+            'min_support': min_support
+        }
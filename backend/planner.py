@@ -0,0 +1,220 @@
+"""
+Cost-based planning for /mine.
+The planner summarises the uploaded transactions (density, transaction
+lengths, item-frequency skew), estimates how many candidates each level of the
+search will produce, and from that predicts the peak memory of every engine
+and encoding. It picks the cheapest suitable engine (or honours the user's
+choice when it fits), downgrades to a lighter one when the prediction exceeds
+the configured budget, and refuses the job when nothing fits.
+"""
+
+import math
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from itemset_mining import min_support_count
+from transaction_store import TransactionStore
+
+ALGORITHMS = ('apriori', 'fpgrowth', 'eclat', 'pairwise')
+
+# Peak memory allowed for a single mining job, configurable per deployment
+MEMORY_BUDGET_MB = float(os.environ.get('MINING_MEMORY_BUDGET_MB', 2048))
+
+# Datasets at least this dense favour pattern-growth over level-wise search
+DENSE_DATA_DENSITY = 0.05
+# Level-wise search stays cheap while a level has at most this many candidates
+APRIORI_CANDIDATE_LIMIT = 200_000
+# Estimates are summed level by level up to this itemset length
+MAX_ESTIMATED_LENGTH = 20
+
+# Rough per-object costs (bytes) of the structures each engine builds
+FP_NODE_BYTES = 250
+ITEMSET_ROW_BYTES = 300
+CSR_ENTRY_BYTES = 16
+ENCODER_COPIES = 3
+
+
+def dataset_stats(transactions: List[List[str]]) -> Dict[str, Any]:
+    """Shape statistics of a transaction set used by the cost model"""
+    if isinstance(transactions, TransactionStore):
+        lengths = transactions.lengths().astype(np.int64)
+        counts = transactions.item_counts().astype(np.int64)
+        counts = np.sort(counts[counts > 0])[::-1]
+    else:
+        item_counts = Counter()
+        lengths = np.zeros(len(transactions), dtype=np.int64)
+        for idx, transaction in enumerate(transactions):
+            items = set(transaction)
+            item_counts.update(items)
+            lengths[idx] = len(items)
+        counts = np.array(sorted(item_counts.values(), reverse=True), dtype=np.int64)
+    n_transactions, n_items = len(transactions), len(counts)
+    nnz = int(lengths.sum())
+
+    # Gini coefficient of item frequencies: 0 when uniform, towards 1 when a few items dominate
+    skew = 0.0
+    if n_items > 1 and nnz:
+        ascending = counts[::-1]
+        ranks = np.arange(1, n_items + 1)
+        skew = float((2 * (ranks * ascending).sum()) / (n_items * nnz) - (n_items + 1) / n_items)
+
+    return {
+        'n_transactions': n_transactions,
+        'n_items': n_items,
+        'nnz': nnz,
+        'avg_length': nnz / n_transactions if n_transactions else 0.0,
+        'max_length': int(lengths.max()) if n_transactions else 0,
+        'density': nnz / (n_transactions * n_items) if n_transactions and n_items else 0.0,
+        'item_skew': skew,
+        'pair_occurrences': int((lengths * (lengths - 1) // 2).sum()),
+        'item_counts': counts
+    }
+
+
+def estimate_candidates(stats: Dict[str, Any], min_support: float) -> Dict[str, Any]:
+    """Frequent items and per-level candidate/itemset estimates at a support threshold"""
+    n = stats['n_transactions']
+    if not n:
+        return {'frequent_items': 0, 'frequent_nnz': 0, 'levels': [], 'max_level_candidates': 0, 'total_itemsets': 0}
+
+    min_count = min_support_count(min_support, n)
+    counts = stats['item_counts']
+    frequent = counts[counts >= min_count]
+    supports = frequent / n
+    threshold = min_count / n
+    max_k = min(stats['max_length'], MAX_ESTIMATED_LENGTH)
+
+    # Level k under item independence: k-subsets drawn from the items frequent enough that
+    # k of them can still reach the threshold. Level k + 1 candidates join level-k itemsets.
+    levels = []
+    previous = len(frequent)
+    for k in range(2, max_k + 1):
+        eligible = int((supports >= threshold ** (1.0 / k)).sum())
+        frequent_k = math.comb(eligible, k) if eligible >= k else 0
+        candidates_k = math.comb(previous, 2) if k == 2 else min(previous * max(eligible - k + 1, 0), math.comb(len(frequent), k))
+        levels.append({'length': k, 'candidates': candidates_k, 'frequent': frequent_k})
+        previous = frequent_k
+        if not frequent_k:
+            break
+
+    return {
+        'frequent_items': len(frequent),
+        'frequent_nnz': int(frequent.sum()),
+        'levels': levels,
+        'max_level_candidates': max((level['candidates'] for level in levels), default=0),
+        'total_itemsets': len(frequent) + sum(level['frequent'] for level in levels)
+    }
+
+
+def estimate_memory(stats: Dict[str, Any], estimate: Dict[str, Any], algorithm: str, encoding: str) -> int:
+    """Predicted peak bytes of one engine and encoding"""
+    n = stats['n_transactions']
+    items = estimate['frequent_items']
+    nnz = estimate['frequent_nnz']
+    output = estimate['total_itemsets'] * ITEMSET_ROW_BYTES
+
+    if algorithm == 'pairwise':
+        # CSR input plus X^T X, whose nonzeros are bounded by the pair occurrences
+        pairs = min(stats['pair_occurrences'], math.comb(stats['n_items'], 2))
+        return stats['nnz'] * CSR_ENTRY_BYTES + 2 * pairs * CSR_ENTRY_BYTES
+
+    matrix = ENCODER_COPIES * (n * items if encoding == 'dense' else nnz * CSR_ENTRY_BYTES)
+    if algorithm == 'apriori':
+        # Each level holds a (transactions x candidates) boolean array
+        return matrix + n * estimate['max_level_candidates'] + output
+    if algorithm == 'fpgrowth':
+        # The FP-tree has at most one node per occurrence; conditional trees roughly double it
+        return matrix + 2 * nnz * FP_NODE_BYTES + output
+    # eclat: one boolean tidset per item along the current depth-first path
+    depth = len(estimate['levels']) + 1
+    return matrix + n * items * min(depth, 2) + output
+
+
+def _preferences(stats: Dict[str, Any], estimate: Dict[str, Any], requested: str) -> List[str]:
+    """Engines in the order they should be tried"""
+    if requested != 'auto':
+        order = [requested, 'fpgrowth', 'eclat']
+    elif stats['max_length'] <= 2:
+        # No transaction holds more than two items, so pairs are the whole answer
+        order = ['pairwise']
+    elif stats['density'] >= DENSE_DATA_DENSITY or stats['avg_length'] >= 10:
+        order = ['fpgrowth', 'eclat', 'apriori']
+    elif estimate['max_level_candidates'] <= APRIORI_CANDIDATE_LIMIT:
+        order = ['apriori', 'fpgrowth', 'eclat']
+    else:
+        order = ['fpgrowth', 'eclat', 'apriori']
+    # Pairs are the last resort: exact for 1- and 2-itemsets and cheap on sparse data
+    return list(dict.fromkeys(order + ['pairwise']))
+
+
+def plan_mining(stats: Dict[str, Any], min_support: float, requested: str = 'auto',
+                support_schedule: Optional[Sequence[float]] = None,
+                available: Sequence[str] = ALGORITHMS,
+                budget_mb: float = MEMORY_BUDGET_MB) -> Dict[str, Any]:
+    """Choose engine and encoding for a job, predicting its peak memory against the budget"""
+    budget = int(budget_mb * 1024 * 1024)
+    estimate = estimate_candidates(stats, min_support)
+    # One byte per cell against one CSR entry per occurrence of the encoded items
+    dense_cells = stats['n_transactions'] * estimate['frequent_items']
+    encoding = 'dense' if dense_cells <= estimate['frequent_nnz'] * CSR_ENTRY_BYTES else 'sparse'
+
+    plan: Dict[str, Any] = {
+        'requested_algorithm': requested,
+        'algorithm': None,
+        'encoding': None,
+        'downgraded': False,
+        'refused': False,
+        'reason': None,
+        'memory_budget_mb': budget_mb,
+        'predicted_peak_mb': None,
+        'support_floor': min_support,
+        'stats': {key: value for key, value in stats.items() if key != 'item_counts'},
+        'estimates': estimate
+    }
+
+    predictions = {}
+    for algorithm in _preferences(stats, estimate, requested):
+        if algorithm not in available:
+            continue
+        algorithm_encoding = 'sparse' if algorithm == 'pairwise' else encoding
+        peak = estimate_memory(stats, estimate, algorithm, algorithm_encoding)
+        predictions[algorithm] = round(peak / 2 ** 20, 2)
+        if peak <= budget:
+            plan.update(algorithm=algorithm, encoding=algorithm_encoding, predicted_peak_mb=predictions[algorithm])
+            break
+    plan['predicted_peak_mb_by_algorithm'] = predictions
+
+    if plan['algorithm'] is None:
+        plan['refused'] = True
+        plan['reason'] = (f"Predicted peak memory of every engine exceeds the {budget_mb:g} MB budget; "
+                          f"raise min_support or reduce the dataset")
+        return plan
+
+    # Pairs only cover 1- and 2-itemsets, so falling back to them on longer transactions loses results
+    truncated = plan['algorithm'] == 'pairwise' and requested != 'pairwise' and stats['max_length'] > 2
+    if requested not in ('auto', plan['algorithm']) or truncated:
+        plan['downgraded'] = True
+        if requested == 'auto':
+            plan['reason'] = (f"No engine for itemsets of every length fits the {budget_mb:g} MB budget; "
+                              f"using pairwise instead")
+        elif requested not in available:
+            plan['reason'] = f"{requested} is not available; using {plan['algorithm']} instead"
+        else:
+            plan['reason'] = (f"{requested} was predicted to need {predictions[requested]} MB "
+                              f"(budget {budget_mb:g} MB); using {plan['algorithm']} instead")
+        if truncated:
+            plan['reason'] += ", which returns only 1- and 2-itemsets"
+
+    # Relaxation may lower the support only while the chosen plan still fits the budget
+    for support in support_schedule or ():
+        if support >= min_support:
+            continue
+        lower = estimate_candidates(stats, support)
+        if estimate_memory(stats, lower, plan['algorithm'], plan['encoding']) > budget:
+            break
+        plan['support_floor'] = support
+
+    return plan
@@ -0,0 +1,145 @@
+"""
+Preprocessing pipeline applied to the resident transaction store.
+A pipeline normalizes item names (case, whitespace, surrounding quotes),
+removes stop items, drops transactions outside the length caps and then drops
+items below a minimum frequency, in that order. Frequency pruning comes last
+so that raising the minimum only ever removes items, never transactions. It
+works on the store's CSR arrays and returns a new store, so the backends cache
+one result per (dataset, config) and every mining run at any threshold reuses it.
+"""
+
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from transaction_store import TransactionStore
+
+QUOTES = '"\''
+
+
+class PreprocessConfig(NamedTuple):
+    """One preprocessing pipeline; hashable, so results can be cached per config"""
+    lowercase: bool = False
+    collapse_whitespace: bool = False
+    strip_quotes: bool = False
+    stop_items: Tuple[str, ...] = ()
+    min_item_count: int = 1
+    min_items: int = 0
+    max_items: Optional[int] = None
+
+
+def normalize_item(item: str, config: PreprocessConfig) -> str:
+    """Item name after the config's normalization steps"""
+    if config.strip_quotes:
+        item = item.strip()
+        while len(item) >= 2 and item[0] == item[-1] and item[0] in QUOTES:
+            item = item[1:-1].strip()
+    if config.collapse_whitespace:
+        item = ' '.join(item.split())
+    if config.lowercase:
+        item = item.lower()
+    return item
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_config(params: Optional[Dict[str, Any]]) -> PreprocessConfig:
+    """Validated pipeline config from request parameters
+
+    Raises ValueError for unknown options or invalid values.
+    """
+    if params is None:
+        return PreprocessConfig()
+    if not isinstance(params, dict):
+        raise ValueError("preprocess must be an object")
+
+    unknown = set(params) - set(PreprocessConfig._fields)
+    if unknown:
+        raise ValueError(f"Unknown preprocess options: {', '.join(sorted(unknown))}")
+    for flag in ('lowercase', 'collapse_whitespace', 'strip_quotes'):
+        if not isinstance(params.get(flag, False), bool):
+            raise ValueError(f"preprocess.{flag} must be true or false")
+
+    stop_items = params.get('stop_items', [])
+    if not isinstance(stop_items, list) or not all(isinstance(item, str) for item in stop_items):
+        raise ValueError("preprocess.stop_items must be a list of item names")
+    min_item_count = params.get('min_item_count', 1)
+    if not _is_int(min_item_count) or min_item_count < 1:
+        raise ValueError("preprocess.min_item_count must be a positive integer")
+    min_items = params.get('min_items', 0)
+    if not _is_int(min_items) or min_items < 0:
+        raise ValueError("preprocess.min_items must be a non-negative integer")
+    max_items = params.get('max_items')
+    if max_items is not None and (not _is_int(max_items) or max_items < max(min_items, 1)):
+        raise ValueError("preprocess.max_items must be a positive integer no smaller than min_items")
+
+    config = PreprocessConfig(
+        lowercase=params.get('lowercase', False),
+        collapse_whitespace=params.get('collapse_whitespace', False),
+        strip_quotes=params.get('strip_quotes', False),
+        min_item_count=min_item_count,
+        min_items=min_items,
+        max_items=max_items
+    )
+    # Stop items are matched after normalization, so they are normalized the same way
+    return config._replace(stop_items=tuple(sorted({normalize_item(item, config) for item in stop_items})))
+
+
+def preprocess(store: TransactionStore, config: PreprocessConfig) -> TransactionStore:
+    """Run the pipeline over a store; the default config returns the store itself"""
+    if config == PreprocessConfig():
+        return store
+
+    n = len(store)
+    rows = np.repeat(np.arange(n), np.diff(store.offsets))
+    ids = store.item_ids.astype(np.int64)
+
+    # Map every item to its normalized name's id, or -1 when it normalizes away or is a stop item
+    stop_items = set(config.stop_items)
+    names: Dict[str, int] = {}
+    remap = np.empty(len(store.items), dtype=np.int64)
+    for idx, item in enumerate(store.items):
+        name = normalize_item(item, config)
+        remap[idx] = names.setdefault(name, len(names)) if name and name not in stop_items else -1
+    ids = remap[ids]
+    kept = ids >= 0
+    rows, ids = rows[kept], ids[kept]
+
+    # Items merged by normalization may now repeat within a transaction
+    if len(names) < int((remap >= 0).sum()):
+        order = np.lexsort((ids, rows))
+        rows, ids = rows[order], ids[order]
+        first = np.ones(len(ids), dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (ids[1:] != ids[:-1])
+        rows, ids = rows[first], ids[first]
+
+    lengths = np.bincount(rows, minlength=n)
+    kept_rows = lengths >= config.min_items
+    if config.max_items is not None:
+        kept_rows &= lengths <= config.max_items
+    if not kept_rows.all():
+        kept = kept_rows[rows]
+        rows, ids = (np.cumsum(kept_rows) - 1)[rows[kept]], ids[kept]
+        lengths = lengths[kept_rows]
+
+    if config.min_item_count > 1:
+        kept = np.bincount(ids, minlength=len(names))[ids] >= config.min_item_count
+        rows, ids = rows[kept], ids[kept]
+        lengths = np.bincount(rows, minlength=len(lengths))
+
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return TransactionStore.from_arrays(list(names), offsets, ids, store.columns)
+
+
+def preprocessing_summary(config: PreprocessConfig, store: TransactionStore) -> Dict[str, Any]:
+    """The config and the size of the data it leaves, for API responses"""
+    length_stats = store.length_stats()
+    return {
+        "config": {**config._asdict(), "stop_items": list(config.stop_items)},
+        "total_transactions": length_stats["total_transactions"],
+        "unique_items": length_stats["unique_items"],
+        "total_items": length_stats["total_items"]
+    }
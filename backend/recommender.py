@@ -0,0 +1,95 @@
+"""
+Basket recommendations from mined association rules.
+Each rule's antecedent is kept as an integer bitset over item ids, and the
+rule is listed in an inverted index under the rarest of its antecedent items
+only, so a basket touches few candidate rules. A candidate applies when its
+antecedent bitset is a subset of the basket's bitset; each consequent item
+not already in the basket is scored by the best confidence or lift among the
+rules recommending it. Everything is built once per mining result, so a
+lookup costs a few dictionary probes and integer ANDs per basket item.
+"""
+
+import heapq
+from typing import Any, Dict, List
+
+SCORE_METRICS = ('confidence', 'lift')
+
+
+class RuleRecommender:
+    """Inverted antecedent index over a rule set for top-N consequent recommendations"""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        self.item_ids: Dict[str, int] = {}
+        self.masks: List[int] = []
+        self.postings: Dict[int, List[int]] = {}
+
+        antecedent_ids = [[self._id(item) for item in rule['antecedents']] for rule in rules]
+        frequency: Dict[int, int] = {}
+        for ids in antecedent_ids:
+            for idx in ids:
+                frequency[idx] = frequency.get(idx, 0) + 1
+
+        for rule_id, ids in enumerate(antecedent_ids):
+            mask = 0
+            for idx in ids:
+                mask |= 1 << idx
+            self.masks.append(mask)
+            if ids:
+                # Every basket that satisfies the rule contains its rarest item, so one posting suffices
+                self.postings.setdefault(min(ids, key=frequency.__getitem__), []).append(rule_id)
+
+    def _id(self, item: str) -> int:
+        idx = self.item_ids.get(item)
+        if idx is None:
+            idx = self.item_ids[item] = len(self.item_ids)
+        return idx
+
+    def matching_rules(self, basket: List[str]) -> List[int]:
+        """Ids of the rules whose whole antecedent is in the basket"""
+        ids = {self.item_ids[item] for item in basket if item in self.item_ids}
+        basket_mask = 0
+        for idx in ids:
+            basket_mask |= 1 << idx
+        masks = self.masks
+        return [
+            rule_id
+            for idx in ids
+            for rule_id in self.postings.get(idx, ())
+            if masks[rule_id] & basket_mask == masks[rule_id]
+        ]
+
+    def recommend(self, basket: List[str], top_n: int = 5, metric: str = 'confidence') -> Dict[str, Any]:
+        """Top-N items to add to the basket, each scored by its best applicable rule"""
+        if metric not in SCORE_METRICS:
+            raise ValueError(f"metric must be one of: {', '.join(SCORE_METRICS)}")
+
+        in_basket = set(basket)
+        matched = self.matching_rules(basket)
+        best: Dict[str, Dict[str, Any]] = {}
+        for rule_id in matched:
+            rule = self.rules[rule_id]
+            score = rule[metric]
+            for item in rule['consequents']:
+                if item in in_basket:
+                    continue
+                current = best.get(item)
+                if current is None or (score, rule['support']) > (current[metric], current['support']):
+                    best[item] = rule
+
+        top = heapq.nlargest(top_n, best.items(), key=lambda entry: (entry[1][metric], entry[1]['support']))
+        return {
+            'recommendations': [
+                {
+                    'item': item,
+                    'score': rule[metric],
+                    'confidence': rule['confidence'],
+                    'lift': rule['lift'],
+                    'support': rule['support'],
+                    'because': rule['antecedents']
+                }
+                for item, rule in top
+            ],
+            'metric': metric,
+            'matched_rules': len(matched)
+        }
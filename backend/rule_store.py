@@ -0,0 +1,156 @@
+"""
+Columnar storage of mined rules for filtered, sorted and paginated queries.
+Every metric is held as a numpy column, each item has inverted indexes of the
+rules it appears in as antecedent or consequent, and a descending sort order
+(plus each rule's rank in it) is computed once per metric on first use. A
+query intersects the item indexes, masks the metric ranges and walks the
+pre-sorted order from the cursor until a page is full, so a page costs time
+proportional to what it skips and returns rather than a sort of every rule.
+Cursors are opaque tokens holding the sort, the rank of the last rule served
+and the store they came from.
+"""
+
+import base64
+import binascii
+import json
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+RULE_METRICS = ('support', 'confidence', 'lift', 'leverage', 'conviction', 'zhangs_metric', 'zhang_metric')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+
+class RuleStore:
+    """Rules of one mining result as metric columns with per-item inverted indexes"""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        self.token = uuid.uuid4().hex[:12]
+        self.metrics = [metric for metric in RULE_METRICS if rules and metric in rules[0]]
+        self.columns: Dict[str, np.ndarray] = {
+            # Unbounded conviction (confidence 1) is reported as None
+            metric: np.array([np.inf if rule[metric] is None else rule[metric] for rule in rules], dtype=np.float64)
+            for metric in self.metrics
+        }
+        self.antecedent_index = self._inverted_index('antecedents')
+        self.consequent_index = self._inverted_index('consequents')
+        self._orders: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _inverted_index(self, side: str) -> Dict[str, np.ndarray]:
+        postings: Dict[str, List[int]] = {}
+        for rule_id, rule in enumerate(self.rules):
+            for item in rule[side]:
+                postings.setdefault(item, []).append(rule_id)
+        return {item: np.array(ids, dtype=np.int64) for item, ids in postings.items()}
+
+    def order(self, metric: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(rule ids by descending metric, rank of every rule in that order), computed once per metric"""
+        if metric not in self._orders:
+            # Stable sort on the negated column keeps ties in mining order; NaN sorts last
+            order = np.argsort(-np.nan_to_num(self.columns[metric], nan=-np.inf), kind='stable')
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            self._orders[metric] = (order, rank)
+        return self._orders[metric]
+
+    def _candidates(self, antecedent: List[str], consequent: List[str]) -> Optional[np.ndarray]:
+        """Rule ids containing every requested item on its side, or None when no item filter is given"""
+        postings = ([self.antecedent_index.get(item) for item in antecedent] +
+                    [self.consequent_index.get(item) for item in consequent])
+        if not postings:
+            return None
+        if any(ids is None for ids in postings):
+            return np.zeros(0, dtype=np.int64)
+        postings.sort(key=len)
+        ids = postings[0]
+        for other in postings[1:]:
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+
+    def encode_cursor(self, sort_by: str, descending: bool, rank: int) -> str:
+        payload = json.dumps({'store': self.token, 'sort_by': sort_by, 'descending': descending, 'after': rank})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor: str, sort_by: str, descending: bool) -> int:
+        """Rank of the last rule served, for a cursor issued by this store for the same sort"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            after = int(payload['after'])
+        except (ValueError, TypeError, KeyError, binascii.Error):
+            raise ValueError("Invalid cursor")
+        if payload.get('store') != self.token:
+            raise ValueError("Cursor belongs to an earlier mining result; restart from the first page")
+        if payload.get('sort_by') != sort_by or payload.get('descending') != descending:
+            raise ValueError("Cursor was issued for a different sort order")
+        return after
+
+    def query(self, antecedent: Optional[List[str]] = None, consequent: Optional[List[str]] = None,
+              ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+              sort_by: str = 'confidence', descending: bool = True, limit: int = DEFAULT_PAGE_SIZE,
+              cursor: Optional[str] = None) -> Dict[str, Any]:
+        """One page of the rules matching the item and metric filters, in sort order"""
+        if not self.rules:
+            return {'rules': [], 'total': 0, 'limit': limit, 'sort_by': sort_by,
+                    'order': 'desc' if descending else 'asc', 'next_cursor': None}
+        if sort_by not in self.columns:
+            raise ValueError(f"sort_by must be one of: {', '.join(self.metrics)}")
+        for metric in ranges or {}:
+            if metric not in self.columns:
+                raise ValueError(f"Unknown metric filter: {metric}")
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+        n = len(self.rules)
+        order, rank = self.order(sort_by)
+        # Ascending pages walk the descending order backwards, with ranks mirrored to match
+        if not descending:
+            order, rank = order[::-1], (n - 1) - rank
+        after = self.decode_cursor(cursor, sort_by, descending) if cursor else -1
+
+        mask = np.ones(n, dtype=bool)
+        for metric, (low, high) in (ranges or {}).items():
+            column = self.columns[metric]
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+
+        candidates = self._candidates(antecedent or [], consequent or [])
+        if candidates is not None:
+            # Few rules survive the item index: rank them directly
+            candidates = candidates[mask[candidates]]
+            total = len(candidates)
+            remaining = candidates[rank[candidates] > after]
+            has_more = len(remaining) > limit
+            if has_more:
+                remaining = remaining[np.argpartition(rank[remaining], limit)[:limit]]
+            page = remaining[np.argsort(rank[remaining])]
+        else:
+            total = int(mask.sum())
+            page_parts, found, start = [], 0, after + 1
+            step = max(4 * limit, 1024)
+            # Walk the sorted order from the cursor in blocks until the page (plus one look-ahead) is full
+            while start < n and found <= limit:
+                block = order[start:start + step]
+                hits = block[mask[block]]
+                page_parts.append(hits)
+                found += len(hits)
+                start += step
+            page = np.concatenate(page_parts) if page_parts else np.zeros(0, dtype=np.int64)
+            has_more = len(page) > limit
+            page = page[:limit]
+
+        next_cursor = self.encode_cursor(sort_by, descending, int(rank[page[-1]])) if has_more and len(page) else None
+        return {
+            'rules': [self.rules[rule_id] for rule_id in page.tolist()],
+            'total': total,
+            'limit': limit,
+            'sort_by': sort_by,
+            'order': 'desc' if descending else 'asc',
+            'next_cursor': next_cursor
+        }
@@ -0,0 +1,133 @@
+"""
+Vectorized association rule generation from frequent itemsets.
+Itemset supports are indexed in a hash keyed by sorted item-id tuples, so the
+support of any antecedent or consequent is a single lookup instead of a scan
+over every itemset. All antecedent/consequent splits of every itemset (of any
+length) are enumerated once into index arrays and the rule metrics are
+computed as numpy column operations. A RuleTable keeps every candidate rule,
+so changing the confidence threshold is only a mask over those columns.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from itemset_mining import Itemset
+
+
+def _splits(length: int) -> List[Tuple[List[int], List[int]]]:
+    """Positions of every (antecedent, consequent) split of an itemset with `length` items"""
+    return [
+        ([i for i in range(length) if mask >> i & 1], [i for i in range(length) if not mask >> i & 1])
+        for mask in range(1, (1 << length) - 1)
+    ]
+
+
+class RuleTable:
+    """Every rule derivable from an itemset collection, with its metrics as numpy columns"""
+
+    def __init__(self, itemsets: Iterable[Iterable[str]], supports: Iterable[float]):
+        self.item_ids: Dict[str, int] = {}
+        self.items: List[str] = []
+        keys: List[Itemset] = [tuple(sorted({self._id(item) for item in itemset})) for itemset in itemsets]
+        self.keys = keys
+        itemset_supports = np.asarray(list(supports), dtype=np.float64)
+        index: Dict[Itemset, int] = {key: row for row, key in enumerate(keys)}
+
+        by_length: Dict[int, List[int]] = {}
+        for row, key in enumerate(keys):
+            if len(key) >= 2:
+                by_length.setdefault(len(key), []).append(row)
+
+        rows, antecedent_rows, consequent_rows = [], [], []
+        for length, level_rows in by_length.items():
+            level = np.array([keys[row] for row in level_rows], dtype=np.int64)
+            level_rows = np.asarray(level_rows)
+            for antecedent_pos, consequent_pos in _splits(length):
+                # Gather both sides of this split for the whole level at once
+                antecedents = list(map(tuple, level[:, antecedent_pos].tolist()))
+                consequents = list(map(tuple, level[:, consequent_pos].tolist()))
+                a_rows = np.fromiter((index.get(a, -1) for a in antecedents), dtype=np.int64, count=len(antecedents))
+                c_rows = np.fromiter((index.get(c, -1) for c in consequents), dtype=np.int64, count=len(consequents))
+                # Condensed or truncated collections may lack a side's support; those splits are skipped
+                known = (a_rows >= 0) & (c_rows >= 0)
+                rows.append(level_rows[known])
+                antecedent_rows.append(a_rows[known])
+                consequent_rows.append(c_rows[known])
+
+        def concat(parts: List[np.ndarray]) -> np.ndarray:
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+        # Each rule is stored as the itemset rows of its antecedent and consequent
+        self.antecedent_rows = concat(antecedent_rows)
+        self.consequent_rows = concat(consequent_rows)
+        support = itemset_supports[concat(rows)]
+        support_a = itemset_supports[self.antecedent_rows]
+        support_c = itemset_supports[self.consequent_rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            confidence = support / support_a
+            leverage = support - support_a * support_c
+            conviction = np.where(confidence < 1, (1 - support_c) / (1 - confidence), np.inf)
+            denominator = np.maximum(support * (1 - support_a), support_a * (support_c - support))
+            zhangs_metric = np.where(denominator == 0, 0.0, leverage / denominator)
+            lift = confidence / support_c
+
+        self.columns: Dict[str, np.ndarray] = {
+            'support': support,
+            'antecedent_support': support_a,
+            'consequent_support': support_c,
+            'confidence': confidence,
+            'lift': lift,
+            'leverage': leverage,
+            'conviction': conviction,
+            'zhangs_metric': zhangs_metric
+        }
+
+    def _id(self, item: str) -> int:
+        idx = self.item_ids.get(item)
+        if idx is None:
+            idx = self.item_ids[item] = len(self.items)
+            self.items.append(item)
+        return idx
+
+    def __len__(self) -> int:
+        return len(self.antecedent_rows)
+
+    def select(self, min_confidence: float = 0.0) -> np.ndarray:
+        """Row positions of the rules whose confidence reaches min_confidence"""
+        return np.flatnonzero(self.columns['confidence'] >= min_confidence)
+
+    def sides(self, positions: Optional[np.ndarray] = None) -> Tuple[List[List[str]], List[List[str]]]:
+        """Antecedent and consequent item names of the given rule rows (all rows by default)"""
+        if positions is None:
+            positions = np.arange(len(self))
+        items, keys = self.items, self.keys
+        return ([[items[i] for i in keys[row]] for row in self.antecedent_rows[positions].tolist()],
+                [[items[i] for i in keys[row]] for row in self.consequent_rows[positions].tolist()])
+
+    def records(self, min_confidence: float = 0.0) -> List[Dict[str, Any]]:
+        """Rules above min_confidence in the backends' JSON-ready format"""
+        positions = self.select(min_confidence)
+        antecedents, consequents = self.sides(positions)
+        columns = {name: self.columns[name][positions].tolist() for name in
+                   ('support', 'confidence', 'lift', 'leverage', 'conviction', 'zhangs_metric')}
+        return [
+            {
+                'antecedents': antecedents[row],
+                'consequents': consequents[row],
+                'support': columns['support'][row],
+                'confidence': columns['confidence'][row],
+                'lift': columns['lift'][row],
+                'leverage': columns['leverage'][row],
+                'conviction': columns['conviction'][row] if columns['conviction'][row] != float('inf') else None,
+                'zhangs_metric': columns['zhangs_metric'][row]
+            }
+            for row in range(len(positions))
+        ]
+
+
+def generate_rules(frequent_itemsets: List[Dict[str, Any]], min_confidence: float = 0.5) -> List[Dict[str, Any]]:
+    """Association rules of JSON-ready itemset records, over every split of every itemset"""
+    table = RuleTable((record['itemset'] for record in frequent_itemsets),
+                      (record['support'] for record in frequent_itemsets))
+    return table.records(min_confidence)
@@ -0,0 +1,165 @@
+"""
+Sampling-based approximate frequent itemset mining with error guarantees.
+The sample size comes from the Hoeffding bound so that every itemset's sample
+support is within epsilon of its true support with probability 1 - delta.
+The sample is mined at a slightly lowered threshold (Toivonen) so that misses
+are unlikely, and an optional single pass over the full data counts the result
+and its negative border exactly: if no border itemset turns out frequent, the
+answer is provably complete. Otherwise supports and rule confidences are
+reported with Hoeffding confidence intervals.
+"""
+
+import math
+import random
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Set
+
+from itemset_mining import (CandidateTrie, Itemset, apriori_counts, encode_transactions,
+                            generate_candidates, min_support_count)
+from transaction_store import TransactionStore
+
+
+def sample_size(epsilon: float, delta: float) -> int:
+    """Transactions needed so a sample support is within epsilon of the truth with probability 1 - delta"""
+    return math.ceil(math.log(2 / delta) / (2 * epsilon ** 2))
+
+
+def _half_width(n: int, delta: float) -> float:
+    """Hoeffding confidence half-width of a proportion estimated from n observations"""
+    return math.sqrt(math.log(2 / delta) / (2 * n)) if n else 1.0
+
+
+def negative_border(itemsets: Set[Itemset], items: List[int]) -> List[Itemset]:
+    """Minimal itemsets outside the collection whose proper subsets all lie inside it"""
+    border = [(item,) for item in items if (item,) not in itemsets]
+    by_length: Dict[int, List[Itemset]] = {}
+    for itemset in itemsets:
+        by_length.setdefault(len(itemset), []).append(itemset)
+    for level in by_length.values():
+        # generate_candidates already requires every k-subset to be in the collection
+        border.extend(c for c in generate_candidates(level) if c not in itemsets)
+    return border
+
+
+def _count_all(itemsets: List[Itemset], transactions: List[Itemset]) -> Dict[Itemset, int]:
+    """Exact counts of itemsets of mixed lengths in one pass over the transactions"""
+    by_length: Dict[int, List[Itemset]] = {}
+    for itemset in itemsets:
+        by_length.setdefault(len(itemset), []).append(itemset)
+    singles = {itemset[0]: 0 for itemset in by_length.pop(1, [])}
+    tries = [CandidateTrie(level) for level in by_length.values()]
+
+    for transaction in transactions:
+        for item in transaction:
+            if item in singles:
+                singles[item] += 1
+        for trie in tries:
+            trie.count_transaction(transaction)
+
+    counts = {(item,): count for item, count in singles.items()}
+    for trie in tries:
+        counts.update(zip(trie.candidates, trie.counts))
+    return counts
+
+
+def approximate_mine(transactions: List[List[str]], min_support: float, min_confidence: float,
+                     epsilon: float = 0.01, delta: float = 0.05, verify: bool = False,
+                     seed: Optional[int] = None, max_length: Optional[int] = None) -> Dict[str, Any]:
+    """Mine a Hoeffding-sized random sample; optionally verify it against the full data in one pass"""
+    if not 0 < epsilon < 1 or not 0 < delta < 1:
+        raise ValueError("epsilon and delta must be between 0 and 1")
+
+    n_total = len(transactions)
+    n_sample = min(n_total, sample_size(epsilon, delta))
+    # Only the sample is encoded unless the full data has to be scanned anyway
+    if n_sample >= n_total:
+        sample_raw = transactions
+    elif isinstance(transactions, TransactionStore):
+        # Same draw as random.sample, gathered on the CSR arrays
+        sample_raw = transactions.sample(n_sample, seed)
+    else:
+        sample_raw = random.Random(seed).sample(transactions, n_sample)
+    items, sample = encode_transactions(sample_raw)
+
+    # Toivonen: lower the sample threshold so that itemsets at min_support are rarely missed
+    half_width = _half_width(n_sample, delta) if n_sample < n_total else 0.0
+    lowered_support = max(min_support - half_width, 1 / max(n_sample, 1))
+    sample_counts = apriori_counts(sample, min_support_count(lowered_support, n_sample), max_length) if sample else {}
+
+    result: Dict[str, Any] = {
+        'sample_size': n_sample,
+        'total_transactions': n_total,
+        'epsilon': epsilon,
+        'delta': delta,
+        'lowered_support': lowered_support,
+        'exact': n_sample == n_total,
+        'verified': None,
+        'border_misses': []
+    }
+
+    if verify or n_sample == n_total:
+        # One pass over the full data: exact supports plus a completeness check on the border
+        if sample_raw is transactions:
+            encoded, found = sample, set(sample_counts)
+        else:
+            full_items, encoded = encode_transactions(transactions)
+            full_ids = {item: idx for idx, item in enumerate(full_items)}
+            found = {tuple(sorted(full_ids[items[i]] for i in itemset)) for itemset in sample_counts}
+            items = full_items
+        border = negative_border(found, list(range(len(items))))
+        if max_length is not None:
+            border = [itemset for itemset in border if len(itemset) <= max_length]
+        exact = _count_all(list(found) + border, encoded)
+        min_count = min_support_count(min_support, n_total)
+        counts = {itemset: exact[itemset] for itemset in found if exact[itemset] >= min_count}
+        misses = [itemset for itemset in border if exact[itemset] >= min_count]
+        result['verified'] = not misses
+        result['border_misses'] = [[items[i] for i in itemset] for itemset in misses]
+        n, support_half_width = n_total, 0.0
+    else:
+        min_count = min_support_count(min_support, n_sample)
+        counts = {itemset: count for itemset, count in sample_counts.items() if count >= min_count}
+        n, support_half_width = n_sample, half_width
+
+    result['itemsets'] = [
+        {
+            'itemset': [items[i] for i in itemset],
+            'support': count / n,
+            'support_ci': [max(0.0, count / n - support_half_width), min(1.0, count / n + support_half_width)],
+            'length': len(itemset)
+        }
+        for itemset, count in sorted(counts.items(), key=lambda entry: (len(entry[0]), entry[0]))
+    ]
+    result['rules'] = _rules(counts, items, n, min_confidence, delta, exact=support_half_width == 0.0)
+    return result
+
+
+def _rules(counts: Dict[Itemset, int], items: List[str], n: int, min_confidence: float,
+           delta: float, exact: bool) -> List[Dict[str, Any]]:
+    """Rules over the mined counts; confidence intervals treat the antecedent's rows as the sample"""
+    rules = []
+    for itemset, count in counts.items():
+        for size in range(1, len(itemset)):
+            for antecedent in combinations(itemset, size):
+                consequent = tuple(item for item in itemset if item not in antecedent)
+                count_a, count_c = counts[antecedent], counts[consequent]
+                confidence = count / count_a
+                if confidence < min_confidence:
+                    continue
+                support, support_a, support_c = count / n, count_a / n, count_c / n
+                leverage = support - support_a * support_c
+                denominator = max(support * (1 - support_a), support_a * (support_c - support))
+                confidence_half_width = 0.0 if exact else _half_width(count_a, delta)
+                rules.append({
+                    'antecedents': [items[i] for i in antecedent],
+                    'consequents': [items[i] for i in consequent],
+                    'support': support,
+                    'confidence': confidence,
+                    'confidence_ci': [max(0.0, confidence - confidence_half_width),
+                                      min(1.0, confidence + confidence_half_width)],
+                    'lift': confidence / support_c,
+                    'leverage': leverage,
+                    'conviction': (1 - support_c) / (1 - confidence) if confidence < 1 else None,
+                    'zhangs_metric': leverage / denominator if denominator else 0.0
+                })
+    return rules
@@ -0,0 +1,209 @@
+"""
+Partitioned parallel frequent itemset mining (SON algorithm).
+The encoded transactions are written once as CSR arrays into shared memory and
+split into contiguous partitions. Phase one mines the locally frequent itemsets
+of every partition in a worker process; since a globally frequent itemset must
+be locally frequent in at least one partition, their union is a complete
+candidate set. Phase two counts those candidates over all partitions in
+parallel and keeps the globally frequent ones. Memory-mapped datasets skip the
+shared-memory copy: workers map the dataset files themselves.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from itemset_mining import CandidateTrie, Itemset, apriori_counts, encode_transactions, min_support_count
+from mmap_dataset import MappedTransactions, mapped_apriori_counts
+from transaction_store import TransactionStore
+
+# Below this many transactions per worker, process start-up costs more than it saves
+MIN_PARTITION_SIZE = 2000
+# Phase one loads a whole partition; mapped datasets are split so none exceeds this many item ids
+MAX_PARTITION_NNZ = 5_000_000
+
+
+class SharedTransactions:
+    """CSR arrays of encoded transactions held in named shared memory blocks"""
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray):
+        self.blocks = []
+        self.handles = {}
+        for name, array in (('indptr', indptr), ('indices', indices)):
+            # Zero-size blocks are not allowed, so empty arrays still get one byte
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            self.blocks.append(block)
+            self.handles[name] = (block.name, array.shape, array.dtype.str)
+
+    @classmethod
+    def from_encoded(cls, encoded: List[Itemset]) -> 'SharedTransactions':
+        lengths = np.fromiter((len(t) for t in encoded), dtype=np.int64, count=len(encoded))
+        indptr = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter((item for t in encoded for item in t), dtype=np.int32, count=int(indptr[-1]))
+        return cls(indptr, indices)
+
+    def release(self) -> None:
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def _read_partition(source, start: int, stop: int) -> List[Itemset]:
+    """Copy out transactions [start, stop) from a mapped dataset path or the shared CSR arrays"""
+    if isinstance(source, str):
+        return list(MappedTransactions(source).encoded(start, stop))
+
+    handles: Dict[str, Tuple[str, Tuple[int, ...], str]] = source
+    blocks = {name: shared_memory.SharedMemory(name=block_name) for name, (block_name, _, _) in handles.items()}
+    try:
+        arrays = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[name].buf)
+            for name, (_, shape, dtype) in handles.items()
+        }
+        indptr, indices = arrays['indptr'], arrays['indices']
+        flat = indices[indptr[start]:indptr[stop]].tolist()
+        offsets = (indptr[start:stop + 1] - indptr[start]).tolist()
+        del arrays, indptr, indices
+        return [tuple(flat[offsets[i]:offsets[i + 1]]) for i in range(stop - start)]
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+def _mine_partition(source, start: int, stop: int, min_support: float, max_length: Optional[int]) -> List[Itemset]:
+    """Phase one: itemsets frequent within one partition at the same relative support"""
+    transactions = _read_partition(source, start, stop)
+    return list(apriori_counts(transactions, min_support_count(min_support, len(transactions)), max_length))
+
+
+def _count_partition(source, start: int, stop: int, candidates: List[List[Itemset]]) -> List[List[int]]:
+    """Phase two: exact counts of every candidate (grouped by length) in one pass over a partition"""
+    if isinstance(source, str):
+        transactions = MappedTransactions(source).encoded(start, stop)
+    else:
+        transactions = _read_partition(source, start, stop)
+    candidate_items = {item for level in candidates for itemset in level for item in itemset}
+
+    singles = {itemset[0]: pos for pos, itemset in enumerate(candidates[0])} if len(candidates[0][0]) == 1 else None
+    single_counts = [0] * len(candidates[0]) if singles is not None else None
+    tries = [CandidateTrie(level) for level in candidates if len(level[0]) > 1]
+
+    for transaction in transactions:
+        transaction = tuple(item for item in transaction if item in candidate_items)
+        if singles is not None:
+            for item in transaction:
+                pos = singles.get(item)
+                if pos is not None:
+                    single_counts[pos] += 1
+        for trie in tries:
+            trie.count_transaction(transaction)
+
+    counts = [single_counts] if singles is not None else []
+    return counts + [trie.counts for trie in tries]
+
+
+def _partitions(n_transactions: int, parts: int) -> List[Tuple[int, int]]:
+    """Contiguous, near-equal row ranges"""
+    bounds = np.linspace(0, n_transactions, parts + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def effective_workers(n_transactions: int, workers: int) -> int:
+    """Number of partitions actually worth running in parallel"""
+    workers = max(1, min(int(workers), os.cpu_count() or 1))
+    return max(1, min(workers, n_transactions // MIN_PARTITION_SIZE))
+
+
+def _run_son(source, ranges: List[Tuple[int, int]], workers: int, min_support: float, min_count: int,
+             max_length: Optional[int]) -> Dict[Itemset, int]:
+    """Both SON phases over the given partitions of a shared or mapped source"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        candidate_set = set()
+        for itemsets in pool.map(_mine_partition, *zip(*[(source, a, b, min_support, max_length) for a, b in ranges])):
+            candidate_set.update(itemsets)
+        if not candidate_set:
+            return {}
+
+        lengths = sorted({len(itemset) for itemset in candidate_set})
+        candidates = [sorted(c for c in candidate_set if len(c) == k) for k in lengths]
+        totals = [np.zeros(len(level), dtype=np.int64) for level in candidates]
+        for partition_counts in pool.map(_count_partition, *zip(*[(source, a, b, candidates) for a, b in ranges])):
+            for total, level_counts in zip(totals, partition_counts):
+                total += np.asarray(level_counts, dtype=np.int64)
+
+    return {
+        itemset: int(count)
+        for level, total in zip(candidates, totals)
+        for itemset, count in zip(level, total)
+        if count >= min_count
+    }
+
+
+def son_counts(transactions: Iterable[Iterable[str]], min_support: float, workers: int,
+               max_length: Optional[int] = None) -> Tuple[List[str], Dict[Itemset, int], int]:
+    """Return (items, {itemset: global support count}, partitions used) mined with SON"""
+    if isinstance(transactions, TransactionStore):
+        items, n_transactions = list(transactions.items), len(transactions)
+    else:
+        items, encoded = encode_transactions(transactions)
+        n_transactions = len(encoded)
+    if not n_transactions:
+        return items, {}, 0
+    min_count = min_support_count(min_support, n_transactions)
+
+    workers = effective_workers(n_transactions, workers)
+    if isinstance(transactions, TransactionStore):
+        if workers == 1:
+            return items, apriori_counts(transactions.encoded(), min_count, max_length), 1
+        # The store's CSR arrays go to shared memory as they are, without decoding to tuples
+        shared = SharedTransactions(transactions.offsets, transactions.item_ids)
+    else:
+        if workers == 1:
+            return items, apriori_counts(encoded, min_count, max_length), 1
+        shared = SharedTransactions.from_encoded(encoded)
+        del encoded
+    try:
+        ranges = _partitions(n_transactions, workers)
+        counts = _run_son(shared.handles, ranges, workers, min_support, min_count, max_length)
+    finally:
+        shared.release()
+    return items, counts, len(ranges)
+
+
+def son_counts_mapped(dataset: MappedTransactions, min_support: float, workers: int,
+                      max_length: Optional[int] = None) -> Tuple[Dict[Itemset, int], int]:
+    """Return ({itemset: global support count}, partitions used) for a memory-mapped dataset"""
+    if not dataset.n_transactions:
+        return {}, 0
+    min_count = min_support_count(min_support, dataset.n_transactions)
+    workers = effective_workers(dataset.n_transactions, workers)
+    if workers == 1:
+        return mapped_apriori_counts(dataset, min_count, max_length), 1
+    # Enough partitions that each fits in a worker's memory, at least one per worker
+    ranges = _partitions(dataset.n_transactions, max(workers, math.ceil(dataset.nnz / MAX_PARTITION_NNZ)))
+    return _run_son(dataset.path, ranges, workers, min_support, min_count, max_length), len(ranges)
+
+
+def son_frequent_itemsets(source, min_support: float, workers: int,
+                          max_length: Optional[int] = None) -> Dict[str, Any]:
+    """Frequent itemsets of transaction lists or a mapped dataset, mined in parallel partitions"""
+    if isinstance(source, MappedTransactions):
+        items, n_transactions = source.items, source.n_transactions
+        counts, partitions = son_counts_mapped(source, min_support, workers, max_length)
+    else:
+        items, counts, partitions = son_counts(source, min_support, workers, max_length)
+        n_transactions = len(source)
+    return {
+        'itemsets': [
+            {'itemset': [items[i] for i in itemset], 'support': count / n_transactions, 'length': len(itemset)}
+            for itemset, count in sorted(counts.items(), key=lambda entry: (len(entry[0]), entry[0]))
+        ],
+        'partitions': partitions
+    }
@@ -0,0 +1,152 @@
+"""
+Approximate frequent itemset mining over an append-only transaction stream.
+Implements Lossy Counting (Manku & Motwani) over every itemset of up to
+`max_length` items (pairs and triples by default) of each incoming basket. For
+an error bound epsilon the summary holds O((1/epsilon) log(epsilon N)) entries
+per itemset length, every reported count undercounts the true count by at most
+epsilon * N, and no itemset with true support >= min_support is ever missed.
+"""
+
+import math
+import threading
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from itemset_mining import Itemset
+
+DEFAULT_EPSILON = 0.001
+DEFAULT_MAX_LENGTH = 3
+
+
+class LossyCounter:
+    """Lossy Counting summary of itemset frequencies in a transaction stream"""
+
+    def __init__(self, epsilon: float = DEFAULT_EPSILON, max_length: int = DEFAULT_MAX_LENGTH):
+        if not 0 < epsilon < 1:
+            raise ValueError("epsilon must be between 0 and 1")
+        if max_length < 1:
+            raise ValueError("max_length must be at least 1")
+        self.epsilon = epsilon
+        self.max_length = max_length
+        self.bucket_width = math.ceil(1 / epsilon)
+        self.n_transactions = 0
+        self.item_ids: Dict[str, int] = {}
+        self.items: List[str] = []
+        # itemset -> [observed count, maximum undercount when the entry was created]
+        self.entries: Dict[Itemset, List[int]] = {}
+        self.version = 0
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[float, Optional[float]], Dict[str, Any]] = {}
+
+    def _encode(self, transaction: Iterable[str]) -> Itemset:
+        ids = set()
+        for item in transaction:
+            idx = self.item_ids.get(item)
+            if idx is None:
+                idx = self.item_ids[item] = len(self.items)
+                self.items.append(item)
+            ids.add(idx)
+        return tuple(sorted(ids))
+
+    def add_batch(self, transactions: Iterable[Iterable[str]]) -> int:
+        """Fold a batch of transactions into the summary; returns how many were added"""
+        added = 0
+        with self._lock:
+            entries = self.entries
+            for transaction in transactions:
+                encoded = self._encode(transaction)
+                if not encoded:
+                    continue
+                self.n_transactions += 1
+                added += 1
+                bucket = (self.n_transactions - 1) // self.bucket_width + 1
+                for size in range(1, min(self.max_length, len(encoded)) + 1):
+                    for itemset in combinations(encoded, size):
+                        entry = entries.get(itemset)
+                        if entry is None:
+                            entries[itemset] = [1, bucket - 1]
+                        else:
+                            entry[0] += 1
+                if self.n_transactions % self.bucket_width == 0:
+                    self._prune(bucket)
+            if added:
+                self.version += 1
+                self._cache.clear()
+        return added
+
+    def _prune(self, bucket: int) -> None:
+        """Drop entries that cannot have true support above the current bucket boundary"""
+        stale = [itemset for itemset, entry in self.entries.items() if entry[0] + entry[1] <= bucket]
+        for itemset in stale:
+            del self.entries[itemset]
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and parameters of the summary"""
+        return {
+            'total_transactions': self.n_transactions,
+            'unique_items': len(self.items),
+            'summary_entries': len(self.entries),
+            'epsilon': self.epsilon,
+            'max_length': self.max_length,
+            'version': self.version
+        }
+
+    def frequent(self, min_support: float, min_confidence: Optional[float] = None) -> Dict[str, Any]:
+        """Itemsets whose true support may reach min_support, plus rules between them"""
+        if min_support < self.epsilon:
+            raise ValueError(f"min_support must be at least epsilon ({self.epsilon})")
+
+        key = (min_support, min_confidence)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+            n = self.n_transactions
+            threshold = (min_support - self.epsilon) * n
+            counts = {itemset: entry[0] for itemset, entry in self.entries.items() if n and entry[0] >= threshold}
+            result = {
+                'itemsets': [
+                    {
+                        'itemset': [self.items[i] for i in itemset],
+                        'support': count / n,
+                        'support_upper_bound': min(1.0, count / n + self.epsilon),
+                        'length': len(itemset)
+                    }
+                    for itemset, count in sorted(counts.items(), key=lambda entry: (len(entry[0]), -entry[1]))
+                ],
+                'rules': self._rules(counts, min_confidence) if min_confidence is not None else [],
+                'max_support_error': self.epsilon,
+                **self.stats()
+            }
+            self._cache[key] = result
+            return result
+
+    def _rules(self, counts: Dict[Itemset, int], min_confidence: float) -> List[Dict[str, Any]]:
+        """Rules from summary counts; both sides must still be tracked for confidence to be estimated"""
+        n = self.n_transactions
+        rules = []
+        for itemset, count in counts.items():
+            for size in range(1, len(itemset)):
+                for antecedent in combinations(itemset, size):
+                    consequent = tuple(item for item in itemset if item not in antecedent)
+                    count_a, count_c = counts.get(antecedent), counts.get(consequent)
+                    if not count_a or not count_c:
+                        continue
+                    confidence = min(1.0, count / count_a)
+                    if confidence < min_confidence:
+                        continue
+                    support, support_a, support_c = count / n, count_a / n, count_c / n
+                    leverage = support - support_a * support_c
+                    denominator = max(support * (1 - support_a), support_a * (support_c - support))
+                    rules.append({
+                        'antecedents': [self.items[i] for i in antecedent],
+                        'consequents': [self.items[i] for i in consequent],
+                        'support': support,
+                        'confidence': confidence,
+                        'lift': confidence / support_c,
+                        'leverage': leverage,
+                        'conviction': (1 - support_c) / (1 - confidence) if confidence < 1 else None,
+                        'zhangs_metric': leverage / denominator if denominator else 0.0
+                    })
+        return rules
@@ -0,0 +1,34 @@
+"""
+Shared fixtures for the backend tests.
+The backend modules import each other by bare name, so the backend directory is
+put on sys.path, and the Flask apps are loaded from their files the way
+smoke_test.py does.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+
+def load_app(relative_path: str, name: str):
+    """Import a backend app module from its file"""
+    spec = importlib.util.spec_from_file_location(name, str(BACKEND / relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def backend_app():
+    """The main backend (backend/app.py) module"""
+    return load_app('app.py', 'backend_app')
+
+
+@pytest.fixture
+def client(backend_app):
+    return backend_app.app.test_client()
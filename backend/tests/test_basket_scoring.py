@@ -0,0 +1,67 @@
+"""Bulk basket scoring against a per-basket reference"""
+
+import csv
+import io
+import json
+import random
+
+import pytest
+
+from basket_scoring import RuleMatrix, score_baskets
+from ingest import read_transactions
+
+
+class Upload:
+    def __init__(self, data: bytes, filename: str):
+        self.stream = io.BytesIO(data)
+        self.filename = filename
+
+
+def random_rules(rng, items, n=40):
+    rules = []
+    for _ in range(n):
+        chosen = rng.sample(items, rng.randint(2, 4))
+        split = rng.randint(1, len(chosen) - 1)
+        rules.append({'antecedents': chosen[:split], 'consequents': chosen[split:],
+                      'confidence': round(rng.random(), 3), 'lift': round(rng.uniform(0.5, 3), 3)})
+    return rules
+
+
+def reference(rules, basket, top_n, metric):
+    """Best score per item not in the basket over the rules whose antecedent the basket holds"""
+    best = {}
+    for rule in rules:
+        if set(rule['antecedents']) <= set(basket):
+            for item in rule['consequents']:
+                if item not in basket:
+                    best[item] = max(best.get(item, float('-inf')), rule[metric])
+    return sorted(best.values(), reverse=True)[:top_n]
+
+
+@pytest.mark.parametrize('metric', ['confidence', 'lift'])
+def test_scores_match_per_basket_reference(metric):
+    rng = random.Random(4)
+    items = [f"sku{i}" for i in range(12)]
+    rules = random_rules(rng, items)
+    baskets = [rng.sample(items + ['unseen'], rng.randint(1, 6)) for _ in range(300)]
+    encoded = read_transactions(Upload('\n'.join(','.join(b) for b in baskets).encode(), 'baskets.csv'))
+
+    rows = list(csv.DictReader(io.StringIO(''.join(score_baskets(RuleMatrix(rules), encoded, 3, metric,
+                                                                   chunk_size=64)))))
+    scored = {}
+    for row in rows:
+        scored.setdefault(int(row['basket']), []).append(float(row['score']))
+    for index, basket in enumerate(baskets):
+        assert scored.get(index, []) == pytest.approx(reference(rules, basket, 3, metric))
+
+
+def test_baskets_keep_the_ids_ingest_read():
+    rules = [{'antecedents': ['bread'], 'consequents': ['milk'], 'confidence': 0.8, 'lift': 1.5}]
+    by_id = read_transactions(Upload(b"order,product\nA7,bread\nB2,eggs\nC1,bread\nC1,milk\nD4,bread\n", 'o.csv'))
+    lines = ''.join(score_baskets(RuleMatrix(rules), by_id, output='ndjson')).splitlines()
+    assert [json.loads(line)['basket'] for line in lines] == ['A7', 'D4']
+
+    # Without ids, the data row survives blank rows and a header
+    by_row = read_transactions(Upload(b"item1,item2\nbread,\n\neggs,\nbread,jam\n", 'b.csv'))
+    rows = list(csv.reader(io.StringIO(''.join(score_baskets(RuleMatrix(rules), by_row)))))
+    assert [row[0] for row in rows[1:]] == ['0', '3']
@@ -0,0 +1,77 @@
+"""Closed and maximal itemsets against a filtered mlxtend mine"""
+
+import pandas as pd
+import pytest
+from mlxtend.frequent_patterns import apriori, association_rules
+from mlxtend.preprocessing import TransactionEncoder
+
+from closed_itemsets import mine_condensed
+
+# Ties (a and b always occur together) and nested closures ({c} ⊂ {a, b, c} ⊂ {a, b, c, d})
+TRANSACTIONS = [
+    ['a', 'b', 'c', 'd'],
+    ['a', 'b', 'c', 'd'],
+    ['a', 'b', 'c'],
+    ['a', 'b', 'e'],
+    ['c', 'e'],
+    ['c', 'd', 'e'],
+    ['a', 'b', 'c', 'e'],
+    ['e'],
+]
+MIN_SUPPORT = 0.25
+
+
+def mlxtend_supports():
+    encoder = TransactionEncoder()
+    encoded = pd.DataFrame(encoder.fit(TRANSACTIONS).transform(TRANSACTIONS), columns=encoder.columns_)
+    frequent = apriori(encoded, min_support=MIN_SUPPORT, use_colnames=True)
+    return frequent, dict(zip(frequent['itemsets'], frequent['support']))
+
+
+def as_supports(records):
+    return {frozenset(record['itemset']): pytest.approx(record['support']) for record in records}
+
+
+def test_closed_itemsets_match_filtered_mlxtend():
+    _, supports = mlxtend_supports()
+    expected = {
+        itemset: support for itemset, support in supports.items()
+        if not any(itemset < other and supports[other] == support for other in supports)
+    }
+    # The fixture must actually exercise non-closed itemsets
+    assert len(expected) < len(supports)
+
+    result = mine_condensed(TRANSACTIONS, MIN_SUPPORT, 'closed')
+    assert as_supports(result['itemsets']) == expected
+
+
+def test_maximal_itemsets_match_filtered_mlxtend():
+    _, supports = mlxtend_supports()
+    expected = {
+        itemset: support for itemset, support in supports.items()
+        if not any(itemset < other for other in supports)
+    }
+
+    result = mine_condensed(TRANSACTIONS, MIN_SUPPORT, 'maximal')
+    assert as_supports(result['itemsets']) == expected
+
+
+@pytest.mark.parametrize('output', ['closed', 'maximal'])
+def test_condensed_rules_match_mlxtend_rules(output):
+    frequent, _ = mlxtend_supports()
+    result = mine_condensed(TRANSACTIONS, MIN_SUPPORT, output, min_confidence=0.5)
+    condensed = {frozenset(record['itemset']) for record in result['itemsets']}
+
+    rules = association_rules(frequent, len(TRANSACTIONS), metric='confidence', min_threshold=0.5)
+    expected = {
+        (row.antecedents, row.consequents): (pytest.approx(row.support), pytest.approx(row.confidence),
+                                             pytest.approx(row.lift))
+        for row in rules.itertuples()
+        if row.antecedents | row.consequents in condensed
+    }
+    got = {
+        (frozenset(rule['antecedents']), frozenset(rule['consequents'])): (rule['support'], rule['confidence'],
+                                                                          rule['lift'])
+        for rule in result['rules']
+    }
+    assert got == expected
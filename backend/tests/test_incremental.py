@@ -0,0 +1,74 @@
+"""Incremental (FUP) maintenance against a full re-mine"""
+
+import io
+import random
+
+import pytest
+
+from incremental import IncrementalItemsets
+from itemset_mining import find_frequent_itemsets
+from transaction_store import TransactionStore
+
+
+def baskets(rng, n, items):
+    return [rng.sample(items, rng.randint(1, 4)) for _ in range(n)]
+
+
+def as_supports(records):
+    return {frozenset(record['itemset']): pytest.approx(record['support']) for record in records}
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_append_then_mine_equals_full_remine(seed):
+    rng = random.Random(seed)
+    history = baskets(rng, 200, [f"old{i}" for i in range(8)])
+    # New items and a shifted distribution force promotions and a history rescan
+    batches = [baskets(rng, 60, [f"old{i}" for i in range(3)] + ['new0', 'new1']) for _ in range(2)]
+    min_support = 0.08
+
+    store = TransactionStore.from_transactions(history)
+    n = len(history)
+    counts = {
+        frozenset(record['itemset']): round(record['support'] * n)
+        for record in find_frequent_itemsets(history, min_support)
+    }
+    incremental = IncrementalItemsets(store, counts, min_support)
+
+    seen = list(history)
+    rescans = 0
+    for batch in batches:
+        rescans += incremental.append(batch)['history_scans']
+        seen.extend(batch)
+        assert len(store) == len(seen)
+        assert as_supports(incremental.itemsets()) == as_supports(find_frequent_itemsets(seen, min_support))
+    assert rescans
+
+
+def test_append_endpoint_matches_mining_the_combined_upload(client):
+    rng = random.Random(9)
+    history = baskets(rng, 150, list('abcdef'))
+    batch = baskets(rng, 50, list('abcxy'))
+    csv = lambda rows: '\n'.join(','.join(row) for row in rows).encode()
+    request = {'min_support': 0.1, 'min_confidence': 0.2, 'algorithm': 'apriori'}
+
+    client.post('/upload', data={'file': (io.BytesIO(csv(history)), 'history.csv')})
+    assert client.post('/mine', json=request).status_code == 200
+    appended = client.post('/append', json={'transactions': batch}).get_json()
+    assert appended['performance']['algorithm'] == 'fup'
+
+    client.post('/upload', data={'file': (io.BytesIO(csv(history + batch)), 'all.csv')})
+    remined = client.post('/mine', json=request).get_json()
+    assert as_supports(appended['itemsets']) == as_supports(remined['itemsets'])
+
+
+def test_append_file_is_parsed_like_an_upload(client):
+    client.post('/upload', data={'file': (io.BytesIO(b"a,b\nb,c\na,c\n"), 'history.csv')})
+    assert client.post('/mine', json={'min_support': 0.3, 'algorithm': 'apriori'}).status_code == 200
+    # An item-per-row file with a header, which a one-basket-per-line reader would mis-encode
+    batch = b"transaction_id,item\nT1,a\nT1,b\nT2,a\nT2,b\n"
+    appended = client.post('/append', data={'file': (io.BytesIO(batch), 'batch.csv')}).get_json()
+
+    client.post('/upload', data={'file': (io.BytesIO(b"a,b\nb,c\na,c\na,b\na,b\n"), 'all.csv')})
+    remined = client.post('/mine', json={'min_support': 0.3, 'algorithm': 'apriori'}).get_json()
+    assert appended['performance']['appended'] == 2
+    assert as_supports(appended['itemsets']) == as_supports(remined['itemsets'])
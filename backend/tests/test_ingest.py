@@ -0,0 +1,124 @@
+"""Layout sniffing and parsing of every upload shape the ingest module handles"""
+
+import gzip
+import io
+import json
+
+import pytest
+
+from conftest import load_app
+from ingest import Layout, read_transactions, sniff_layout
+from transaction_store import TransactionStore
+
+
+class Upload:
+    """Minimal stand-in for werkzeug's FileStorage"""
+
+    def __init__(self, data: bytes, filename: str):
+        self.stream = io.BytesIO(data)
+        self.filename = filename
+
+
+def parse(text: str, filename: str = 'upload.csv'):
+    return list(TransactionStore.from_encoded(read_transactions(Upload(text.encode(), filename))))
+
+
+def as_sets(transactions):
+    return [set(t) for t in transactions]
+
+
+GROCERIES = "Member_number,itemDescription\n1808,tropical fruit\n1808,whole milk\n2552,whole milk\n"
+
+
+@pytest.mark.parametrize('prefix, layout', [
+    ([['transaction_id', 'item'], ['1', 'a']], Layout('item_per_row', True, 0, [1])),
+    ([['TransactionID', 'store', 'product'], ['1', 's', 'a']], Layout('item_per_row', True, 0, [2])),
+    ([['transaction_id', 'i1', 'i2', 'i3'], ['1', 'a', 'b', '']], Layout('wide', True, 0, [1, 2, 3])),
+    ([['1001', 'a'], ['1001', 'b'], ['1002', 'a']], Layout('item_per_row', False, 0, [1])),
+    ([['Member_number', 'itemDescription'], ['1808', 'tropical fruit']], Layout('item_per_row', True, 0, [1])),
+    ([['customer_id', 'product'], ['c17', 'a'], ['c18', 'b']], Layout('item_per_row', True, 0, [1])),
+    ([['item1', 'item2', 'item3'], ['a', 'b', 'c']], Layout('transaction_per_row', True)),
+    ([['bread', 'milk', 'eggs'], ['milk', 'beer']], Layout('transaction_per_row', False)),
+    ([['bread', 'milk']], Layout('transaction_per_row', False)),
+])
+def test_sniff_layout(prefix, layout):
+    assert sniff_layout(prefix) == layout
+
+
+@pytest.mark.parametrize('text, expected', [
+    # Transaction id header with an item column
+    ("transaction_id,item\nT1,bread\nT1,milk\nT2,milk\n", [['bread', 'milk'], ['milk']]),
+    ("TransactionID,store,product\n1,s1,bread\n1,s1,milk\n2,s2,eggs\n", [['bread', 'milk'], ['eggs']]),
+    # Transaction id header with item columns
+    ("transaction_id,item1,item2,item3\n1,bread,milk,\n2,eggs,milk,beer\n", [['bread', 'milk'], ['eggs', 'milk', 'beer']]),
+    # Headerless and headed (id, item) tables
+    ("1808,tropical fruit\n1808,whole milk\n2552,whole milk\n", [['tropical fruit', 'whole milk'], ['whole milk']]),
+    (GROCERIES, [['tropical fruit', 'whole milk'], ['whole milk']]),
+    ("customer_id,product\nc1,bread\nc1,milk\nc2,bread\n", [['bread', 'milk'], ['bread']]),
+    # One transaction per row, with and without an item-column header, and comma-separated cells
+    ("bread,milk\nmilk,eggs,beer\n", [['bread', 'milk'], ['milk', 'eggs', 'beer']]),
+    ("item1,item2,item3\nbread,milk,\nmilk,eggs,beer\n", [['bread', 'milk'], ['milk', 'eggs', 'beer']]),
+    ('"bread,milk"\n"eggs"\n', [['bread', 'milk'], ['eggs']]),
+])
+def test_csv_layouts(text, expected):
+    assert as_sets(parse(text)) == as_sets(expected)
+
+
+def test_two_column_header_matches_baseline_grouping():
+    assert parse(GROCERIES) == [['tropical fruit', 'whole milk'], ['whole milk']]
+
+
+@pytest.mark.parametrize('document', [
+    [['bread', 'milk'], ['milk', 'eggs']],
+    ['bread,milk', 'milk,eggs'],
+    [{'items': ['bread', 'milk']}, {'items': 'milk,eggs'}],
+    [{'transaction_id': 1, 'item': 'bread'}, {'transaction_id': 1, 'item': 'milk'},
+     {'transaction_id': 2, 'item': 'milk'}, {'transaction_id': 2, 'item': 'eggs'}],
+    {'transactions': [['bread', 'milk'], ['milk', 'eggs']]},
+    {'meta': {'source': 'pos'}, 'data': [{'items': ['bread', 'milk']}, {'items': ['milk', 'eggs']}]},
+])
+def test_json_shapes(document):
+    expected = [{'bread', 'milk'}, {'milk', 'eggs'}]
+    assert as_sets(parse(json.dumps(document), 'upload.json')) == expected
+    if isinstance(document, list):
+        ndjson = '\n'.join(json.dumps(element) for element in document)
+        assert as_sets(parse(ndjson, 'upload.ndjson')) == expected
+
+
+def test_invalid_json_shape_is_rejected():
+    with pytest.raises(ValueError):
+        parse(json.dumps([{'name': 'bread'}]), 'upload.json')
+
+
+def gzip_upload(csv: bytes):
+    """A gzip `Content-Encoding` multipart upload of one CSV file"""
+    boundary = 'ingest-test'
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="data.csv"\r\n'
+            f'Content-Type: text/csv\r\n\r\n').encode() + csv + f'\r\n--{boundary}--\r\n'.encode()
+    return {'data': gzip.compress(body),
+            'headers': {'Content-Encoding': 'gzip', 'Content-Type': f'multipart/form-data; boundary={boundary}'}}
+
+
+def test_gzip_request_body_is_inflated(client):
+    response = client.post('/upload', **gzip_upload(b'bread,milk\nmilk,eggs\n'))
+    assert response.status_code == 200
+
+
+def test_oversized_inflated_body_is_rejected(client, monkeypatch):
+    import ingest
+    monkeypatch.setattr(ingest, 'MAX_INFLATED_BYTES', 1000)
+    response = client.post('/upload', **gzip_upload(b'bread,milk\n' * 10_000))
+    assert response.status_code == 413
+    assert 'exceeds' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('path', ['app.py', 'api/app.py', 'api/index.py', 'index.py'])
+@pytest.mark.parametrize('data, filename', [
+    (GROCERIES.encode(), 'groceries.csv'),
+    (json.dumps([{'items': ['tropical fruit', 'whole milk']}, {'items': ['whole milk']}]).encode(), 'groceries.json'),
+])
+def test_every_backend_uploads_through_the_shared_ingest(path, data, filename):
+    client = load_app(path, 'ingest_' + path.replace('/', '_')[:-3]).app.test_client()
+    response = client.post('/upload', data={'file': (io.BytesIO(data), filename)})
+    assert response.status_code == 200
+    assert response.get_json()['stats']['total_transactions'] == 2
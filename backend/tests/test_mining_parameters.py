@@ -0,0 +1,31 @@
+"""Request validation of the approximate and memory-mapped mining modes"""
+
+import io
+
+import pytest
+
+BASKETS = b"a,b\nb,c\na,c\na,b,c\n"
+
+
+@pytest.mark.parametrize('field, value', [('max_length', 'two'), ('max_length', -1), ('max_length', 1.5),
+                                          ('seed', 'abc'), ('seed', -4), ('seed', True)])
+def test_approximate_mode_rejects_invalid_counts(client, field, value):
+    client.post('/upload', data={'file': (io.BytesIO(BASKETS), 'baskets.csv')})
+    response = client.post('/mine', json={'mode': 'approximate', 'min_support': 0.3, field: value})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f'{field} must be a non-negative integer'
+
+
+@pytest.mark.parametrize('value', ['two', -1, False])
+def test_mapped_dataset_rejects_invalid_max_length(client, backend_app, monkeypatch, tmp_path, value):
+    monkeypatch.setattr(backend_app, 'MAPPED_DATASET_DIR', str(tmp_path))
+    assert client.post('/datasets', data={'file': (io.BytesIO(BASKETS), 'mapped.csv')}).status_code == 200
+    response = client.post('/mine', json={'dataset': 'mapped', 'min_support': 0.3, 'max_length': value})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'max_length must be a non-negative integer'
+
+
+def test_valid_counts_are_accepted(client):
+    client.post('/upload', data={'file': (io.BytesIO(BASKETS), 'baskets.csv')})
+    response = client.post('/mine', json={'mode': 'approximate', 'min_support': 0.3, 'seed': 3, 'max_length': 2})
+    assert response.status_code == 200
@@ -0,0 +1,43 @@
+"""Engine choice of the mining planner under a memory budget"""
+
+import random
+
+from ingest import EncodedTransactions
+from planner import dataset_stats, plan_mining
+from transaction_store import TransactionStore
+
+
+def stats_of(transactions):
+    return dataset_stats(TransactionStore.from_encoded(EncodedTransactions.from_transactions(transactions)))
+
+
+def long_baskets():
+    rng = random.Random(0)
+    items = [f"item{i}" for i in range(40)]
+    return [rng.sample(items, rng.randint(2, 8)) for _ in range(3000)]
+
+
+def test_auto_fallback_to_pairwise_is_reported():
+    plan = plan_mining(stats_of(long_baskets()), 0.01, budget_mb=0.5)
+    assert plan['algorithm'] == 'pairwise'
+    assert plan['downgraded']
+    assert '1- and 2-itemsets' in plan['reason']
+
+
+def test_requested_engine_fallback_to_pairwise_is_reported():
+    plan = plan_mining(stats_of(long_baskets()), 0.01, requested='apriori', budget_mb=0.5)
+    assert plan['algorithm'] == 'pairwise'
+    assert plan['downgraded']
+    assert plan['reason'].startswith('apriori was predicted') and '1- and 2-itemsets' in plan['reason']
+
+
+def test_pairwise_on_pairs_only_data_is_complete():
+    plan = plan_mining(stats_of([['a', 'b'], ['b', 'c'], ['a']]), 0.1)
+    assert plan['algorithm'] == 'pairwise'
+    assert not plan['downgraded'] and plan['reason'] is None
+
+
+def test_fitting_engine_is_not_downgraded():
+    plan = plan_mining(stats_of(long_baskets()), 0.01, budget_mb=1000)
+    assert plan['algorithm'] != 'pairwise'
+    assert not plan['downgraded'] and plan['reason'] is None
@@ -0,0 +1,22 @@
+"""Caching of preprocessed datasets in the main backend"""
+
+from collections import OrderedDict
+
+from ingest import EncodedTransactions
+from preprocessing import PreprocessConfig
+from transaction_store import TransactionStore
+
+
+def test_preprocess_cache_evicts_least_recently_used(backend_app, monkeypatch):
+    store = TransactionStore.from_encoded(EncodedTransactions.from_transactions([['a', 'b'], ['a'], ['b', 'c']]))
+    monkeypatch.setattr(backend_app, 'current_transactions', store)
+    monkeypatch.setattr(backend_app, 'current_preprocessed', OrderedDict())
+    configs = [PreprocessConfig(min_item_count=count) for count in range(2, 2 + backend_app.PREPROCESS_CACHE_SIZE)]
+    results = [backend_app.get_preprocessed(config) for config in configs]
+
+    # A hit refreshes the oldest config, so the next miss evicts the second one instead
+    assert backend_app.get_preprocessed(configs[0]) is results[0]
+    backend_app.get_preprocessed(PreprocessConfig(lowercase=True))
+    assert configs[0] in backend_app.current_preprocessed
+    assert configs[1] not in backend_app.current_preprocessed
+    assert len(backend_app.current_preprocessed) == backend_app.PREPROCESS_CACHE_SIZE
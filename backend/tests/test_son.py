@@ -0,0 +1,26 @@
+"""SON across worker processes against a single-process mine"""
+
+import random
+
+import pytest
+
+import son
+from itemset_mining import find_frequent_itemsets
+from transaction_store import TransactionStore
+
+
+def as_supports(itemsets):
+    return sorted((tuple(sorted(entry['itemset'])), round(entry['support'], 9)) for entry in itemsets)
+
+
+@pytest.mark.parametrize('as_store', [False, True])
+def test_son_partitions_match_a_single_mine(monkeypatch, as_store):
+    monkeypatch.setattr(son, 'MIN_PARTITION_SIZE', 50)
+    monkeypatch.setattr(son.os, 'cpu_count', lambda: 4)
+    rng = random.Random(2)
+    transactions = [rng.sample('abcdefgh', rng.randint(1, 5)) for _ in range(600)]
+    source = TransactionStore.from_transactions(transactions) if as_store else transactions
+
+    result = son.son_frequent_itemsets(source, 0.05, 3)
+    assert result['partitions'] == 3
+    assert as_supports(result['itemsets']) == as_supports(find_frequent_itemsets(transactions, 0.05))
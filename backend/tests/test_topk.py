@@ -0,0 +1,82 @@
+"""Top-k search against an exhaustive mine of the same transactions"""
+
+import io
+import random
+from itertools import combinations
+
+import pytest
+
+from conftest import load_app
+
+from itemset_mining import find_frequent_itemsets, min_support_count
+from topk import RULE_SUPPORT_FLOOR, top_k_itemsets, top_k_rules
+
+
+def baskets(seed=7, n=120):
+    rng = random.Random(seed)
+    items = [f"item{i}" for i in range(10)]
+    return [rng.sample(items, rng.randint(1, 5)) for _ in range(n)]
+
+
+def exhaustive_counts(transactions):
+    n = len(transactions)
+    return {
+        frozenset(record['itemset']): round(record['support'] * n)
+        for record in find_frequent_itemsets(transactions, 1 / n)
+    }
+
+
+@pytest.mark.parametrize('k', [1, 5, 25])
+def test_top_k_itemsets_are_the_k_most_frequent(k):
+    transactions = baskets()
+    counts = exhaustive_counts(transactions)
+    n = len(transactions)
+
+    result = top_k_itemsets(transactions, k)
+
+    assert len(result['itemsets']) == k
+    for record in result['itemsets']:
+        assert record['support'] * n == pytest.approx(counts[frozenset(record['itemset'])])
+    expected = sorted(counts.values(), reverse=True)[:k]
+    assert sorted((round(r['support'] * n) for r in result['itemsets']), reverse=True) == expected
+
+
+@pytest.mark.parametrize('rank_by', ['confidence', 'lift'])
+def test_top_k_rules_are_the_k_best_rules(rank_by):
+    transactions = baskets(seed=11)
+    counts = exhaustive_counts(transactions)
+    n = len(transactions)
+    min_count = max(2, min_support_count(RULE_SUPPORT_FLOOR, n))
+
+    scores = []
+    for itemset, count in counts.items():
+        if len(itemset) < 2 or count < min_count:
+            continue
+        for size in range(1, len(itemset)):
+            for antecedent in combinations(sorted(itemset), size):
+                consequent = itemset - set(antecedent)
+                confidence = count / counts[frozenset(antecedent)]
+                scores.append(confidence if rank_by == 'confidence' else confidence * n / counts[consequent])
+
+    k = 15
+    result = top_k_rules(transactions, k, rank_by)
+
+    assert len(result['rules']) == k
+    got = sorted((rule[rank_by] for rule in result['rules']), reverse=True)
+    assert got == pytest.approx(sorted(scores, reverse=True)[:k])
+
+
+@pytest.fixture(scope='module', params=['app.py', 'api/app.py', 'api/index.py', 'index.py'])
+def backend_client(request):
+    """A test client of each backend that serves /mine"""
+    module = load_app(request.param, 'topk_' + request.param.replace('/', '_')[:-3])
+    return module.app.test_client()
+
+
+@pytest.mark.parametrize('top_k', ['abc', 0, -3, 2.5, True])
+def test_mine_rejects_invalid_top_k(backend_client, top_k):
+    client = backend_client
+    client.post('/upload', data={'file': (io.BytesIO(b"a,b\nb,c\na,c\n"), 'baskets.csv')})
+    response = client.post('/mine', json={'top_k': top_k})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'top_k must be a positive integer'
@@ -0,0 +1,182 @@
+"""
+Top-k frequent itemset and association rule mining.
+Instead of a user-supplied minimum support, the search keeps the k best results
+in a min-heap and raises its internal threshold to the heap's minimum as soon
+as the heap is full (TKO-style), so a single bounded run returns exactly the
+k best itemsets or rules. The search is a depth-first Eclat over tidsets held
+as Python integers used as bitsets.
+"""
+
+import heapq
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Tuple
+
+from itemset_mining import Itemset, min_support_count
+from vertical import VerticalIndex, itemset_record, rule_record
+
+RANK_METRICS = ('support', 'confidence', 'lift')
+
+# Rule rankings have no anti-monotone bound on the itemset search, so it keeps
+# the same safety floor the adaptive /mine loop never relaxes below.
+RULE_SUPPORT_FLOOR = 0.001
+
+
+class _TopK:
+    """Bounded min-heap whose minimum is the search's current threshold"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap: List[Tuple[Any, ...]] = []
+        self.sequence = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.heap) >= self.k
+
+    @property
+    def threshold(self):
+        return self.heap[0][0] if self.full else None
+
+    def admits(self, score) -> bool:
+        return not self.full or score > self.heap[0][0]
+
+    def push(self, score, payload) -> None:
+        self.sequence += 1
+        entry = (score, -self.sequence, payload)
+        if not self.full:
+            heapq.heappush(self.heap, entry)
+        elif score > self.heap[0][0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def ranked(self) -> List[Any]:
+        return [payload for _, _, payload in sorted(self.heap, reverse=True)]
+
+
+def _eclat(index: VerticalIndex, min_count_of, max_length: Optional[int], visit) -> None:
+    """Depth-first itemset enumeration; min_count_of() is re-read at every step"""
+    stack = [((), [(item, index.tidsets[item], index.counts[item]) for item in index.order])]
+    while stack:
+        prefix, extensions = stack.pop()
+        # Push children in reverse so the most frequent branch is explored first
+        children = []
+        for pos, (item, tidset, count) in enumerate(extensions):
+            if count < min_count_of():
+                continue
+            itemset = prefix + (item,)
+            visit(itemset, count)
+            if max_length is not None and len(itemset) >= max_length:
+                continue
+            child_extensions = []
+            for other, other_tidset, _ in extensions[pos + 1:]:
+                joined = tidset & other_tidset
+                joined_count = joined.bit_count()
+                if joined_count >= min_count_of():
+                    child_extensions.append((other, joined, joined_count))
+            if child_extensions:
+                children.append((itemset, child_extensions))
+        stack.extend(reversed(children))
+
+
+def top_k_itemsets(transactions: List[List[str]], k: int, max_length: Optional[int] = None,
+                   min_confidence: Optional[float] = None) -> Dict[str, Any]:
+    """Exactly the k itemsets with the highest support, plus their rules when min_confidence is given"""
+    if not transactions or k <= 0:
+        return {'itemsets': [], 'rules': [], 'threshold': None}
+
+    index = VerticalIndex(transactions, keep_top=k)
+    best = _TopK(k)
+    _eclat(index, lambda: best.threshold + 1 if best.full else 1, max_length,
+           lambda itemset, count: best.push(count, (itemset, count)))
+
+    ranked = best.ranked()
+    result = {
+        'itemsets': [itemset_record(index, itemset, count) for itemset, count in ranked],
+        'rules': [],
+        'threshold': best.threshold / index.n_transactions if best.full else None
+    }
+
+    if min_confidence is not None:
+        counts = {itemset: count for itemset, count in ranked}
+        for itemset, count in ranked:
+            for size in range(1, len(itemset)):
+                for antecedent in combinations(itemset, size):
+                    consequent = tuple(i for i in itemset if i not in antecedent)
+                    count_a = counts.get(antecedent) or index.count(antecedent)
+                    if count / count_a < min_confidence:
+                        continue
+                    count_c = counts.get(consequent) or index.count(consequent)
+                    result['rules'].append(rule_record(index, antecedent, consequent, count, count_a, count_c))
+
+    return result
+
+
+def top_k_rules(transactions: List[List[str]], k: int, rank_by: str = 'confidence',
+                min_support: Optional[float] = None, max_length: Optional[int] = None) -> Dict[str, Any]:
+    """Exactly the k rules with the highest confidence or lift"""
+    if rank_by not in ('confidence', 'lift'):
+        raise ValueError(f"rank_by must be one of {RANK_METRICS}")
+    if not transactions or k <= 0:
+        return {'itemsets': [], 'rules': [], 'threshold': None}
+
+    n = len(transactions)
+    min_count = max(2, min_support_count(min_support if min_support is not None else RULE_SUPPORT_FLOOR, n))
+    index = VerticalIndex(transactions, min_count)
+    counts: Dict[Itemset, int] = {}
+    best = _TopK(k)
+
+    def count_of(itemset: Itemset) -> int:
+        count = counts.get(itemset)
+        if count is None:
+            count = counts[itemset] = index.count(itemset)
+        return count
+
+    def score(count: int, count_a: int, count_c: int) -> float:
+        confidence = count / count_a
+        return confidence if rank_by == 'confidence' else confidence * n / count_c
+
+    def visit(itemset: Itemset, count: int) -> None:
+        counts[itemset] = count
+        if len(itemset) < 2:
+            return
+        if best.full:
+            # Antecedents and consequents are at least as frequent as the itemset itself
+            if rank_by == 'confidence':
+                bound = count / min(count_of(itemset[:pos] + itemset[pos + 1:]) for pos in range(len(itemset)))
+            else:
+                bound = n / count
+            if bound <= best.threshold:
+                return
+
+        # ap-genrules: consequents grow level-wise and confidence only drops as they grow.
+        # Consequents are tuples of positions so sub-itemsets keep the search's item order.
+        consequents = [(pos,) for pos in range(len(itemset))]
+        while consequents:
+            survivors = []
+            for consequent in consequents:
+                antecedent = tuple(item for pos, item in enumerate(itemset) if pos not in consequent)
+                consequent_items = tuple(itemset[pos] for pos in consequent)
+                count_a, count_c = count_of(antecedent), count_of(consequent_items)
+                rule_score = score(count, count_a, count_c)
+                best.push(rule_score, (antecedent, consequent_items, count, count_a, count_c))
+                if rank_by == 'lift' or best.admits(rule_score):
+                    survivors.append(consequent)
+            consequents = _grow_consequents(survivors, len(itemset))
+
+    _eclat(index, lambda: min_count, max_length, visit)
+
+    ranked = best.ranked()
+    used: Dict[Itemset, int] = {}
+    for antecedent, consequent, count, _, _ in ranked:
+        used.setdefault(tuple(sorted(antecedent + consequent)), count)
+    return {
+        'itemsets': [itemset_record(index, itemset, count) for itemset, count in used.items()],
+        'rules': [rule_record(index, *entry) for entry in ranked],
+        'threshold': best.threshold if best.full else None
+    }
+
+
+def _grow_consequents(consequents: List[Tuple[int, ...]], itemset_length: int) -> List[Tuple[int, ...]]:
+    """Join position-tuple consequents sharing a prefix, always leaving one antecedent item"""
+    if not consequents or len(consequents[0]) + 1 >= itemset_length:
+        return []
+    return [a + (b[-1],) for a, b in combinations(sorted(consequents), 2) if a[:-1] == b[:-1]]
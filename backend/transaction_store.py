@@ -0,0 +1,235 @@
+"""
+Resident transaction store shared by the backends.
+An uploaded dataset is held once as an item dictionary plus CSR arrays: int32
+offsets (int64 beyond 2**31 item occurrences) and uint16 item ids (int32 beyond
+65,536 distinct items), each transaction's ids sorted and distinct. Item ids
+follow first occurrence, the order `itemset_mining.encode_transactions` would
+assign, so the miners take the arrays as their encoding without re-hashing
+item strings. Transactions decode on demand into lists of the dictionary's
+strings; frequencies, lengths, samples and the sparse matrix come straight
+from the arrays. Identical transactions collapse into distinct baskets with
+counts for the weighted miners.
+"""
+
+import random
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from ingest import EncodedTransactions
+
+# Transactions decoded together while iterating
+DECODE_CHUNK = 10_000
+
+# Odd multiplier of the polynomial row hash used to group identical transactions
+ROW_HASH_BASE = np.uint64(0x9E3779B97F4A7C15)
+
+
+def id_dtype(n_items: int) -> type:
+    """Narrowest item id dtype for a dictionary of n_items"""
+    return np.uint16 if n_items <= np.iinfo(np.uint16).max + 1 else np.int32
+
+
+def offset_dtype(nnz: int) -> type:
+    """Narrowest offset dtype for nnz item occurrences"""
+    return np.int32 if nnz <= np.iinfo(np.int32).max else np.int64
+
+
+class TransactionStore(EncodedTransactions, Sequence):
+    """Interned, integer-encoded transactions that read like a list of item lists"""
+
+    def __init__(self, items: List[str], offsets: np.ndarray, item_ids: np.ndarray,
+                 columns: Optional[List[str]] = None):
+        super().__init__(items, offsets, item_ids, columns)
+        self._item_index: Optional[Dict[str, int]] = None
+        self._counts: Optional[np.ndarray] = None
+        self._distinct: Optional[Tuple['TransactionStore', np.ndarray]] = None
+
+    @classmethod
+    def from_arrays(cls, items: List[str], offsets: np.ndarray, item_ids: np.ndarray,
+                    columns: Optional[List[str]] = None) -> 'TransactionStore':
+        """Store of CSR arrays with distinct ids per transaction, renumbering items by first occurrence"""
+        offsets = np.asarray(offsets, dtype=np.int64)
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        used, first = np.unique(item_ids, return_index=True)
+        order = used[np.argsort(first, kind='stable')]
+        remap = np.zeros(len(items), dtype=np.int64)
+        remap[order] = np.arange(len(order))
+
+        ids = remap[item_ids]
+        rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        ids = ids[np.lexsort((ids, rows))]
+        return cls([items[i] for i in order.tolist()], offsets.astype(offset_dtype(len(ids))),
+                   ids.astype(id_dtype(len(order))), columns)
+
+    @classmethod
+    def from_encoded(cls, encoded: EncodedTransactions) -> 'TransactionStore':
+        store = cls.from_arrays(encoded.items, encoded.offsets, encoded.item_ids, encoded.columns)
+        store.source_keys, store.source_ids = encoded.source_keys, encoded.source_ids
+        return store
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Iterable[str]]) -> 'TransactionStore':
+        store = cls([], np.zeros(1, dtype=np.int32), np.zeros(0, dtype=np.uint16))
+        store.extend(transactions)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transaction index out of range")
+        items = self.items
+        return [items[i] for i in self.item_ids[self.offsets[index]:self.offsets[index + 1]].tolist()]
+
+    def __iter__(self) -> Iterator[List[str]]:
+        items, offsets = self.items, self.offsets
+        for start in range(0, len(self), DECODE_CHUNK):
+            stop = min(start + DECODE_CHUNK, len(self))
+            flat = [items[i] for i in self.item_ids[offsets[start]:offsets[stop]].tolist()]
+            bounds = (offsets[start:stop + 1] - offsets[start]).tolist()
+            for i in range(stop - start):
+                yield flat[bounds[i]:bounds[i + 1]]
+
+    def transactions(self) -> List[List[str]]:
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the CSR arrays"""
+        return self.offsets.nbytes + self.item_ids.nbytes
+
+    @property
+    def item_index(self) -> Dict[str, int]:
+        """Item name -> id, built on first use"""
+        if self._item_index is None:
+            self._item_index = {item: idx for idx, item in enumerate(self.items)}
+        return self._item_index
+
+    def item_counts(self) -> np.ndarray:
+        """Number of transactions containing each item id, computed once"""
+        if self._counts is None:
+            self._counts = np.bincount(self.item_ids, minlength=len(self.items))
+        return self._counts
+
+    def item_frequencies(self) -> Dict[str, int]:
+        """Item name -> number of transactions containing it, in first-occurrence order"""
+        return dict(zip(self.items, self.item_counts().tolist()))
+
+    def length_stats(self) -> Dict[str, Any]:
+        """Transaction count, distinct items and transaction length summary"""
+        lengths = self.lengths()
+        return {
+            "total_transactions": len(self),
+            "unique_items": len(self.items),
+            "total_items": int(lengths.sum()),
+            "avg_items_per_transaction": float(lengths.mean()) if len(self) else 0.0,
+            "min_items": int(lengths.min()) if len(self) else 0,
+            "max_items": int(lengths.max()) if len(self) else 0
+        }
+
+    def encoded(self, start: int = 0, stop: Optional[int] = None) -> List[Tuple[int, ...]]:
+        """Transactions start..stop as sorted item-id tuples"""
+        stop = len(self) if stop is None else stop
+        flat = tuple(self.item_ids[self.offsets[start]:self.offsets[stop]].tolist())
+        bounds = (self.offsets[start:stop + 1] - self.offsets[start]).tolist()
+        return [flat[bounds[i]:bounds[i + 1]] for i in range(stop - start)]
+
+    def matrix(self) -> sparse.csr_matrix:
+        """Binary (transactions x items) CSR matrix over the stored arrays"""
+        data = np.ones(len(self.item_ids), dtype=np.int32)
+        return sparse.csr_matrix((data, self.item_ids.astype(np.int32), self.offsets.astype(np.int64)),
+                                 shape=(len(self), len(self.items)))
+
+    def basket_ids(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Per transaction, the index of its distinct basket, numbered by first appearance;
+        and per basket, the row where it first appears"""
+        n = len(self)
+        lengths = np.diff(self.offsets).astype(np.int64)
+        starts = self.offsets[:-1].astype(np.int64)
+        positions = np.arange(len(self.item_ids)) - np.repeat(starts, lengths)
+        powers = np.cumprod(np.full(max(int(lengths.max(initial=0)), 1), ROW_HASH_BASE, dtype=np.uint64))
+        terms = (self.item_ids.astype(np.uint64) + np.uint64(1)) * powers[positions]
+        hashes = np.zeros(n, dtype=np.uint64)
+        filled = lengths > 0
+        if filled.any():
+            hashes[filled] = np.add.reduceat(terms, starts[filled])
+
+        # Group rows by (hash, length); the first row of each group is its representative
+        order = np.lexsort((np.arange(n), lengths, hashes))
+        new_group = np.ones(n, dtype=bool)
+        new_group[1:] = (hashes[order][1:] != hashes[order][:-1]) | (lengths[order][1:] != lengths[order][:-1])
+        heads = order[new_group]
+        representative = np.empty(n, dtype=np.int64)
+        representative[order] = heads[np.cumsum(new_group) - 1]
+
+        rep_positions = np.repeat(starts[representative], lengths) + positions
+        if not np.array_equal(self.item_ids, self.item_ids[rep_positions]):
+            # Hash collision: group the tuples exactly instead
+            first: Dict[Tuple[int, ...], int] = {}
+            representative = np.array([first.setdefault(t, row) for row, t in enumerate(self.encoded())],
+                                      dtype=np.int64)
+
+        firsts = np.flatnonzero(representative == np.arange(n))
+        return np.searchsorted(firsts, representative), firsts
+
+    def distinct(self) -> Tuple['TransactionStore', np.ndarray]:
+        """Distinct baskets in first-appearance order and the number of transactions each stands for
+
+        Item ids match this store's, since every item first occurs in a first-appearing basket.
+        """
+        if self._distinct is None:
+            basket_ids, firsts = self.basket_ids()
+            weights = np.bincount(basket_ids, minlength=len(firsts))
+            self._distinct = (self if len(firsts) == len(self) else self.take(firsts), weights)
+        return self._distinct
+
+    def take(self, rows: Iterable[int]) -> 'TransactionStore':
+        """Store of the given transactions, in the given order"""
+        rows = np.asarray(list(rows), dtype=np.int64)
+        starts, lengths = self.offsets[rows].astype(np.int64), np.diff(self.offsets)[rows].astype(np.int64)
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return TransactionStore.from_arrays(self.items, offsets, self.item_ids[positions], self.columns)
+
+    def sample(self, n: int, seed: Optional[int] = None) -> 'TransactionStore':
+        """n transactions drawn without replacement, the same draw random.Random(seed).sample makes"""
+        return self.take(random.Random(seed).sample(range(len(self)), n))
+
+    def extend(self, transactions: Iterable[Iterable[str]]) -> None:
+        """Append item-name transactions; unseen items get the next ids"""
+        item_index, items = self.item_index, self.items
+        lengths: List[int] = []
+        ids: List[int] = []
+        for transaction in transactions:
+            row = set()
+            for item in transaction:
+                idx = item_index.get(item)
+                if idx is None:
+                    idx = item_index[item] = len(items)
+                    items.append(item)
+                row.add(idx)
+            ids.extend(sorted(row))
+            lengths.append(len(row))
+        if not lengths:
+            return
+
+        nnz = int(self.offsets[-1]) + len(ids)
+        offsets = np.empty(len(self.offsets) + len(lengths), dtype=offset_dtype(nnz))
+        offsets[:len(self.offsets)] = self.offsets
+        np.cumsum(lengths, out=offsets[len(self.offsets):])
+        offsets[len(self.offsets):] += self.offsets[-1]
+        self.offsets = offsets
+        self.item_ids = np.concatenate([self.item_ids, np.array(ids, dtype=np.int64)]).astype(id_dtype(len(items)))
+        self._counts = None
+        self._distinct = None
+        # Appended transactions have no source rows
+        self.source_keys, self.source_ids = None, []
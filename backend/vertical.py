@@ -0,0 +1,76 @@
+"""
+Vertical transaction representation shared by the depth-first miners.
+Each item keeps its tidset (the set of transactions containing it) as a Python
+integer used as a bitset, so intersections and support counts run in C.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from itemset_mining import Itemset
+from pairwise import encode_matrix
+
+
+class VerticalIndex:
+    """Item tidsets of a transaction set, stored as integer bitsets"""
+
+    def __init__(self, transactions: List[List[str]], min_count: int = 1, keep_top: Optional[int] = None):
+        self.items, matrix = encode_matrix(transactions)
+        self.n_transactions = matrix.shape[0]
+
+        columns = matrix.tocsc()
+        counts = np.diff(columns.indptr)
+        if keep_top and len(counts):
+            # No itemset can beat the keep_top-th most frequent single item
+            min_count = max(min_count, int(np.sort(counts)[::-1][min(keep_top, len(counts)) - 1]))
+        selected = np.flatnonzero(counts >= min_count)
+        # Most frequent items first: their extensions raise the threshold fastest
+        self.order = selected[np.argsort(-counts[selected], kind='stable')].tolist()
+        self.counts = {item: int(counts[item]) for item in self.order}
+
+        self.tidsets: Dict[int, int] = {}
+        mask = np.zeros(self.n_transactions, dtype=bool)
+        for item in self.order:
+            tids = columns.indices[columns.indptr[item]:columns.indptr[item + 1]]
+            mask[tids] = True
+            self.tidsets[item] = int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+            mask[tids] = False
+
+    def count(self, itemset: Itemset) -> int:
+        """Support count of an arbitrary itemset of indexed items"""
+        if len(itemset) == 1:
+            return self.counts[itemset[0]]
+        tidset = self.tidsets[itemset[0]]
+        for item in itemset[1:]:
+            tidset &= self.tidsets[item]
+        return tidset.bit_count()
+
+
+def rule_record(index: VerticalIndex, antecedent: Itemset, consequent: Itemset,
+                count: int, count_a: int, count_c: int) -> Dict[str, Any]:
+    """Association rule in the backends' JSON-ready format"""
+    n = index.n_transactions
+    support, support_a, support_c = count / n, count_a / n, count_c / n
+    confidence = count / count_a
+    leverage = support - support_a * support_c
+    denominator = max(support * (1 - support_a), support_a * (support_c - support))
+    return {
+        'antecedents': [index.items[i] for i in antecedent],
+        'consequents': [index.items[i] for i in consequent],
+        'support': support,
+        'confidence': confidence,
+        'lift': confidence / support_c,
+        'leverage': leverage,
+        'conviction': (1 - support_c) / (1 - confidence) if confidence < 1 else None,
+        'zhangs_metric': leverage / denominator if denominator else 0.0
+    }
+
+
+def itemset_record(index: VerticalIndex, itemset: Itemset, count: int) -> Dict[str, Any]:
+    """Itemset in the backends' JSON-ready format"""
+    return {
+        'itemset': [index.items[i] for i in itemset],
+        'support': count / index.n_transactions,
+        'length': len(itemset)
+    }
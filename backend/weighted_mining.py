@@ -0,0 +1,145 @@
+"""
+Weighted FP-growth and Eclat for collapsed transactions.
+Both take the distinct encoded transactions with the number of transactions
+each stands for, so a dataset of repeated baskets is mined at the cost of its
+distinct baskets: FP-tree nodes and conditional pattern bases carry counts,
+and Eclat tidsets index distinct baskets whose weights are summed for support.
+Results match `itemset_mining.apriori_counts` exactly.
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from itemset_mining import Itemset, apriori_counts, encode_weighted, itemset_records, min_support_count
+from pairwise import transaction_matrix
+
+
+class FPNode:
+    """FP-tree node holding the weighted count of the prefix path ending here"""
+
+    __slots__ = ('item', 'parent', 'count', 'children')
+
+    def __init__(self, item: Optional[int], parent: Optional['FPNode']):
+        self.item = item
+        self.parent = parent
+        self.count = 0
+        self.children: Dict[int, 'FPNode'] = {}
+
+
+def _fp_mine(paths: List[Tuple[Itemset, int]], counts: Dict[int, int], suffix: Itemset, min_count: int,
+             max_length: Optional[int], result: Dict[Itemset, int]) -> None:
+    """Mine the FP-tree of a weighted pattern base whose frequent items have the given counts"""
+    order = sorted(counts, key=lambda item: (-counts[item], item))
+    rank = {item: r for r, item in enumerate(order)}
+
+    root = FPNode(None, None)
+    header: Dict[int, List[FPNode]] = {}
+    for path, weight in paths:
+        node = root
+        for item in sorted((i for i in path if i in rank), key=rank.__getitem__):
+            child = node.children.get(item)
+            if child is None:
+                child = node.children[item] = FPNode(item, node)
+                header.setdefault(item, []).append(child)
+            child.count += weight
+            node = child
+
+    # Least frequent items first, each conditioned on the more frequent items above it
+    for item in reversed(order):
+        itemset = suffix + (item,)
+        result[tuple(sorted(itemset))] = counts[item]
+        if max_length is not None and len(itemset) >= max_length:
+            continue
+
+        base: List[Tuple[Itemset, int]] = []
+        base_counts: Counter = Counter()
+        for node in header[item]:
+            path = []
+            parent = node.parent
+            while parent.item is not None:
+                path.append(parent.item)
+                parent = parent.parent
+            if path:
+                base.append((tuple(path), node.count))
+                for prefix_item in path:
+                    base_counts[prefix_item] += node.count
+
+        frequent = {i: c for i, c in base_counts.items() if c >= min_count}
+        if frequent:
+            _fp_mine(base, frequent, itemset, min_count, max_length, result)
+
+
+def fpgrowth_counts(encoded: List[Itemset], min_count: int, max_length: Optional[int] = None,
+                    weights: Optional[List[int]] = None) -> Dict[Itemset, int]:
+    """Return {itemset: support count} for every frequent itemset, mined with a weighted FP-tree"""
+    if weights is None:
+        weights = [1] * len(encoded)
+    item_counts: Counter = Counter()
+    for transaction, weight in zip(encoded, weights):
+        for item in transaction:
+            item_counts[item] += weight
+
+    result: Dict[Itemset, int] = {}
+    frequent = {item: count for item, count in item_counts.items() if count >= min_count}
+    if frequent:
+        _fp_mine(list(zip(encoded, weights)), frequent, (), min_count, max_length, result)
+    return result
+
+
+def eclat_counts(encoded: List[Itemset], min_count: int, max_length: Optional[int] = None,
+                 weights: Optional[List[int]] = None) -> Dict[Itemset, int]:
+    """Return {itemset: support count} for every frequent itemset, mined depth-first over weighted tidsets"""
+    weight = np.asarray(weights if weights is not None else [1] * len(encoded), dtype=np.int64)
+    n_items = max((t[-1] for t in encoded if t), default=-1) + 1
+    columns = transaction_matrix(encoded, n_items).tocsc()
+    columns.sort_indices()
+
+    siblings = []
+    for item in range(n_items):
+        tids = columns.indices[columns.indptr[item]:columns.indptr[item + 1]]
+        count = int(weight[tids].sum())
+        if count >= min_count:
+            siblings.append((item, tids, count))
+    siblings.sort(key=lambda entry: (entry[2], entry[0]))
+
+    result: Dict[Itemset, int] = {}
+
+    def extend(prefix: Itemset, siblings: List[Tuple[int, np.ndarray, int]]) -> None:
+        for pos, (item, tids, count) in enumerate(siblings):
+            itemset = prefix + (item,)
+            result[tuple(sorted(itemset))] = count
+            if max_length is not None and len(itemset) >= max_length:
+                continue
+            children = []
+            for other, other_tids, _ in siblings[pos + 1:]:
+                shared = np.intersect1d(tids, other_tids, assume_unique=True)
+                shared_count = int(weight[shared].sum())
+                if shared_count >= min_count:
+                    children.append((other, shared, shared_count))
+            if children:
+                extend(itemset, children)
+
+    extend((), siblings)
+    return result
+
+
+COUNTING_ENGINES = {
+    'apriori': apriori_counts,
+    'fpgrowth': fpgrowth_counts,
+    'eclat': eclat_counts
+}
+
+
+def mine_weighted_itemsets(transactions: List[List[str]], min_support: float, algorithm: str = 'apriori',
+                           max_length: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Mine frequent itemsets over collapsed transactions with the named engine, in the backends' JSON-ready format"""
+    if not transactions:
+        return []
+
+    items, encoded, weights = encode_weighted(transactions)
+    n_transactions = sum(weights)
+    engine = COUNTING_ENGINES.get(algorithm, apriori_counts)
+    counts = engine(encoded, min_support_count(min_support, n_transactions), max_length, weights)
+    return itemset_records(items, counts, n_transactions)
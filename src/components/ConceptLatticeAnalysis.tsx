@@ -471,7 +471,7 @@ const ConceptLatticeAnalysis: React.FC = () => {
           <div className="flex items-center gap-2">
             <input
               type="file"
-              accept=".csv,.json,.xlsx,.xls"
+              accept=".csv,.json,.ndjson,.jsonl,.xlsx,.xls,.gz,.zst"
               onChange={handleFileUpload}
               className="hidden"
               id="lattice-file-upload"
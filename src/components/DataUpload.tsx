@@ -27,7 +27,7 @@ export default function DataUpload({ onDataProcessed, onProcessingStart, onProce
     }
 
     // Check file extension
-    const allowedExtensions = ['.csv', '.json', '.xlsx', '.xls'];
+    const allowedExtensions = ['.csv', '.json', '.ndjson', '.jsonl', '.xlsx', '.xls', '.gz', '.zst'];
     const fileExtension = '.' + file.name.split('.').pop()?.toLowerCase();
     if (!allowedExtensions.includes(fileExtension)) {
       return 'Invalid file format. Please upload CSV, JSON, or Excel files';
@@ -65,9 +65,12 @@ export default function DataUpload({ onDataProcessed, onProcessingStart, onProce
     onDrop,
     accept: {
       'application/json': ['.json'],
+      'application/x-ndjson': ['.ndjson', '.jsonl'],
       'text/csv': ['.csv'],
       'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': ['.xlsx'],
       'application/vnd.ms-excel': ['.xls'],
+      'application/gzip': ['.gz'],
+      'application/zstd': ['.zst'],
     },
     multiple: false,
   });
@@ -341,7 +344,7 @@ export default function DataUpload({ onDataProcessed, onProcessingStart, onProce
               Drag and drop a transaction file here, or click to select
             </p>
             <p className="text-sm text-gray-500">
-              Supports JSON, CSV, and Excel files
+              Supports JSON, CSV, and Excel files (optionally .gz or .zst compressed)
             </p>
           </div>
         )}